@@ -11,10 +11,20 @@ def account_types():
     return AccountContainer, LedgerAccount
 
 
+@plugins.register(plugins.Config)
+def config_class():
+    from ape_ledger.config import LedgerConfig
+
+    return LedgerConfig
+
+
 def __getattr__(name: str) -> Any:
-    if name in ("AccountContainer", "LedgerAccount"):
+    if name in ("AccountContainer", "LedgerAccount", "SigningRequest"):
         return getattr(import_module("ape_ledger.accounts"), name)
 
+    elif name == "LedgerConfig":
+        return getattr(import_module("ape_ledger.config"), name)
+
     else:
         raise AttributeError(name)
 
@@ -22,4 +32,6 @@ def __getattr__(name: str) -> Any:
 __all__ = [
     "AccountContainer",
     "LedgerAccount",
+    "LedgerConfig",
+    "SigningRequest",
 ]
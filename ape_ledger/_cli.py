@@ -1,4 +1,6 @@
-from typing import TYPE_CHECKING, Union
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
 
 import click
 from ape.cli.arguments import existing_alias_argument, non_existing_alias_argument
@@ -6,35 +8,139 @@ from ape.cli.options import ape_cli_context, network_option, skip_confirmation_o
 
 if TYPE_CHECKING:
     # NOTE: Type-checking only imports so CLI help loads faster.
-    from ape.api import AccountAPI
-    from ape_ledger.accounts import LedgerAccount
+    from ape.api import AccountAPI, ProviderAPI
     from ape_ledger.hdpath import HDAccountPath, HDBasePath
 
-from ape_ledger.exceptions import LedgerSigningError
+from ape_ledger.exceptions import LedgerAccountException, LedgerSigningError
+from ape_ledger.profiling import phase
+from ape_ledger.tracing import FORMATS, JSONL
 
 
-def _select_account(hd_path: Union["HDBasePath", str]) -> tuple[str, "HDAccountPath"]:
+def _select_account(
+    hd_path: Union["HDBasePath", str], provider: Optional["ProviderAPI"] = None
+) -> tuple[str, "HDAccountPath"]:
     # NOTE: Lazy import so CLI help loads faster.
     from ape_ledger.choices import AddressPromptChoice
 
-    choices = AddressPromptChoice(hd_path)
+    choices = AddressPromptChoice(hd_path, provider=provider)
     return choices.get_user_selected_account()
 
 
 @click.group(short_help="Manage Ledger accounts")
-def cli():
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar="APE_LEDGER_PROFILE",
+    help="Print how long each phase of the command took, such as opening the device.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    envvar="APE_LEDGER_PROFILE_OUTPUT",
+    help="Also profile the command with cProfile and write the stats to this file.",
+)
+@click.option(
+    "--trace",
+    "trace_output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    envvar="APE_LEDGER_TRACE",
+    help="Trace the steps of each request, such as encoding and device exchanges, to this file.",
+)
+@click.option(
+    "--trace-format",
+    type=click.Choice(FORMATS),
+    default=JSONL,
+    envvar="APE_LEDGER_TRACE_FORMAT",
+    help="Write a JSON line per span or collapsed stacks for flamegraph tools.",
+)
+@click.pass_context
+def cli(ctx, profile, profile_output, trace_output, trace_format):
     """
     Manage Ledger hardware device accounts.
     """
+    if trace_output:
+        _start_tracing(ctx, trace_output, trace_format)
+
+    if profile or profile_output:
+        _start_profiling(ctx, profile_output)
+
+
+def _start_tracing(ctx, trace_output: Path, trace_format: str):
+    from ape_ledger.tracing import disable_tracing, enable_tracing
+
+    enable_tracing()
+
+    def stop_tracing():
+        if tracer := disable_tracing():
+            tracer.export(trace_output, format=trace_format)
+            click.echo(f"Trace written to '{trace_output}'.", err=True)
+
+    ctx.call_on_close(stop_tracing)
+
+
+def _start_profiling(ctx, profile_output: Optional[Path]):
+    from importlib import import_module
+
+    from ape_ledger.profiling import disable_profiling, enable_profiling
+
+    enable_profiling(use_cprofile=profile_output is not None)
+    with phase("import"):
+        # NOTE: Includes loading the ape managers the plugin needs.
+        import_module("ape_ledger.accounts")
+
+    def stop_profiling():
+        if profiler := disable_profiling():
+            click.echo(profiler.report(), err=True)
+            if profile_output:
+                profiler.dump_stats(profile_output)
+                click.echo(f"cProfile stats written to '{profile_output}'.", err=True)
+
+    ctx.call_on_close(stop_profiling)
 
 
 @cli.command("list")
 @ape_cli_context()
-def _list(cli_ctx):
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json", "jsonl", "csv"]),
+    default="text",
+    help="The output format. The machine-readable formats stream each account as it is read.",
+)
+@click.option(
+    "--filter",
+    "account_filter",
+    help="Only list accounts with aliases matching a glob pattern, or HD paths starting with m/...",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Check that each address matches the connected device. "
+    "Accounts already verified are skipped, unless older than --max-age.",
+)
+@click.option(
+    "--max-age",
+    type=click.FloatRange(min=0),
+    help="With --verify, check accounts verified longer ago than this many seconds again.",
+)
+def _list(cli_ctx, output_format, account_filter, verify, max_age):
     """List your Ledger accounts in ape"""
 
-    ledger_accounts = _get_ledger_accounts()
+    container = cli_ctx.account_manager.containers["ledger"]
+    is_path_filter = bool(account_filter) and account_filter.startswith("m/")
+    records = container.iter_records(
+        alias_pattern=None if is_path_filter else account_filter,
+        hd_path_prefix=account_filter if is_path_filter else None,
+    )
+    if verify:
+        _verify_accounts(cli_ctx, records, output_format, max_age)
+        return
+
+    elif output_format != "text":
+        _echo_records(records, output_format)
+        return
 
+    ledger_accounts = list(records)
     if len(ledger_accounts) == 0:
         cli_ctx.logger.warning("No accounts found.")
         return
@@ -45,17 +151,111 @@ def _list(cli_ctx):
     click.echo(header)
 
     for account in ledger_accounts:
-        alias_display = f" (alias: '{account.alias}')" if account.alias else ""
-        hd_path_display = f" (hd-path: '{account.hdpath}')" if account.hdpath else ""
-        click.echo(f"  {account.address}{alias_display}{hd_path_display}")
+        alias_display = f" (alias: '{account['alias']}')" if account["alias"] else ""
+        hd_path_display = f" (hd-path: '{account['hdpath']}')" if account["hdpath"] else ""
+        click.echo(f"  {account['address']}{alias_display}{hd_path_display}")
+
+
+def _verify_accounts(cli_ctx, records: Iterable[dict], output_format: str, max_age):
+    from datetime import datetime
 
+    from ape_ledger.store import AccountRecord
+    from ape_ledger.verification import MISMATCH, VERIFIED, verify_accounts
 
-def _get_ledger_accounts() -> list["LedgerAccount"]:
-    from ape.utils.basemodel import ManagerAccessMixin
+    results = verify_accounts((AccountRecord(**r) for r in records), max_age=max_age)
+    mismatches = []
+    if output_format != "text":
+
+        def iter_rows() -> Iterator[dict]:
+            # NOTE: Streamed, so each result shows as soon as it is checked.
+            for result in results:
+                if result.status == MISMATCH:
+                    mismatches.append(result)
+
+                yield result.to_dict()
+
+        fieldnames = ("alias", "address", "hdpath", "status", "verified_at", "device_address")
+        _echo_records(iter_rows(), output_format, fieldnames=fieldnames)
+
+    else:
+        num_accounts = 0
+        for result in results:
+            num_accounts += 1
+            if result.status == MISMATCH:
+                mismatches.append(result)
+                status = f"MISMATCH, the device has '{result.device_address}'"
+            else:
+                verified_at = datetime.fromtimestamp(result.verified_at or 0).isoformat(
+                    sep=" ", timespec="seconds"
+                )
+                action = "verified" if result.status == VERIFIED else "last verified"
+                status = f"{action} {verified_at}"
+
+            click.echo(
+                f"  {result.address} (alias: '{result.alias}') "
+                f"(hd-path: '{result.hdpath}') [{status}]"
+            )
+
+        if num_accounts == 0:
+            cli_ctx.logger.warning("No accounts found.")
+
+    if mismatches:
+        aliases = ", ".join(f"'{r.alias}'" for r in mismatches)
+        cli_ctx.abort(
+            f"{len(mismatches)} account(s) do not match the connected device: {aliases}. "
+            "Check that it is the right device, with the right seed."
+        )
+
+
+def _echo_records(
+    records: Iterable[dict],
+    output_format: str,
+    file=None,
+    fieldnames: Sequence[str] = ("alias", "address", "hdpath"),
+):
+    import json
+
+    if output_format == "csv":
+        import csv
+        import sys
+
+        stream = file or sys.stdout
+        writer = csv.DictWriter(stream, fieldnames=list(fieldnames))
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            stream.flush()
+
+    elif output_format == "jsonl":
+        for record in records:
+            click.echo(json.dumps(record), file=file)
+
+    else:
+        # A JSON array, written one element at a time.
+        separator = "\n"
+        click.echo("[", nl=False, file=file)
+        for record in records:
+            click.echo(f"{separator}  {json.dumps(record)}", nl=False, file=file)
+            separator = ",\n"
+
+        click.echo("\n]" if separator != "\n" else "]", file=file)
 
-    from ape_ledger.accounts import LedgerAccount
 
-    return [a for a in ManagerAccessMixin.account_manager if isinstance(a, LedgerAccount)]
+def _read_records(file, input_format: str) -> Iterator[dict]:
+    import json
+
+    if input_format == "csv":
+        import csv
+
+        yield from csv.DictReader(file)
+
+    elif input_format == "jsonl":
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+    else:
+        yield from json.load(file)
 
 
 def _hdpath_callback(ctx, param, val) -> "HDBasePath":
@@ -76,15 +276,169 @@ def _hdpath_callback(ctx, param, val) -> "HDBasePath":
     ),
     callback=_hdpath_callback,
 )
-def add(cli_ctx, alias, hd_path):
+@click.option(
+    "--balances",
+    "balances_network",
+    is_flag=False,
+    flag_value="",
+    default=None,
+    metavar="[NETWORK]",
+    help=(
+        "Show the balance and nonce of each address, using the given network choice "
+        "(e.g. ethereum:mainnet:node). Defaults to your default network."
+    ),
+)
+def add(cli_ctx, alias, hd_path, balances_network):
     """Add an account from your Ledger hardware wallet"""
 
-    address, account_hd_path = _select_account(hd_path)
+    if balances_network is None:
+        address, account_hd_path = _select_account(hd_path)
+    else:
+        with cli_ctx.network_manager.parse_network_choice(balances_network or None) as provider:
+            address, account_hd_path = _select_account(hd_path, provider=provider)
+
     container = cli_ctx.account_manager.containers["ledger"]
     container.save_account(alias, address, str(account_hd_path))
     cli_ctx.logger.success(f"Account '{address}' successfully added with alias '{alias}'.")
 
 
+@cli.command(short_help="Find the HD path of an address and add it")
+@ape_cli_context()
+@non_existing_alias_argument()
+@click.argument("address")
+@click.option(
+    "--hd-path",
+    "hd_paths",
+    multiple=True,
+    help=(
+        "An HD path template to search, where {x} is the account ID. "
+        "Repeat to search several. Defaults to m/44'/60'/{x}'/0/0."
+    ),
+)
+@click.option("--start", type=click.IntRange(min=0), default=0, help="The first account ID.")
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=100,
+    help="The number of account IDs to search in each HD path.",
+)
+def find_address(cli_ctx, alias, address, hd_paths, start, limit):
+    """
+    Search the account IDs of the HD path templates for ADDRESS
+    and add the account as ALIAS when found.
+    """
+
+    from eth_utils import is_address, to_checksum_address
+
+    from ape_ledger.derivation import find_address as _find_address
+    from ape_ledger.hdpath import HDBasePath
+
+    if not is_address(address):
+        cli_ctx.abort(f"Invalid address '{address}'.")
+
+    address = to_checksum_address(address)
+    base_paths = [HDBasePath(p) for p in hd_paths] or [HDBasePath()]
+    account_hd_path = _find_address(address, base_paths, start=start, limit=limit)
+    if account_hd_path is None:
+        searched = ", ".join(str(p) for p in base_paths)
+        cli_ctx.abort(
+            f"Address '{address}' not found in account IDs {start} to {start + limit - 1} "
+            f"of {searched}."
+        )
+
+    container = cli_ctx.account_manager.containers["ledger"]
+    container.save_account(alias, address, str(account_hd_path))
+    cli_ctx.logger.success(
+        f"Account '{address}' found at '{account_hd_path}' and added with alias '{alias}'."
+    )
+
+
+@cli.command(short_help="Find the used accounts of common HD path layouts")
+@ape_cli_context()
+@click.option(
+    "--hd-path",
+    "hd_paths",
+    multiple=True,
+    help=(
+        "An HD path template to sweep, where {x} is the account ID. Repeat to sweep several. "
+        "Defaults to the Ledger Live, legacy and BIP-44 standard layouts."
+    ),
+)
+@click.option(
+    "--gap-limit",
+    type=click.IntRange(min=1),
+    default=20,
+    help="Stop sweeping a template after this many unused addresses in a row.",
+)
+@click.option(
+    "--network",
+    help="The network choice to get balances and nonces from. Defaults to your default network.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "jsonl", "csv"]),
+    default="table",
+    help="The output format.",
+)
+@click.option(
+    "--alias-prefix",
+    default="ledger-",
+    help="The prefix of the suggested aliases, numbered by rank.",
+)
+def discover(cli_ctx, hd_paths, gap_limit, network, output_format, alias_prefix):
+    """
+    Sweep several HD path templates side by side for used (funded or transacted)
+    addresses, listed highest balance first with suggested aliases.
+    """
+
+    from ape_ledger.discovery import COMMON_BASE_PATHS, discover_accounts
+
+    with cli_ctx.network_manager.parse_network_choice(network) as provider:
+        accounts = discover_accounts(
+            provider, base_paths=hd_paths or COMMON_BASE_PATHS, gap_limit=gap_limit
+        )
+        symbol = provider.network.ecosystem.fee_token_symbol
+        decimals = 10**provider.network.ecosystem.fee_token_decimals
+
+    records = [
+        {
+            "alias": f"{alias_prefix}{rank}",
+            "address": account.address,
+            "hdpath": account.hd_path.path,
+            "balance": account.balance,
+            "nonce": account.nonce,
+        }
+        for rank, account in enumerate(accounts)
+    ]
+    if output_format == "jsonl":
+        import json
+
+        for record in records:
+            click.echo(json.dumps(record))
+
+    elif output_format == "csv":
+        import csv
+        import sys
+
+        writer = csv.DictWriter(
+            sys.stdout, fieldnames=["alias", "address", "hdpath", "balance", "nonce"]
+        )
+        writer.writeheader()
+        writer.writerows(records)
+
+    elif not records:
+        cli_ctx.logger.warning("No used accounts found.")
+
+    else:
+        for record in records:
+            balance = f"{record['balance'] / decimals:.6f} {symbol}"
+            click.echo(
+                f"{record['alias']:<16}{record['address']}  {record['hdpath']:<22}"
+                f"{balance:>24}  nonce {record['nonce']}"
+            )
+
+
 def _filter_accounts(acct: "AccountAPI") -> bool:
     from ape_ledger.accounts import LedgerAccount
 
@@ -109,8 +463,8 @@ def delete_all(cli_ctx, skip_confirmation):
     """Remove all Ledger accounts from ape"""
 
     container = cli_ctx.account_manager.containers["ledger"]
-    ledger_accounts = _get_ledger_accounts()
-    if len(ledger_accounts) == 0:
+    aliases = list(container.aliases)
+    if len(aliases) == 0:
         cli_ctx.logger.warning("No accounts found.")
         return
 
@@ -119,9 +473,111 @@ def delete_all(cli_ctx, skip_confirmation):
         cli_ctx.logger.info("No account were removed.")
         return
 
-    for account in ledger_accounts:
-        container.delete_account(account.alias)
-        cli_ctx.logger.success(f"Account '{account.alias}' has been removed.")
+    container.bulk_delete(aliases)
+    cli_ctx.logger.success(f"Removed {len(aliases)} account(s).")
+
+
+@cli.command("import", short_help="Add many accounts from a file")
+@ape_cli_context()
+@click.argument("input_file", type=click.File("r"), default="-")
+@click.option(
+    "--format",
+    "input_format",
+    type=click.Choice(["json", "jsonl", "csv"]),
+    help="The file format. Defaults to the file extension, or jsonl.",
+)
+@click.option("--overwrite", is_flag=True, help="Replace accounts with the same aliases.")
+def _import(cli_ctx, input_file, input_format, overwrite):
+    """
+    Add the accounts in a file, as written by 'ape ledger export', in one atomic step.
+    Each account has an alias, address and hdpath. Nothing is added if any account is invalid.
+    """
+    container = cli_ctx.account_manager.containers["ledger"]
+    input_format = input_format or _get_file_format(input_file.name)
+    existing = set() if overwrite else set(container.aliases)
+
+    def check_aliases(records: Iterable[dict]) -> Iterator[dict]:
+        seen = set()
+        for record in records:
+            if not isinstance(record, dict):
+                raise LedgerAccountException(f"Invalid account record '{record}'.")
+
+            alias = record.get("alias")
+            if alias in seen:
+                raise LedgerAccountException(f"Alias '{alias}' is in the file more than once.")
+            elif alias in existing:
+                raise LedgerAccountException(
+                    f"Account with alias '{alias}' already exists. "
+                    "Use '--overwrite' to replace it."
+                )
+
+            seen.add(alias)
+            yield record
+
+    try:
+        count = container.bulk_save(check_aliases(_read_records(input_file, input_format)))
+    except (ValueError, KeyError, TypeError) as err:
+        # Including JSON decoding errors, and JSON of another shape than a list of objects.
+        cli_ctx.abort(f"Invalid '{input_format}' file: {err}")
+    except OSError as err:
+        cli_ctx.abort(f"Failed to read '{input_file.name}': {err}")
+
+    cli_ctx.logger.success(f"Added {count} account(s).")
+
+
+@cli.command(short_help="Write your accounts to a file")
+@ape_cli_context()
+@click.argument("output_file", type=click.File("w"), default="-")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["json", "jsonl", "csv"]),
+    help="The file format. Defaults to the file extension, or jsonl.",
+)
+@click.option(
+    "--filter",
+    "account_filter",
+    help="Only export accounts with aliases matching a glob pattern, or HD paths from m/...",
+)
+def export(cli_ctx, output_file, output_format, account_filter):
+    """
+    Write your Ledger accounts to a file, streaming each account as it is read,
+    e.g. to add them on another machine using 'ape ledger import'.
+    """
+    container = cli_ctx.account_manager.containers["ledger"]
+    is_path_filter = bool(account_filter) and account_filter.startswith("m/")
+    records = container.iter_records(
+        alias_pattern=None if is_path_filter else account_filter,
+        hd_path_prefix=account_filter if is_path_filter else None,
+    )
+    _echo_records(records, output_format or _get_file_format(output_file.name), file=output_file)
+
+
+def _get_file_format(file_name: str) -> str:
+    suffix = Path(file_name).suffix.lstrip(".").lower()
+    return suffix if suffix in ("json", "jsonl", "csv") else "jsonl"
+
+
+@cli.command(short_help="Copy the account files into the SQLite store")
+@ape_cli_context()
+@click.option(
+    "--delete-files",
+    is_flag=True,
+    help="Delete the account files once copied.",
+)
+def migrate(cli_ctx, delete_files):
+    """
+    Copy the Ledger account files (one JSON file per account) into the
+    SQLite account store, used when the 'account_store' config is 'sqlite'.
+    """
+    from ape_ledger.store import get_account_store, migrate_json_accounts
+
+    container = cli_ctx.account_manager.containers["ledger"]
+    store = get_account_store(container.data_folder)
+    count = migrate_json_accounts(container.data_folder, store, delete_files=delete_files)
+    cli_ctx.logger.success(f"Copied {count} account(s) to '{store.path}'.")
+    if cli_ctx.config_manager.get_config("ledger").account_store != "sqlite":
+        cli_ctx.logger.info("Set 'account_store: sqlite' in the 'ledger' config to use it.")
 
 
 @cli.command(short_help="Sign a message with your Ledger device")
@@ -152,7 +608,9 @@ def _sign_message(cli_ctx, alias, message):
         cli_ctx.abort(f"Account with alias '{alias}' does not exist.")
 
     eip191message = encode_defunct(text=message)
-    account = cli_ctx.account_manager.load(alias)
+    with phase("load"):
+        account = cli_ctx.account_manager.load(alias)
+
     signature = account.sign_message(eip191message)
 
     if not signature:
@@ -161,7 +619,9 @@ def _sign_message(cli_ctx, alias, message):
     signature_bytes = signature.encode_rsv()
 
     # Verify signature
-    signer = Account.recover_message(eip191message, signature=signature_bytes)
+    with phase("verify"):
+        signer = Account.recover_message(eip191message, signature=signature_bytes)
+
     if signer != account.address:
         cli_ctx.abort(f"Signer resolves incorrectly, got {signer}, expected {account.address}.")
 
@@ -169,6 +629,212 @@ def _sign_message(cli_ctx, alias, message):
     click.echo(signature_bytes.hex())
 
 
+@cli.command(short_help="Sign many messages with your Ledger device")
+@ape_cli_context()
+@click.argument("alias")
+@click.argument("messages", type=click.File("r"), default="-")
+@click.option(
+    "--output",
+    "output_file",
+    type=click.File("w"),
+    default="-",
+    help="The file to write the JSONL results to. Defaults to stdout.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    help="The number of threads used to verify the returned signatures.",
+)
+def sign_messages(cli_ctx, alias, messages, output_file, workers):
+    """
+    Sign each line of MESSAGES (a file or stdin) using a Ledger account.
+    Each result is written as a JSON line as soon as it is verified.
+    """
+
+    _sign_messages(cli_ctx, alias, messages, output_file, workers)
+
+
+def _sign_messages(cli_ctx, alias, messages, output_file, workers):
+    import json
+    import sys
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import redirect_stdout
+
+    from eth_account.messages import encode_defunct
+
+    if alias not in cli_ctx.account_manager.aliases:
+        cli_ctx.abort(f"Account with alias '{alias}' does not exist.")
+
+    with phase("load"):
+        account = cli_ctx.account_manager.load(alias)
+
+    expected_signer = account.address
+    pending: deque = deque()
+    num_failed = 0
+
+    def write_results(wait: bool = False):
+        # NOTE: Results are written in input order, as soon as the head of the queue is done.
+        nonlocal num_failed
+        while pending and (wait or pending[0].done()):
+            result = pending.popleft().result()
+            num_failed += not result["verified"]
+            output_file.write(f"{json.dumps(result)}\n")
+            output_file.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for index, line in enumerate(messages):
+                message = line.rstrip("\r\n")
+                if not message:
+                    continue
+
+                eip191message = encode_defunct(text=message)
+
+                # NOTE: Keep the device prompts out of the JSONL results.
+                with redirect_stdout(sys.stderr):
+                    signature = account.sign_message(eip191message)
+
+                # Verify the signature while the next message is on the device.
+                pending.append(
+                    executor.submit(
+                        _verify_message_signature,
+                        index,
+                        message,
+                        eip191message,
+                        signature,
+                        expected_signer,
+                    )
+                )
+                write_results()
+
+        finally:
+            write_results(wait=True)
+
+    if num_failed:
+        cli_ctx.abort(f"{num_failed} message(s) failed to sign or verify.")
+
+
+def _verify_message_signature(index, message, eip191message, signature, expected_signer) -> dict:
+    from eth_account.account import Account
+
+    result = {"index": index, "message": message}
+    if not signature:
+        return {**result, "signature": None, "verified": False, "error": "Failed to sign message."}
+
+    signature_bytes = signature.encode_rsv()
+    with phase("verify"):
+        signer = Account.recover_message(eip191message, signature=signature_bytes)
+
+    return {
+        **result,
+        "signature": signature_bytes.hex(),
+        "signer": signer,
+        "verified": signer == expected_signer,
+    }
+
+
+@cli.command(short_help="Serve signing requests to other processes")
+@ape_cli_context()
+def serve(cli_ctx):
+    """
+    Keep the Ledger device session open and serve address and signing
+    requests from other ape processes over a local Unix socket.
+    Ledger accounts use the daemon automatically while it is running.
+    """
+    from ape_ledger.daemon import LedgerDaemon
+
+    with LedgerDaemon() as daemon:
+        cli_ctx.logger.info(f"Serving Ledger requests at '{daemon.socket_path}'.")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            cli_ctx.logger.info("Stopping Ledger daemon.")
+
+
+@cli.command(short_help="Sign the spooled transactions")
+@ape_cli_context()
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--spool",
+    "spool_path",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="The spool folder. Defaults to the spool in the plugin data folder.",
+)
+@click.option("--retry-failed", is_flag=True, help="Sign the failed transactions again, too.")
+def drain(cli_ctx, output, spool_path, retry_failed):
+    """
+    Sign the transactions added to the offline signing spool (using
+    'LedgerAccount.enqueue_transaction()') in one device session, appending each
+    result to OUTPUT as a JSON line with the signed raw transaction. If
+    interrupted, run it again to continue where it stopped.
+    """
+    from ape_ledger.spool import SIGNED, Spool, get_spool
+
+    spool = Spool(spool_path) if spool_path else get_spool()
+    if retry_failed:
+        spool.retry_failed()
+
+    signed = failed = 0
+    for item in spool.drain(output):
+        if item.status == SIGNED:
+            signed += 1
+            cli_ctx.logger.success(f"Signed '{item.id}' ({item.alias}): {item.txn_hash}")
+        else:
+            failed += 1
+            cli_ctx.logger.error(f"Failed to sign '{item.id}' ({item.alias}): {item.error}")
+
+    if signed + failed == 0:
+        cli_ctx.logger.warning("No transactions to sign.")
+    else:
+        cli_ctx.logger.info(f"Signed {signed} and failed {failed} transaction(s), see '{output}'.")
+
+
+@cli.command("spool", short_help="List the spooled transactions")
+@ape_cli_context()
+@click.option(
+    "--spool",
+    "spool_path",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="The spool folder. Defaults to the spool in the plugin data folder.",
+)
+@click.option(
+    "--status",
+    type=click.Choice(["pending", "signed", "failed"]),
+    help="Only list transactions with this status.",
+)
+def _spool(cli_ctx, spool_path, status):
+    """
+    List the transactions in the offline signing spool, and their status, as JSON lines.
+    """
+    import json
+
+    from ape_ledger.spool import Spool, get_spool
+
+    spool = Spool(spool_path) if spool_path else get_spool()
+    for item in spool.items(status):
+        record = item.to_dict()
+        record.pop("transaction")
+        click.echo(json.dumps(record))
+
+
+@cli.command(short_help="Show the metrics of the Ledger daemon")
+@ape_cli_context()
+def metrics(cli_ctx):
+    """
+    Print the device metrics of the running 'ape ledger serve' daemon,
+    in the Prometheus text exposition format.
+    """
+    from ape_ledger.daemon import get_daemon_metrics
+
+    text = get_daemon_metrics()
+    if text is None:
+        cli_ctx.abort("The Ledger daemon is not running.")
+
+    click.echo(text, nl=False)
+
+
 @cli.command(short_help="Verify a message with your Trezor device")
 @ape_cli_context()
 @click.argument("message")
@@ -1,7 +1,12 @@
 import json
-from collections.abc import Iterator
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional, Union, cast
+from weakref import WeakValueDictionary
 
 import rich
 from ape.api import AccountAPI, AccountContainerAPI, TransactionAPI
@@ -9,13 +14,27 @@ from ape.types import AddressType, MessageSignature, TransactionSignature
 from ape_ethereum.transactions import DynamicFeeTransaction, StaticFeeTransaction
 from dataclassy import asdict
 from eip712 import EIP712Message, EIP712Type
+from eth_account import Account as EthAccount
 from eth_account.messages import SignableMessage, encode_defunct
 from eth_pydantic_types import HexBytes
-from eth_utils import is_0x_prefixed, to_bytes
+from eth_utils import is_0x_prefixed, to_bytes, to_checksum_address
+from pydantic import PrivateAttr
 
 from ape_ledger.client import LedgerDeviceClient, get_device
-from ape_ledger.exceptions import LedgerSigningError
+from ape_ledger.daemon import DaemonClient, get_daemon_client
+from ape_ledger.exceptions import LedgerAccountException, LedgerSigningError
+from ape_ledger.hashing import get_signable_message
 from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.profiling import phase
+from ape_ledger.spool import Spool, SpoolItem, get_spool
+from ape_ledger.store import (
+    AccountRecord,
+    SqliteAccountStore,
+    get_account_store,
+    recover_account_files,
+    write_account_files,
+)
+from ape_ledger.tracing import span
 
 
 def _to_bytes(val) -> bytes:
@@ -31,13 +50,51 @@ def _to_bytes(val) -> bytes:
         return to_bytes(val)
 
 
+def _stat_key(path: Path) -> tuple[int, int]:
+    # Changes whenever the file is re-written.
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
 class AccountContainer(AccountContainerAPI):
     name: str = "ledger"
 
+    # Checksummed addresses and HD paths by account file, with the file stat they were read at.
+    _address_index: dict[Path, tuple[tuple[int, int], AddressType, str]] = PrivateAttr(
+        default_factory=dict
+    )
+
+    # The accounts in use, by account file, so enumerations reuse them (and their caches).
+    _identity_map: WeakValueDictionary[Path, "LedgerAccount"] = PrivateAttr(
+        default_factory=WeakValueDictionary
+    )
+
+    # Whether bulk changes interrupted by a crash were finished.
+    _recovered: bool = PrivateAttr(default=False)
+
     @property
     def accounts(self) -> Iterator[AccountAPI]:
         for account_file in self._account_files:
-            yield LedgerAccount(container=self, account_file_path=account_file)
+            yield self._get_account(account_file)
+
+    def __getitem__(self, address: AddressType) -> AccountAPI:
+        if (store := self._store) is not None:
+            if record := store.find(address):
+                return self._get_account(self.data_folder / f"{record.alias}.json")
+
+            raise KeyError(f"No local account {address}.")
+
+        for path, account_address in self._index_addresses().items():
+            if account_address == address:
+                return self._get_account(path)
+
+        raise KeyError(f"No local account {address}.")
+
+    def __contains__(self, address: AddressType) -> bool:
+        if (store := self._store) is not None:
+            return store.find(address) is not None
+
+        return address in self._index_addresses().values()
 
     def __setitem__(self, address: AddressType, account: AccountAPI):
         raise NotImplementedError()
@@ -45,8 +102,37 @@ class AccountContainer(AccountContainerAPI):
     def __delitem__(self, address: AddressType):
         raise NotImplementedError()
 
+    def _get_account(self, account_file: Path) -> "LedgerAccount":
+        if (account := self._identity_map.get(account_file)) is not None:
+            return account
+
+        account = LedgerAccount(container=self, account_file_path=account_file)
+        if (store := self._store) is not None:
+            account._store = store
+        elif cached := self._address_index.get(account_file):
+            account._address_cache = cached[:2]
+
+        self._identity_map[account_file] = account
+        return account
+
+    @property
+    def _store(self) -> Optional[SqliteAccountStore]:
+        # The SQLite store, when configured instead of one JSON file per account.
+        if self.config_manager.get_config("ledger").account_store == "sqlite":
+            return get_account_store(self.data_folder)
+
+        return None
+
     @property
     def _account_files(self) -> Iterator[Path]:
+        if (store := self._store) is not None:
+            # The paths the account files would have, identifying the accounts.
+            return (self.data_folder / f"{alias}.json" for alias in store.aliases())
+
+        if not self._recovered:
+            recover_account_files(self.data_folder)
+            self._recovered = True
+
         return self.data_folder.glob("*.json")
 
     @property
@@ -55,23 +141,259 @@ class AccountContainer(AccountContainerAPI):
             yield p.stem
 
     def __len__(self) -> int:
+        if (store := self._store) is not None:
+            return len(store)
+
         return len([*self._account_files])
 
     def save_account(self, alias: str, address: str, hd_path: str):
         """
         Save a new Ledger account to your ape configuration.
         """
+        if (store := self._store) is not None:
+            store.save(alias, address, hd_path)
+            return
+
         account_data = {"address": address, "hdpath": hd_path}
         path = self.data_folder.joinpath(f"{alias}.json")
         path.write_text(json.dumps(account_data))
 
     def delete_account(self, alias: str):
         path = self.data_folder.joinpath(f"{alias}.json")
-        path.unlink(missing_ok=True)
+        if (store := self._store) is not None:
+            store.delete(alias)
+        else:
+            path.unlink(missing_ok=True)
+
+        self._identity_map.pop(path, None)
+
+    def bulk_save(self, records: Iterable[dict]) -> int:
+        """
+        Add or replace many accounts in one atomic step: either all of them
+        are saved or, when a record is invalid or the process crashes, none are.
+        The records are read as they are saved.
+
+        Args:
+            records (Iterable[dict]): The ``alias``, ``address`` and ``hdpath`` of
+              each account, as in :meth:`~ape_ledger.accounts.AccountContainer.iter_records`.
+
+        Returns:
+            int: The number of accounts saved.
+        """
+        count = 0
+
+        def validate() -> Iterator[AccountRecord]:
+            nonlocal count
+            for record in records:
+                yield _validate_record(record)
+                count += 1
+
+        if (store := self._store) is not None:
+            store.save_many(validate())
+        else:
+            write_account_files(self.data_folder, validate())
+
+        return count
+
+    def bulk_delete(self, aliases: Iterable[str]):
+        """
+        Delete many accounts in one atomic step.
+
+        Args:
+            aliases (Iterable[str]): The aliases of the accounts to delete.
+        """
+        aliases = list(aliases)
+        if (store := self._store) is not None:
+            store.delete_many(aliases)
+        else:
+            write_account_files(self.data_folder, delete=aliases)
+
+        for alias in aliases:
+            self._identity_map.pop(self.data_folder / f"{alias}.json", None)
+
+    def iter_records(
+        self, alias_pattern: Optional[str] = None, hd_path_prefix: Optional[str] = None
+    ) -> Iterator[dict]:
+        """
+        Iterate over the ``alias``, ``address`` and ``hdpath`` of each account,
+        as each account file is read, without loading the accounts.
+
+        Args:
+            alias_pattern (Optional[str]): Only accounts with aliases matching this
+              glob pattern, e.g. ``"treasury-*"``.
+            hd_path_prefix (Optional[str]): Only accounts with HD paths starting
+              with this prefix, e.g. ``"m/44'/60'/0'"``.
+        """
+        if (store := self._store) is not None:
+            for record in store.iter_records(alias_pattern, hd_path_prefix):
+                yield record._asdict()
+
+            return
+
+        for path in self._account_files:
+            if alias_pattern and not fnmatchcase(path.stem, alias_pattern):
+                continue
+
+            try:
+                _, address, hd_path = self._index_account_file(path)
+            except FileNotFoundError:
+                # Deleted while iterating.
+                continue
+
+            if hd_path_prefix and not hd_path.startswith(hd_path_prefix):
+                continue
+
+            yield {"alias": path.stem, "address": address, "hdpath": hd_path}
+
+    def _index_addresses(self) -> dict[Path, AddressType]:
+        # Checksum the addresses of all accounts in one pass,
+        # only re-reading the files that changed since last time.
+        index = {}
+        for path in self._account_files:
+            try:
+                index[path] = self._index_account_file(path)
+            except FileNotFoundError:
+                # Deleted while indexing.
+                continue
+
+        self._address_index = index
+        return {path: address for path, (_, address, _) in index.items()}
+
+    def _index_account_file(self, path: Path) -> tuple[tuple[int, int], AddressType, str]:
+        stat_key = _stat_key(path)
+        cached = self._address_index.get(path)
+        if cached is None or cached[0] != stat_key:
+            data = json.loads(path.read_text())
+            ecosystem = self.network_manager.get_ecosystem("ethereum")
+            cached = (stat_key, ecosystem.decode_address(data["address"]), data["hdpath"])
+            self._address_index[path] = cached
+
+        return cached
+
+
+def _validate_record(record: dict) -> AccountRecord:
+    alias = record.get("alias")
+    if not alias or not isinstance(alias, str) or "/" in alias or alias.startswith("."):
+        raise LedgerAccountException(f"Invalid account alias '{alias}'.")
+
+    try:
+        address = to_checksum_address(record.get("address") or "")
+        hd_path = HDAccountPath(record.get("hdpath") or "").path
+    except (TypeError, ValueError) as err:
+        raise LedgerAccountException(f"Invalid account '{alias}': {err}") from err
+
+    return AccountRecord(alias, address, hd_path)
+
+
+def _encode_message(msg: Any) -> tuple[SignableMessage, bool]:
+    use_eip712_package = isinstance(msg, EIP712Message)
+    use_eip712 = use_eip712_package
+    if isinstance(msg, str):
+        msg_to_sign = encode_defunct(text=msg)
+    elif isinstance(msg, int):
+        msg_to_sign = encode_defunct(hexstr=HexBytes(msg).hex())
+    elif isinstance(msg, bytes):
+        msg_to_sign = encode_defunct(primitive=msg)
+    elif use_eip712_package:
+        # Using eip712 package.
+        msg_to_sign = get_signable_message(msg)
+    elif isinstance(msg, SignableMessage):
+        if msg.version == b"\x01":
+            # Using EIP-712 without eip712 package.
+            use_eip712 = True
+        elif msg.version != b"E":
+            try:
+                version_str = msg.version.decode("utf8")
+            except Exception:
+                try:
+                    version_str = HexBytes(msg.version).hex()
+                except Exception:
+                    version_str = "<UnknownVersion>"
+
+            raise LedgerSigningError(
+                f"Unsupported message-signing specification, (version={version_str})."
+            )
+
+        msg_to_sign = msg
+    else:
+        type_name = getattr(type(msg), "__name__", None)
+        if not type_name:
+            try:
+                type_name = str(type(msg))
+            except Exception:
+                type_name = "<UnknownType>"
+
+        raise LedgerSigningError(f"Cannot sign messages of type '{type_name}'.")
+
+    return msg_to_sign, use_eip712
+
+
+def _encode_transaction(txn: TransactionAPI) -> dict:
+    with span("encode.to_bytes", field="data"):
+        data = _to_bytes(txn.data)
+
+    with span("encode.to_bytes", field="destination"):
+        destination = _to_bytes(txn.receiver)
+
+    txn_dict: dict = {
+        "nonce": txn.nonce,
+        "gas": txn.gas_limit,
+        "amount": txn.value,
+        "data": data,
+        "destination": destination,
+        # Mainnet, unless the transaction says otherwise.
+        "chain_id": txn.chain_id or 1,
+    }
+    if isinstance(txn, StaticFeeTransaction):
+        txn_dict["gas_price"] = txn.gas_price
+
+    elif isinstance(txn, DynamicFeeTransaction):
+        txn_dict["max_fee_per_gas"] = txn.max_fee
+        txn_dict["max_priority_fee_per_gas"] = txn.max_priority_fee
+        if txn.access_list:
+            # NOTE: ledgereth only takes rules as tuples, with the storage keys as hex strings.
+            txn_dict["access_list"] = tuple(
+                (ls.address, tuple(HexBytes(k).to_0x_hex() for k in ls.storage_keys))
+                for ls in txn.access_list
+            )
+
+    else:
+        raise TypeError(type(txn))
+
+    return txn_dict
+
 
+def _recover_signer(txn: TransactionAPI) -> AddressType:
+    # The signer of the transaction as it would be broadcast.
+    # NOTE: Without the sender, which ape would otherwise check against, too.
+    unchecked = txn.model_copy(update={"sender": None})
+    return EthAccount.recover_transaction(unchecked.serialize_transaction())
 
-def _echo_object_to_sign(obj: Any):
+
+def _checked(txn: TransactionAPI, check: Optional[Future]) -> TransactionAPI:
+    if check is not None:
+        # Raises the signer mismatch.
+        check.result()
+
+    return txn
+
+
+# Rendering a transaction is not thread-safe in ape (and concurrent prompts would mix).
+_echo_lock = threading.Lock()
+
+
+def _describe_object_to_sign(obj: Any) -> str:
+    with _echo_lock, span("describe"):
+        return _describe_object(obj)
+
+
+def _echo_description(description: str):
     suffix = "Please follow the prompts on your device."
+    with _echo_lock, span("echo"), phase("render"):
+        rich.print(f"{description}\n{suffix}")
+
+
+def _describe_object(obj: Any) -> str:
     if isinstance(obj, EIP712Message):
 
         def make_str(val) -> str:
@@ -87,28 +409,110 @@ def _echo_object_to_sign(obj: Any):
                 return f"{val}"
 
         fields_str = make_str(obj._body_["message"])
-        message_str = f"{repr(obj)}({fields_str})"
+        return f"{repr(obj)}({fields_str})"
+
+    return f"{obj}"
+
+
+# Signing request kinds.
+MESSAGE = "message"
+TYPED_DATA = "typed_data"
+TRANSACTION = "transaction"
+
+
+class SigningRequest(NamedTuple):
+    """
+    A message or transaction encoded for the device, to sign using
+    :meth:`~ape_ledger.accounts.LedgerAccount.submit`. Immutable and picklable,
+    so it can be prepared in another thread or process.
+    """
+
+    kind: str
+    """``message``, ``typed_data`` or ``transaction``."""
+
+    hdpath: str
+    """The HD path of the account to sign with."""
+
+    payload: tuple
+    """
+    The message body, the EIP-712 domain and message hashes,
+    or the transaction fields as ``(name, value)`` pairs.
+    """
+
+    description: str
+    """What to show before the device prompts."""
+
+
+def prepare_signing_request(obj: Any, hdpath: str) -> SigningRequest:
+    """
+    Encode a message or transaction for the device and describe it, without the device.
+
+    Args:
+        obj (Any): The message or transaction, left unchanged. A transaction without
+          a chain ID is signed for mainnet.
+        hdpath (str): The HD path of the account to sign with.
+
+    Returns:
+        :class:`~ape_ledger.accounts.SigningRequest`
+    """
+    payload: tuple
+    if isinstance(obj, TransactionAPI):
+        with phase("encode"):
+            kind, payload = TRANSACTION, tuple(_encode_transaction(obj).items())
+
     else:
-        message_str = f"{obj}"
+        with phase("encode"):
+            msg_to_sign, use_eip712 = _encode_message(obj)
 
-    rich.print(f"{message_str}\n{suffix}")
+        if use_eip712:
+            kind, payload = TYPED_DATA, (bytes(msg_to_sign.header), bytes(msg_to_sign.body))
+        else:
+            kind, payload = MESSAGE, (bytes(msg_to_sign.body),)
+
+    return SigningRequest(kind, hdpath, payload, _describe_object_to_sign(obj))
 
 
 class LedgerAccount(AccountAPI):
     account_file_path: Path
 
+    # The account file data and address, with the file stat (or store version) they were read at.
+    _account_file_cache: Optional[tuple[tuple[int, int], dict]] = None
+    _address_cache: Optional[tuple[tuple[int, int], AddressType]] = None
+
+    # The SQLite store holding the account, when used instead of the account file.
+    _store: Optional[SqliteAccountStore] = None
+
+    # Whether the account was used, so the device is warmed up (when configured) only once.
+    _used: bool = False
+
     @property
     def alias(self) -> str:
         return self.account_file_path.stem
 
     @property
-    def _client(self) -> LedgerDeviceClient:
-        return get_device(self.hdpath)
+    def _client(self) -> Union[LedgerDeviceClient, DaemonClient]:
+        self._use()
+
+        # Forward requests to the `ape ledger serve` daemon when it is running.
+        return get_daemon_client(self.hdpath) or get_device(self.hdpath)
+
+    def _use(self):
+        if self._used:
+            return
+
+        self._used = True
+        if self.config_manager.get_config("ledger").warm_up:
+            self.warm_up()
 
     @property
     def address(self) -> AddressType:
-        ecosystem = self.network_manager.get_ecosystem("ethereum")
-        return ecosystem.decode_address(self.account_file["address"])
+        stat_key = self._get_version()
+        if self._address_cache is None or self._address_cache[0] != stat_key:
+            ecosystem = self.network_manager.get_ecosystem("ethereum")
+            raw_address = self._read_account_file(stat_key)["address"]
+            self._address_cache = (stat_key, ecosystem.decode_address(raw_address))
+
+        return self._address_cache[1]
 
     @property
     def hdpath(self) -> HDAccountPath:
@@ -117,89 +521,248 @@ class LedgerAccount(AccountAPI):
 
     @property
     def account_file(self) -> dict:
-        return json.loads(self.account_file_path.read_text())
+        return {**self._read_account_file(self._get_version())}
+
+    def _get_version(self) -> tuple[int, int]:
+        # Changes whenever the account data is re-written.
+        if self._store is not None:
+            return self._store.version
+
+        return _stat_key(self.account_file_path)
+
+    def _read_account_file(self, stat_key: tuple[int, int]) -> dict:
+        if self._account_file_cache is None or self._account_file_cache[0] != stat_key:
+            self._account_file_cache = (stat_key, self._load_account_data())
+
+        return self._account_file_cache[1]
+
+    def _load_account_data(self) -> dict:
+        if self._store is None:
+            return json.loads(self.account_file_path.read_text())
+
+        elif record := self._store.get(self.alias):
+            return {"address": record.address, "hdpath": record.hdpath}
+
+        raise LedgerAccountException(f"Account '{self.alias}' not found.")
+
+    def prepare_transaction(self, txn: TransactionAPI, **kwargs) -> TransactionAPI:
+        # NOTE: The device opens (when configured) while the provider estimates gas and fees.
+        self._use()
+        return super().prepare_transaction(txn, **kwargs)
+
+    def warm_up(self):
+        """
+        Start opening the device in the background, so it is ready by the time
+        the account signs, e.g. while the transaction is prepared.
+        """
+        client = self._client
+        if isinstance(client, LedgerDeviceClient):
+            client.warm_up()
 
     def sign_message(self, msg: Any, **signer_options) -> Optional[MessageSignature]:
-        use_eip712_package = isinstance(msg, EIP712Message)
-        use_eip712 = use_eip712_package
-        if isinstance(msg, str):
-            msg_to_sign = encode_defunct(text=msg)
-        elif isinstance(msg, int):
-            msg_to_sign = encode_defunct(hexstr=HexBytes(msg).hex())
-        elif isinstance(msg, bytes):
-            msg_to_sign = encode_defunct(primitive=msg)
-        elif use_eip712_package:
-            # Using eip712 package.
-            msg_to_sign = msg.signable_message
-        elif isinstance(msg, SignableMessage):
-            if msg.version == b"\x01":
-                # Using EIP-712 without eip712 package.
-                use_eip712 = True
-            elif msg.version != b"E":
-                try:
-                    version_str = msg.version.decode("utf8")
-                except Exception:
-                    try:
-                        version_str = HexBytes(msg.version).hex()
-                    except Exception:
-                        version_str = "<UnknownVersion>"
+        """
+        Sign a message using the device.
 
-                raise LedgerSigningError(
-                    f"Unsupported message-signing specification, (version={version_str})."
-                )
+        Args:
+            msg (Any): The message to sign.
+            **signer_options: Set ``timeout`` to the number of seconds to wait for the
+              device (and confirmation) before raising
+              :class:`~ape_ledger.exceptions.SigningTimeoutError`.
+        """
+        request = self.prepare_message_request(msg)
+        signature = self.submit(request, timeout=signer_options.get("timeout"))
+        return cast(MessageSignature, signature)
 
-            msg_to_sign = msg
-        else:
-            type_name = getattr(type(msg), "__name__", None)
-            if not type_name:
-                try:
-                    type_name = str(type(msg))
-                except Exception:
-                    type_name = "<UnknownType>"
+    def sign_transaction(self, txn: TransactionAPI, **kwargs) -> Optional[TransactionAPI]:
+        """
+        Sign a transaction using the device.
+
+        Args:
+            txn (TransactionAPI): The transaction to sign.
+            **kwargs: Set ``timeout`` to the number of seconds to wait for the
+              device (and confirmation) before raising
+              :class:`~ape_ledger.exceptions.SigningTimeoutError`. Set ``verify_signer``
+              to skip (or force) checking the signer. Defaults to the ``verify_signer`` config.
+        """
+        with span("sign_transaction", alias=self.alias, type=int(txn.type)):
+            request = self.prepare_transaction_request(txn)
+            return self._sign_prepared(txn, request, **kwargs)
 
-            raise LedgerSigningError(f"Cannot sign messages of type '{type_name}'.")
+    def prepare_message_request(self, msg: Any) -> SigningRequest:
+        """
+        Encode a message for the device, without the device, to sign it later using
+        :meth:`~ape_ledger.accounts.LedgerAccount.submit`, e.g. while another request
+        is on the device.
 
-        # Echo original message.
-        _echo_object_to_sign(msg)
+        Args:
+            msg (Any): The message to sign.
 
-        if use_eip712:
-            header = HexBytes(msg_to_sign.header)
-            body = HexBytes(msg_to_sign.body)
-            signed_msg = self._client.sign_typed_data(header, body)
+        Returns:
+            :class:`~ape_ledger.accounts.SigningRequest`
+        """
+        # NOTE: The first time, the device opens (when configured) while the message is encoded.
+        self._use()
+        return prepare_signing_request(msg, self.hdpath.path)
+
+    def prepare_transaction_request(self, txn: TransactionAPI) -> SigningRequest:
+        """
+        Encode a transaction for the device, without the device, to sign it later using
+        :meth:`~ape_ledger.accounts.LedgerAccount.submit`, e.g. while another request
+        is on the device.
+
+        Args:
+            txn (TransactionAPI): The transaction to sign, left unchanged. Without a
+              chain ID, it is signed for mainnet.
+
+        Returns:
+            :class:`~ape_ledger.accounts.SigningRequest`
+        """
+        # NOTE: The first time, the device opens (when configured) while the transaction
+        #  is encoded.
+        self._use()
+        return prepare_signing_request(txn, self.hdpath.path)
+
+    def submit(
+        self, request: SigningRequest, timeout: Optional[float] = None
+    ) -> Union[MessageSignature, TransactionSignature]:
+        """
+        Sign a prepared request using the device.
+
+        Args:
+            request (:class:`~ape_ledger.accounts.SigningRequest`): The request, from
+              :meth:`~ape_ledger.accounts.LedgerAccount.prepare_message_request` or
+              :meth:`~ape_ledger.accounts.LedgerAccount.prepare_transaction_request`.
+            timeout (Optional[float]): The number of seconds to wait for the device
+              (and confirmation) before raising
+              :class:`~ape_ledger.exceptions.SigningTimeoutError`.
+
+        Returns:
+            Union[MessageSignature, TransactionSignature]: The signature, for a
+            transaction to set as its ``signature``.
+        """
+        if request.hdpath != self.hdpath.path:
+            raise LedgerSigningError(
+                f"The request is for the account at '{request.hdpath}', "
+                f"not for '{self.alias}' at '{self.hdpath.path}'."
+            )
+
+        _echo_description(request.description)
+        client = self._client
+        if request.kind == TRANSACTION:
+            # NOTE: ledgereth takes the access list as a list.
+            txn_dict = dict(request.payload)
+            if "access_list" in txn_dict:
+                txn_dict["access_list"] = list(txn_dict["access_list"])
+
+            v, r, s = client.sign_transaction(txn_dict, timeout=timeout)
+            with span("signature"):
+                return TransactionSignature(v=v, r=HexBytes(r), s=HexBytes(s))
+
+        elif request.kind == TYPED_DATA:
+            header, body = request.payload
+            v, r, s = client.sign_typed_data(HexBytes(header), HexBytes(body), timeout=timeout)
+
+        elif request.kind == MESSAGE:
+            v, r, s = client.sign_message(request.payload[0], timeout=timeout)
 
         else:
-            signed_msg = self._client.sign_message(msg_to_sign.body)
+            raise LedgerSigningError(f"Unknown signing request kind '{request.kind}'.")
 
-        v, r, s = signed_msg
         return MessageSignature(v=v, r=HexBytes(r), s=HexBytes(s))
 
-    def sign_transaction(self, txn: TransactionAPI, **kwargs) -> Optional[TransactionAPI]:
-        txn.chain_id = 1
-        txn_dict: dict = {
-            "nonce": txn.nonce,
-            "gas": txn.gas_limit,
-            "amount": txn.value,
-            "data": _to_bytes(txn.data.hex()),
-            "destination": _to_bytes(txn.receiver),
-            "chain_id": txn.chain_id,
-        }
-        if isinstance(txn, StaticFeeTransaction):
-            txn_dict["gas_price"] = txn.gas_price
-
-        elif isinstance(txn, DynamicFeeTransaction):
-            txn_dict["max_fee_per_gas"] = txn.max_fee
-            txn_dict["max_priority_fee_per_gas"] = txn.max_priority_fee
-            if txn.access_list:
-                txn_dict["access_list"] = [[ls.address, ls.storage_keys] for ls in txn.access_list]
+    def _sign_prepared(self, txn: TransactionAPI, request: SigningRequest, **kwargs):
+        signature = self.submit(request, timeout=kwargs.get("timeout"))
+        # The transaction as signed, e.g. for mainnet when it had no chain ID.
+        txn.chain_id = dict(request.payload)["chain_id"]
+        txn.signature = cast(TransactionSignature, signature)
+        if self._should_verify_signer(kwargs.get("verify_signer")):
+            self.check_signer(txn)
 
-        else:
-            raise TypeError(type(txn))
-
-        _echo_object_to_sign(txn)
-        v, r, s = self._client.sign_transaction(txn_dict)
-        txn.signature = TransactionSignature(
-            v=v,
-            r=HexBytes(r),
-            s=HexBytes(s),
-        )
         return txn
+
+    def sign_transactions(
+        self, txns: Iterable[TransactionAPI], workers: int = 4, **kwargs
+    ) -> Iterator[TransactionAPI]:
+        """
+        Sign transactions one after the other. A thread pool prepares each transaction
+        while the one before it is on the device, and checks the signer of each one
+        while the next one is.
+
+        Args:
+            txns (Iterable[TransactionAPI]): The transactions to sign.
+            workers (int): The number of threads preparing transactions and checking
+              signers. Defaults to ``4``.
+            **kwargs: The same as :meth:`~ape_ledger.accounts.LedgerAccount.sign_transaction`.
+
+        Returns:
+            Iterator[TransactionAPI]: Each signed transaction, in order, once checked.
+
+        Raises:
+            :class:`~ape_ledger.exceptions.LedgerSigningError`: When a transaction's
+              signer is not the account.
+        """
+        verify = self._should_verify_signer(kwargs.pop("verify_signer", None))
+        preparing: deque[tuple[TransactionAPI, Future]] = deque()
+        pending: deque[tuple[TransactionAPI, Optional[Future]]] = deque()
+
+        def is_done() -> bool:
+            return bool(pending) and (pending[0][1] is None or pending[0][1].done())
+
+        def sign_next() -> Iterator[TransactionAPI]:
+            txn, request = preparing.popleft()
+            signed = self._sign_prepared(txn, request.result(), verify_signer=False, **kwargs)
+            check = executor.submit(self.check_signer, signed) if verify else None
+            pending.append((signed, check))
+            while is_done():
+                yield _checked(*pending.popleft())
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for txn in txns:
+                preparing.append((txn, executor.submit(self.prepare_transaction_request, txn)))
+                if len(preparing) > 1:
+                    yield from sign_next()
+
+            while preparing:
+                yield from sign_next()
+
+            while pending:
+                yield _checked(*pending.popleft())
+
+    def check_signer(self, txn: TransactionAPI):
+        """
+        Check that the signature of a signed transaction recovers to this account.
+        If not, the signature is removed.
+
+        Raises:
+            :class:`~ape_ledger.exceptions.LedgerSigningError`: When the signer is another
+              address, such as when the account's HD path or the transaction's chain ID is wrong.
+        """
+        with phase("verify"):
+            signer = _recover_signer(txn)
+
+        if signer != self.address:
+            txn.signature = None
+            raise LedgerSigningError(
+                f"The transaction was signed by '{signer}', not by the account "
+                f"'{self.address}'. Check the account's HD path and the transaction's chain ID."
+            )
+
+    def _should_verify_signer(self, verify_signer: Optional[bool]) -> bool:
+        if verify_signer is not None:
+            return verify_signer
+
+        return self.config_manager.get_config("ledger").verify_signer
+
+    def enqueue_transaction(self, txn: TransactionAPI, spool: Optional[Spool] = None) -> SpoolItem:
+        """
+        Add a transaction to the offline signing spool, to sign it later
+        along with the others using ``ape ledger drain``.
+
+        Args:
+            txn (TransactionAPI): The transaction to sign.
+            spool (Optional[Spool]): The spool. Defaults to the spool in the plugin data folder.
+
+        Returns:
+            SpoolItem: The spooled transaction, with its ID.
+        """
+        return (spool or get_spool()).enqueue(self.alias, txn)
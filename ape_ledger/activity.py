@@ -0,0 +1,150 @@
+import threading
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from ape.exceptions import ApeException
+
+from ape_ledger.exceptions import LedgerAccountException
+
+if TYPE_CHECKING:
+    from ape.api import ProviderAPI
+
+    from ape_ledger.derivation import AddressSource
+
+
+class AccountActivity(NamedTuple):
+    balance: int
+    """The account's balance, in wei."""
+
+    nonce: int
+    """The number of transactions sent from the account."""
+
+    @property
+    def is_used(self) -> bool:
+        return self.balance > 0 or self.nonce > 0
+
+
+def get_account_activity(addresses: list[str], provider: "ProviderAPI") -> list[AccountActivity]:
+    """
+    Get the balance and nonce of each address, using one JSON-RPC batch request
+    when the provider supports it.
+    """
+    requests: list[tuple[str, Any]] = []
+    for address in addresses:
+        requests.append(("eth_getBalance", [address, "latest"]))
+        requests.append(("eth_getTransactionCount", [address, "latest"]))
+
+    results = [_to_int(r) for r in _make_batch_request(provider, requests)]
+    return [
+        AccountActivity(balance=results[i], nonce=results[i + 1]) for i in range(0, len(results), 2)
+    ]
+
+
+class ActivityFetcher:
+    """
+    Gets the activity of addresses in the background as they are derived, rather
+    than after all of them. The addresses derived while a batch is in flight go
+    in the next batch, so the next batch starts as soon as the previous one ends.
+    """
+
+    def __init__(self, provider: "ProviderAPI"):
+        self._provider = provider
+        self._pending: list[str] = []
+        self._activity: dict[str, AccountActivity] = {}
+        self._error: Optional[Exception] = None
+        self._is_closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="ledger-activity", daemon=True)
+        self._thread.start()
+
+    def add(self, address: str):
+        with self._condition:
+            self._pending.append(address)
+            self._condition.notify()
+
+    def watch(self, source: "AddressSource") -> "AddressSource":
+        """
+        Wrap an address source to get the activity of each address it derives.
+        """
+
+        def get_address(index: int) -> str:
+            address = source(index)
+            self.add(address)
+            return address
+
+        return get_address
+
+    def close(self):
+        """
+        Stop waiting for addresses, once the pending ones are fetched.
+        """
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def get(self, addresses: list[str]) -> list[AccountActivity]:
+        """
+        Get the activity of the given (added) addresses, once fetched.
+        """
+        self.close()
+        if self._error is not None:
+            raise self._error
+
+        return [self._activity[a] for a in addresses]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._is_closed)
+                if not self._pending:
+                    return
+
+                addresses, self._pending = self._pending, []
+
+            try:
+                activity = get_account_activity(addresses, self._provider)
+            except Exception as err:
+                self._error = err
+                return
+
+            self._activity.update(zip(addresses, activity))
+
+
+def _make_batch_request(provider: "ProviderAPI", requests: list[tuple[str, Any]]) -> list[Any]:
+    # Only providers backed by web3 batch, e.g. not the local test provider.
+    web3_provider = getattr(getattr(provider, "web3", None), "provider", None)
+    make_batch_request = getattr(web3_provider, "make_batch_request", None)
+    if not callable(make_batch_request):
+        return [_make_request(provider, m, p) for m, p in requests]
+
+    responses = make_batch_request(requests)
+    if not isinstance(responses, list):
+        # The whole batch failed, e.g. the node does not support batching.
+        _get_result(responses)
+        raise LedgerAccountException("Invalid batch response.")
+
+    return [_get_result(r) for r in responses]
+
+
+def _make_request(provider: "ProviderAPI", method: str, params: Any) -> Any:
+    try:
+        return provider.make_request(method, params)
+    except ApeException as err:
+        raise LedgerAccountException(f"Failed to get account activity: {err}") from err
+
+
+def _get_result(response: dict) -> Any:
+    if "error" in response:
+        error = response["error"]
+        message = error.get("message", error) if isinstance(error, dict) else error
+        raise LedgerAccountException(f"Failed to get account activity: {message}")
+
+    return response["result"]
+
+
+def _to_int(value: Any) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+__all__ = ["AccountActivity", "ActivityFetcher", "get_account_activity"]
@@ -1,27 +1,39 @@
+import time
+from collections.abc import Sequence
 from typing import TYPE_CHECKING, Any, Optional, Union
 
 import click
 from ape.cli import PromptChoice
 
 if TYPE_CHECKING:
+    from ape.api import ProviderAPI
     from click import Context, Parameter
 
-    from ape_ledger.client import LedgerDeviceClient
+    from ape_ledger.activity import AccountActivity
+    from ape_ledger.derivation import AddressSource
     from ape_ledger.hdpath import HDAccountPath, HDBasePath
 
 
 class AddressPromptChoice(PromptChoice):
     """
     A class for handling prompting the user for an address selection.
+    When given a provider, the balance and nonce of each address are shown too.
+    Unless given a page size, each page is sized to derive its addresses in
+    about ``page_time`` seconds, going by the time addresses took so far.
     """
 
     DEFAULT_PAGE_SIZE = 5
+    MAX_PAGE_SIZE = 50
+    DEFAULT_PAGE_TIME = 1.0
 
     def __init__(
         self,
         hd_path: Union["HDBasePath", str],
         index_offset: int = 0,
-        page_size: int = DEFAULT_PAGE_SIZE,
+        page_size: Optional[int] = None,
+        provider: Optional["ProviderAPI"] = None,
+        sources: Optional[Sequence["AddressSource"]] = None,
+        page_time: float = DEFAULT_PAGE_TIME,
     ):
         from ape_ledger.hdpath import HDBasePath
 
@@ -30,8 +42,21 @@ class AddressPromptChoice(PromptChoice):
 
         self._hd_root_path = hd_path
         self._index_offset = index_offset
-        self._page_size = page_size
+        self._page_size = page_size or self.DEFAULT_PAGE_SIZE
+        self._is_adaptive = page_size is None
+        self._page_time = page_time
         self._choice_index: Optional[int] = None
+        self._provider = provider
+        self._activity: list["AccountActivity"] = []
+
+        # Where each page before this one started, to page back.
+        self._page_offsets: list[int] = []
+
+        # The derivation sources, the derived addresses by index,
+        # and the seconds each address took to derive, on average.
+        self._sources = sources
+        self._addresses: dict[int, str] = {}
+        self._address_time: Optional[float] = None
 
         # Must call ``_load_choices()`` to set address choices
         super().__init__([])
@@ -39,7 +64,14 @@ class AddressPromptChoice(PromptChoice):
     @property
     def _is_incremented(self) -> bool:
         """Returns ``True`` if the user has paged past the first page."""
-        return (self._index_offset + self._page_size) > self._page_size
+        return self._index_offset > 0
+
+    @property
+    def _previous_page_size(self) -> int:
+        if self._page_offsets:
+            return self._index_offset - self._page_offsets[-1]
+
+        return min(self._page_size, self._index_offset)
 
     @property
     def _prompt_message(self) -> str:
@@ -80,7 +112,7 @@ class AddressPromptChoice(PromptChoice):
         """Prompt the user for a selection."""
         prompt = self._prompt_message
         if self._is_incremented:
-            prompt += f"\n\tor 'p' for the previous {self._page_size}"
+            prompt += f"\n\tor 'p' for the previous {self._previous_page_size}"
 
         # Handle user choice from prompt, including paging.
         return click.prompt(prompt, type=self)
@@ -88,30 +120,89 @@ class AddressPromptChoice(PromptChoice):
     def _page_from_choice(self, choice):
         choice = choice.lower()
         if choice == "n":
-            self._index_offset += self._page_size
+            self._page_offsets.append(self._index_offset)
+            self._index_offset += len(self.choices) or self._page_size
             return True
         elif choice == "p" and self._is_incremented:
-            self._index_offset -= self._page_size
+            self._index_offset -= self._previous_page_size
+            if self._page_offsets:
+                self._page_offsets.pop()
+
             return True
 
         return False
 
     def _load_choices(self):
+        from ape_ledger.derivation import derive_addresses, get_address_cache
+
         end_range = self._index_offset + self._page_size
         index_range = range(self._index_offset, end_range)
-        self.choices = [self._get_address(i) for i in index_range]
-
-    def _get_address(self, account_id: int) -> str:
-        path = self._hd_root_path.get_account_path(account_id)
-        device = get_device(path)
-        return device.get_address()
-
-
-def get_device(path: "HDAccountPath") -> "LedgerDeviceClient":
-    # Perf: lazy load so CLI-usage is faster and abstracted for testing purposes.
-    from ape_ledger.client import get_device as _get_device
-
-    return _get_device(path)
+        fetcher = None
+        if self._provider is not None:
+            from ape_ledger.activity import ActivityFetcher
+
+            # The activity of each address is fetched while the rest are derived.
+            fetcher = ActivityFetcher(self._provider)
+
+        try:
+            sources = self._get_sources()
+            if fetcher is not None:
+                sources = [fetcher.watch(source) for source in sources]
+                for index in index_range:
+                    if index in self._addresses:
+                        fetcher.add(self._addresses[index])
+
+            if missing := [i for i in index_range if i not in self._addresses]:
+                start = time.perf_counter()
+                try:
+                    addresses = derive_addresses(missing, sources)
+                finally:
+                    get_address_cache().save()
+
+                self._addresses.update(zip(missing, addresses))
+                self._adapt_page_size((time.perf_counter() - start) / len(missing))
+
+            self.choices = [self._addresses[i] for i in index_range]
+
+        finally:
+            if fetcher is not None:
+                fetcher.close()
+
+        if fetcher is not None:
+            self._activity = fetcher.get(self.choices)
+
+    def print_choices(self):
+        if not self._activity:
+            super().print_choices()
+            return
+
+        ecosystem = self._provider.network.ecosystem  # type: ignore[union-attr]
+        decimals = 10**ecosystem.fee_token_decimals
+        for idx, (choice, activity) in enumerate(zip(self.choices, self._activity)):
+            balance = f"{activity.balance / decimals:.6f} {ecosystem.fee_token_symbol}"
+            click.echo(f"{idx}. {choice}  {balance:>24}  nonce {activity.nonce}")
+
+        click.echo()
+
+    def _adapt_page_size(self, address_time: float):
+        # Smoothed, as the first addresses include opening the device.
+        if self._address_time is None:
+            self._address_time = address_time
+        else:
+            self._address_time = (self._address_time + address_time) / 2
+
+        if self._is_adaptive:
+            page_size = int(self._page_time / max(self._address_time, 1e-6))
+            self._page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+    def _get_sources(self) -> Sequence["AddressSource"]:
+        if self._sources is None:
+            from ape_ledger.derivation import AddressDeriver
+
+            # Derived on this computer when the path allows it, else by the device.
+            self._sources = [AddressDeriver(self._hd_root_path).get_address]
+
+        return self._sources
 
 
 __all__ = ["AddressPromptChoice"]
@@ -1,28 +1,45 @@
 import atexit
-from functools import cached_property
-from typing import TYPE_CHECKING
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+from weakref import WeakKeyDictionary
 
 import hid  # type: ignore
 from ape.logging import LogLevel, logger
 from ledgerblue.comm import HIDDongleHIDAPI, getDongle  # type: ignore
+from ledgerblue.commException import CommException  # type: ignore
 from ledgereth.accounts import get_account_by_path
+from ledgereth.comms import decode_response_version_from_config, dongle_send, is_usable_version
+from ledgereth.exceptions import LedgerError
 from ledgereth.messages import sign_message, sign_typed_data_draft
 from ledgereth.transactions import SignedType2Transaction, create_transaction
 
+from ape_ledger.exceptions import SigningTimeoutError
+from ape_ledger.lock import get_device_lock
+from ape_ledger.metrics import (
+    confirmation_seconds,
+    device_handles,
+    errors_total,
+    exchange_seconds,
+    reconnects_total,
+    signs_total,
+)
+from ape_ledger.profiling import phase
+from ape_ledger.tracing import span
+from ape_ledger.transport import RecordingTransport, get_replay_transport
+
 if TYPE_CHECKING:
     from ape_ledger.hdpath import HDAccountPath
 
-
-class DeviceFactory:
-    device_map: dict[str, "LedgerDeviceClient"] = {}
-
-    def create_device(self, account: "HDAccountPath"):
-        if account.path in self.device_map:
-            return self.device_map[account.path]
-
-        device = LedgerDeviceClient(account)
-        self.device_map[account.path] = device
-        return device
+_signs_total = signs_total()
+_errors_total = errors_total()
+_exchange_seconds = exchange_seconds()
+_confirmation_seconds = confirmation_seconds()
+_reconnects_total = reconnects_total()
+_device_handles = device_handles()
 
 
 def get_dongle(debug: bool = False, reopen_on_fail: bool = True) -> HIDDongleHIDAPI:
@@ -38,47 +55,551 @@ def get_dongle(debug: bool = False, reopen_on_fail: bool = True) -> HIDDongleHID
         raise  # the OSError
 
 
+# Held for each request to the device, by any client.
+_request_lock = threading.RLock()
+
+# The same for each transport given to clients, such as another device.
+_transport_locks: "WeakKeyDictionary[Any, threading.RLock]" = WeakKeyDictionary()
+_transport_locks_lock = threading.Lock()
+
+
+def _get_request_lock(transport: Optional[Any], lock: Optional[threading.RLock] = None):
+    if transport is None:
+        return _request_lock
+
+    with _transport_locks_lock:
+        try:
+            return _transport_locks.setdefault(transport, lock or threading.RLock())
+        except TypeError:
+            # Not weakly referenceable, so shares the device's lock.
+            return _request_lock
+
+
+# GET_ADDRESS without confirmation (P1=0x00), returning the chain code (P2=0x01).
+GET_PUBLIC_KEY_APDU = b"\xe0\x02\x00\x01"
+
+
+class _DeadlineDongle:
+    """
+    Passes each exchange the time left until the deadline, as its timeout.
+    """
+
+    def __init__(self, dongle: Any, deadline: float):
+        self.dongle = dongle
+        self.deadline = deadline
+
+    def exchange(self, apdu: bytes, timeout: Optional[float] = None) -> bytearray:
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise SigningTimeoutError("Timed out waiting for the Ledger device.")
+
+        try:
+            return self.dongle.exchange(apdu, timeout=remaining)
+        except CommException as err:
+            if err.message == "Timeout":
+                raise SigningTimeoutError("Timed out waiting for the Ledger device.") from err
+
+            raise
+
+    def close(self):
+        self.dongle.close()
+
+
+class _MeteredDongle:
+    """
+    Reports the round-trip latency of each exchange. When the request is a signature,
+    the device answers its last exchange only once the user confirms, so the latest
+    exchange is held back and reported as the confirmation time instead.
+    """
+
+    def __init__(self, dongle: Any, method: str, confirms: bool = False):
+        self.dongle = dongle
+        self.method = method
+        self.confirms = confirms
+        self.last_elapsed = 0.0
+        self._pending: Optional[float] = None
+
+    def exchange(self, apdu: bytes, **kwargs) -> bytearray:
+        if self._pending is not None:
+            # Another exchange follows, so the previous one was not waiting for the user.
+            _exchange_seconds.observe(self._pending, method=self.method)
+            self._pending = None
+
+        start = time.perf_counter()
+        try:
+            with span("device.apdu", method=self.method, size=len(apdu)):
+                return self.dongle.exchange(apdu, **kwargs)
+        finally:
+            self.last_elapsed = time.perf_counter() - start
+            if self.confirms:
+                self._pending = self.last_elapsed
+            else:
+                _exchange_seconds.observe(self.last_elapsed, method=self.method)
+
+    def close(self):
+        self.dongle.close()
+
+
 class LedgerDeviceClient:
-    def __init__(self, account: "HDAccountPath"):
+    """
+    Args:
+        account (HDAccountPath): The account's HD path.
+        transport (Any): Exchange APDUs through this object instead of the device,
+          such as a :class:`~ape_ledger.transport.ReplayTransport` or another device.
+          Requests only wait for other requests through the same transport.
+        timeout (Optional[float]): The default number of seconds each request may take,
+          including waiting for the user to confirm on the device. Defaults to the
+          ``sign_timeout`` config (wait indefinitely unless set).
+    """
+
+    def __init__(
+        self,
+        account: "HDAccountPath",
+        transport: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ):
         self._account = account.path.lstrip("m/")
+        self.timeout = timeout
+        self._path_bytes = account.as_bytes()
+        self._holds_lock = False
+        self._opened = False
+        self._open_lock = threading.RLock()
+        self._dongle: Optional[Any] = transport
+        self._transport = transport
+        self._requests = 0
+        self._last_used = time.monotonic()
+        self._close_when_idle = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._dongle is not None
+
+    @property
+    def _request_lock(self) -> threading.RLock:
+        return _get_request_lock(self._transport)
 
-    @cached_property
+    @property
+    def idle_time(self) -> float:
+        """
+        Seconds since the last request finished, or ``0`` during a request.
+        """
+        return 0 if self._requests else time.monotonic() - self._last_used
+
+    @property
     def dongle(self):
+        # NOTE: Waits for a background warm-up to finish opening the device.
+        with self._open_lock:
+            if self._dongle is None:
+                self._dongle = self._open_dongle()
+
+            return self._dongle
+
+    def _open_dongle(self):
+        # NOTE: Lazy import so the client is usable without loading ape managers.
+        from ape.utils.basemodel import ManagerAccessMixin
+
+        config = ManagerAccessMixin.config_manager.get_config("ledger")
+        if config.replay_apdus:
+            return get_replay_transport(config.replay_apdus, realtime=config.replay_realtime)
+
         debug = logger.level <= LogLevel.DEBUG
-        device = get_dongle(debug=debug)
 
-        def close():
-            logger.info("Closing device.")
-            device.close()
+        # Queue behind other processes using the device rather than
+        # failing to open it (or resetting their handle).
+        lock = get_device_lock()
+        with phase("device.wait"):
+            lock.acquire()
+
+        try:
+            with phase("device.open"):
+                device = get_dongle(debug=debug)
+
+        except BaseException:
+            lock.release()
+            raise
+
+        # Also given as the transport of other clients, it is still the same device.
+        _get_request_lock(device, lock=_request_lock)
+        self._holds_lock = True
+        if self._opened:
+            _reconnects_total.inc()
+
+        self._opened = True
+        _open_clients.add(self)
+        _device_handles.inc()
+        if config.record_apdus:
+            return RecordingTransport(device, config.record_apdus.expanduser())
 
-        atexit.register(close)
         return device
 
-    def get_address(self) -> str:
-        return get_account_by_path(self._account, dongle=self.dongle).address
+    def warm_up(self) -> Optional[threading.Thread]:
+        """
+        Open the device and check the Ethereum app version in a background thread,
+        so it is ready by the time it is needed. Does nothing if it is already open.
+        """
+        if self._dongle is not None:
+            return None
+
+        thread = threading.Thread(target=self._warm_up, name="ledger-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self):
+        try:
+            # NOTE: Requests wait for the version check to finish.
+            with self._request_lock, self._open_lock:
+                dongle = self.dongle
+                with phase("device.warm_up"):
+                    config = dongle_send(dongle, "GET_CONFIGURATION")
+
+                self._last_used = time.monotonic()
+
+        except Exception as err:
+            # The same error is raised again when the device is used.
+            logger.debug(f"Ledger device warm-up failed: {err}")
+            return
+
+        if config and not is_usable_version(config):
+            version = decode_response_version_from_config(config)
+            logger.warning(f"Unsupported Ethereum app version '{version}' on the Ledger device.")
+
+    def close(self):
+        """
+        Close the device, allowing other processes to use it.
+        It is re-opened the next time it is needed.
+        """
+        with self._open_lock:
+            if self._dongle is None:
+                return
+
+            device, self._dongle = self._dongle, None
+            holds_lock, self._holds_lock = self._holds_lock, False
+
+        _open_clients.discard(self)
+        logger.info("Closing device.")
+        try:
+            device.close()
+        finally:
+            if holds_lock:
+                _device_handles.dec()
+                get_device_lock().release()
+
+    def close_when_idle(self):
+        """
+        Close the device now, or after the requests in progress finish.
+        """
+        with self._open_lock:
+            if self._requests:
+                self._close_when_idle = True
+                return
+
+        self.close()
+
+    def close_if_idle(self, idle_timeout: float) -> bool:
+        """
+        Close the device if it has not been used for ``idle_timeout`` seconds.
+
+        Returns:
+            bool: ``True`` if the device was closed.
+        """
+        with self._open_lock:
+            if not self.is_open or self._requests or self.idle_time < idle_timeout:
+                return False
+
+            self.close()
+            return True
+
+    @contextmanager
+    def _session(self, method: str, timeout: Optional[float]) -> Iterator[_MeteredDongle]:
+        # The dongle for one request, expiring after `timeout` seconds.
+        if timeout is None:
+            timeout = self.timeout if self.timeout is not None else _get_default_timeout()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._open_lock:
+            self._requests += 1
+
+        try:
+            # NOTE: One request at a time, for every client of the device in the process:
+            # it cannot tell the exchanges of concurrent requests apart.
+            wait = -1 if deadline is None else max(deadline - time.monotonic(), 0)
+            request_lock = self._request_lock
+            if not request_lock.acquire(timeout=wait):
+                _errors_total.inc(error=SigningTimeoutError.__name__)
+                raise SigningTimeoutError("Timed out waiting for another request to finish.")
+
+            try:
+                dongle = self.dongle
+                if deadline is not None:
+                    dongle = _DeadlineDongle(dongle, deadline)
+
+                yield _MeteredDongle(dongle, method, confirms=method.startswith("sign_"))
 
-    def sign_message(self, text: bytes) -> tuple[int, int, int]:
-        signed_msg = sign_message(text, sender_path=self._account, dongle=self.dongle)
+            except Exception as err:
+                _errors_total.inc(error=type(err).__name__)
+                if isinstance(err, SigningTimeoutError) and self._holds_lock:
+                    # The device is still waiting on the unanswered request.
+                    # Re-open it on the next request rather than reading a stale response.
+                    self.close()
+
+                raise
+
+            finally:
+                request_lock.release()
+
+        finally:
+            with self._open_lock:
+                self._requests -= 1
+                self._last_used = time.monotonic()
+                close = not self._requests and (
+                    self._close_when_idle
+                    # Hand the device over to another process waiting for it.
+                    or (self._holds_lock and get_device_lock().has_waiters)
+                )
+
+            if close:
+                self.close()
+
+    def get_address(self, timeout: Optional[float] = None) -> str:
+        with self._session("get_address", timeout) as dongle, phase("device.exchange"):
+            return get_account_by_path(self._account, dongle=dongle).address
+
+    def get_public_key(self, timeout: Optional[float] = None) -> tuple[bytes, bytes]:
+        """
+        Get the uncompressed public key and chain code of the path,
+        e.g. to derive its non-hardened children without the device.
+        """
+        apdu = GET_PUBLIC_KEY_APDU + bytes([len(self._path_bytes)]) + self._path_bytes
+        with self._session("get_public_key", timeout) as dongle, phase("device.exchange"):
+            try:
+                response = bytes(dongle.exchange(apdu))
+            except CommException as err:
+                raise LedgerError.transalate_comm_exception(err) from err
+
+        key_size = response[0]
+        public_key = response[1 : 1 + key_size]
+        address_size = response[1 + key_size]
+        chain_code = response[2 + key_size + address_size :][:32]
+        return public_key, chain_code
+
+    def sign_message(self, text: bytes, timeout: Optional[float] = None) -> tuple[int, int, int]:
+        with self._session("sign_message", timeout) as dongle, phase("device.exchange"):
+            signed_msg = sign_message(text, sender_path=self._account, dongle=dongle)
+
+        _report_signature("message", dongle)
         return signed_msg.v, signed_msg.r, signed_msg.s
 
-    def sign_typed_data(self, domain_hash: bytes, message_hash: bytes) -> tuple[int, int, int]:
-        signed_msg = sign_typed_data_draft(
-            domain_hash, message_hash, sender_path=self._account, dongle=self.dongle
-        )
+    def sign_typed_data(
+        self, domain_hash: bytes, message_hash: bytes, timeout: Optional[float] = None
+    ) -> tuple[int, int, int]:
+        with self._session("sign_typed_data", timeout) as dongle, phase("device.exchange"):
+            signed_msg = sign_typed_data_draft(
+                domain_hash, message_hash, sender_path=self._account, dongle=dongle
+            )
+
+        _report_signature("typed_data", dongle)
         return signed_msg.v, signed_msg.r, signed_msg.s
 
-    def sign_transaction(self, txn: dict) -> tuple[int, int, int]:
-        kwargs = {**txn, "sender_path": self._account, "dongle": self.dongle}
-        signed_tx = create_transaction(**kwargs)
+    def sign_transaction(self, txn: dict, timeout: Optional[float] = None) -> tuple[int, int, int]:
+        with self._session("sign_transaction", timeout) as dongle, phase("device.exchange"):
+            # The time outside of the exchanges is ledgereth encoding the transaction.
+            with span("ledgereth.create_transaction"):
+                signed_tx = create_transaction(**txn, sender_path=self._account, dongle=dongle)
+
+        is_type_2 = isinstance(signed_tx, SignedType2Transaction)
+        _report_signature("type_2_transaction" if is_type_2 else "legacy_transaction", dongle)
         return (
             (signed_tx.y_parity, signed_tx.sender_r, signed_tx.sender_s)
-            if isinstance(signed_tx, SignedType2Transaction)
+            if is_type_2
             else (signed_tx.v, signed_tx.r, signed_tx.s)
         )
 
 
-_device_factory = DeviceFactory()
+def _report_signature(kind: str, dongle: _MeteredDongle):
+    _signs_total.inc(kind=kind)
+    # The device answers the last exchange of a request once the user confirms it.
+    _confirmation_seconds.observe(dongle.last_elapsed, kind=kind)
+
+
+class DeviceFactoryStats(NamedTuple):
+    hits: int
+    """Requests for a client already in the factory."""
+
+    misses: int
+    """Requests creating a new client."""
+
+    evictions: int
+    """Clients dropped for the least recently used limit."""
+
+    idle_closes: int
+    """Device handles closed after being idle."""
+
+    size: int
+    """Clients in the factory."""
+
+    live_handles: int
+    """Clients in the factory with the device open."""
+
+
+class DeviceFactory:
+    """
+    The device clients by HD path, most recently used last. Holds at most
+    ``max_size`` clients, closing the device of the least recently used one
+    when adding another, and closes devices idle for ``idle_timeout`` seconds
+    in a background thread.
+
+    Args:
+        max_size (int): The number of clients to keep. Defaults to ``32``.
+        idle_timeout (Optional[float]): Seconds after which an unused device is closed.
+          It is re-opened the next time it is needed. ``None`` keeps it open.
+          Defaults to ``10``.
+    """
+
+    def __init__(self, max_size: int = 32, idle_timeout: Optional[float] = 10.0):
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.device_map: OrderedDict[str, LedgerDeviceClient] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._idle_closes = 0
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def stats(self) -> DeviceFactoryStats:
+        with self._lock:
+            clients = list(self.device_map.values())
+            return DeviceFactoryStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                idle_closes=self._idle_closes,
+                size=len(clients),
+                live_handles=sum(1 for c in clients if c.is_open),
+            )
+
+    def create_device(self, account: "HDAccountPath") -> LedgerDeviceClient:
+        evicted = None
+        with self._lock:
+            if device := self.device_map.get(account.path):
+                self._hits += 1
+                self.device_map.move_to_end(account.path)
+                return device
+
+            self._misses += 1
+            device = LedgerDeviceClient(account)
+            self.device_map[account.path] = device
+            if len(self.device_map) > self.max_size:
+                _, evicted = self.device_map.popitem(last=False)
+                self._evictions += 1
+
+            self._start_reaper()
+
+        if evicted is not None:
+            evicted.close_when_idle()
+
+        return device
+
+    def close_idle(self) -> int:
+        """
+        Close the devices idle for at least ``idle_timeout`` seconds.
+
+        Returns:
+            int: The number of devices closed.
+        """
+        if self.idle_timeout is None:
+            return 0
+
+        with self._lock:
+            clients = list(self.device_map.values())
+
+        closed = sum(1 for c in clients if c.close_if_idle(self.idle_timeout))
+        with self._lock:
+            self._idle_closes += closed
+
+        return closed
+
+    def close(self):
+        """
+        Stop closing idle devices and close every device.
+        """
+        self._stop.set()
+        with self._lock:
+            clients = list(self.device_map.values())
+            self.device_map.clear()
+
+        for client in clients:
+            client.close_when_idle()
+
+    def _start_reaper(self):
+        if self._reaper is not None or self.idle_timeout is None:
+            return
+
+        self._reaper = threading.Thread(target=self._reap, name="ledger-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        assert self.idle_timeout is not None
+        # Closes devices between `idle_timeout` and 1.5x `idle_timeout` after their last use.
+        interval = min(self.idle_timeout / 2, 60)
+        while not self._stop.wait(interval):
+            try:
+                self.close_idle()
+            except Exception as err:
+                logger.debug(f"Closing idle Ledger devices failed: {err}")
+
+
+def _get_default_timeout() -> Optional[float]:
+    # NOTE: Lazy import so the client is usable without loading ape managers.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    return ManagerAccessMixin.config_manager.get_config("ledger").sign_timeout
+
+
+# The clients with the device open, closed on exit.
+_open_clients: set[LedgerDeviceClient] = set()
+
+
+@atexit.register
+def _close_open_clients():
+    for client in list(_open_clients):
+        client.close()
+
+
+_device_factory: Optional[DeviceFactory] = None
+
+
+def _get_idle_timeout(
+    idle_timeout: Optional[float], lock_timeout: Optional[float]
+) -> Optional[float]:
+    if idle_timeout is None or lock_timeout is None:
+        return idle_timeout
+
+    # An idle device is closed up to 1.5x the idle timeout after its last use. Close it
+    # before other processes waiting for it give up.
+    return min(idle_timeout, lock_timeout / 2)
+
+
+def get_device_factory() -> DeviceFactory:
+    """
+    Get the device factory, configured by the ``device_cache_size``
+    and ``device_idle_timeout`` config.
+    """
+    global _device_factory
+    if _device_factory is None:
+        # NOTE: Lazy import so the client is usable without loading ape managers.
+        from ape.utils.basemodel import ManagerAccessMixin
+
+        config = ManagerAccessMixin.config_manager.get_config("ledger")
+        _device_factory = DeviceFactory(
+            max_size=config.device_cache_size,
+            idle_timeout=_get_idle_timeout(config.device_idle_timeout, config.lock_timeout),
+        )
+
+    return _device_factory
 
 
 def get_device(account: "HDAccountPath") -> LedgerDeviceClient:
-    return _device_factory.create_device(account)
+    return get_device_factory().create_device(account)
@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import Literal, Optional
+
+from ape.api import PluginConfig
+from pydantic_settings import SettingsConfigDict
+
+
+class LedgerConfig(PluginConfig):
+    account_store: Literal["json", "sqlite"] = "json"
+    """
+    Where to keep accounts: ``"json"`` for one JSON file per account in the
+    plugin data folder, or ``"sqlite"`` for a single SQLite file there, for
+    large numbers of accounts. The SQLite file starts with a copy of the JSON files.
+    """
+
+    lock_timeout: Optional[float] = 60.0
+    """
+    Seconds to wait for another process to release the Ledger device
+    before giving up. Set to ``None`` to wait indefinitely.
+    """
+
+    sign_timeout: Optional[float] = None
+    """
+    Seconds each device request, including confirming it on the device, may take
+    before failing. Defaults to waiting indefinitely.
+    """
+
+    verify_signer: bool = True
+    """
+    Recover the signer of each signed transaction and check that it is the account,
+    catching a wrong HD path or chain ID before the transaction is broadcast.
+    """
+
+    warm_up: bool = False
+    """
+    Start opening the device in the background the first time a Ledger account
+    is used, e.g. while the provider estimates the gas of its first transaction,
+    rather than when it signs.
+    """
+
+    device_cache_size: int = 32
+    """
+    The number of device clients (one per HD path) to keep. The least recently
+    used client's device is closed when another one is needed.
+    """
+
+    device_idle_timeout: Optional[float] = 10.0
+    """
+    Seconds after which an unused device is closed, letting other processes use it.
+    It is re-opened the next time it is needed. At most half of ``lock_timeout``, so
+    the processes waiting for the device get it in time. Set to ``None`` to keep it
+    open. Either way, it is closed after a request when another process is waiting.
+    """
+
+    record_apdus: Optional[Path] = None
+    """
+    Append every APDU exchanged with the device to this file,
+    so the session can be replayed later without the device.
+    """
+
+    replay_apdus: Optional[Path] = None
+    """
+    Answer device requests from a file written using ``record_apdus``
+    instead of opening the device.
+    """
+
+    replay_realtime: bool = False
+    """
+    When replaying, wait as long as the device took to answer each request.
+    """
+
+    model_config = SettingsConfigDict(extra="allow", env_prefix="APE_LEDGER_")
@@ -0,0 +1,305 @@
+import json
+import os
+import socket
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from typing import Any, Optional
+
+from ape.logging import logger
+
+from ape_ledger.client import _get_default_timeout, get_device
+from ape_ledger.exceptions import LedgerAccountException, LedgerSigningError, SigningTimeoutError
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.metrics import get_registry
+
+# The device methods clients may call through the daemon, with their number of arguments.
+DAEMON_METHODS = ("get_address", "sign_message", "sign_typed_data", "sign_transaction")
+_METHOD_ARGS = {"get_address": 0, "sign_message": 1, "sign_typed_data": 2, "sign_transaction": 1}
+
+# The keyword arguments of every device method.
+_METHOD_KWARGS = ("timeout",)
+
+# The transaction fields `sign_transaction` takes, as encoded by the accounts.
+TRANSACTION_FIELDS = (
+    "nonce",
+    "gas",
+    "amount",
+    "data",
+    "destination",
+    "chain_id",
+    "gas_price",
+    "max_fee_per_gas",
+    "max_priority_fee_per_gas",
+    "access_list",
+)
+
+# Seconds to wait for the daemon on top of the request's own timeout, and for a ping.
+DAEMON_TIMEOUT_MARGIN = 5.0
+PING_TIMEOUT = 1.0
+
+
+def get_socket_path() -> Path:
+    """
+    The path to the daemon's Unix socket, in the plugin data folder.
+    """
+    # NOTE: Lazy import so the daemon client loads faster.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    return ManagerAccessMixin.config_manager.DATA_FOLDER / "ledger" / "daemon.sock"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": bytes(value).hex()}
+    elif isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict) and value.keys() == {"bytes"}:
+        return bytes.fromhex(value["bytes"])
+    elif isinstance(value, list):
+        return [_decode(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: _decode(v) for k, v in value.items()}
+
+    return value
+
+
+class _InvalidRequest(Exception):
+    def __init__(self, message: str, fields: Sequence[str] = ()):
+        super().__init__(message)
+        self.fields = list(fields)
+
+
+def _check_request(method: str, args: Any, kwargs: Any):
+    if not isinstance(args, list) or len(args) != _METHOD_ARGS[method]:
+        raise _InvalidRequest(f"'{method}' takes {_METHOD_ARGS[method]} arguments.")
+
+    elif not isinstance(kwargs, dict):
+        raise _InvalidRequest("Keyword arguments must be an object.")
+
+    elif unknown := sorted(set(kwargs) - set(_METHOD_KWARGS)):
+        raise _InvalidRequest(f"Unknown arguments for '{method}'.", unknown)
+
+    elif kwargs.get("timeout") is not None and not isinstance(kwargs["timeout"], (int, float)):
+        raise _InvalidRequest("The timeout must be a number.", ["timeout"])
+
+    elif method == "sign_transaction":
+        if not isinstance(args[0], dict):
+            raise _InvalidRequest("The transaction must be an object.")
+
+        elif unknown := sorted(set(args[0]) - set(TRANSACTION_FIELDS)):
+            raise _InvalidRequest("Unknown transaction fields.", unknown)
+
+
+class _RequestHandler(StreamRequestHandler):
+    server: "LedgerDaemon"
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            response = self.server.handle_request_data(line)
+            self.wfile.write(f"{json.dumps(response)}\n".encode())
+            self.wfile.flush()
+
+
+class LedgerDaemon(ThreadingUnixStreamServer):
+    """
+    A local server that holds the Ledger device session and serves address
+    and signing requests from other processes over a Unix socket.
+    Requests and responses are JSON lines; requests for the device are
+    handled one at a time.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.socket_path = socket_path or get_socket_path()
+        if self.socket_path.exists():
+            if _ping(self.socket_path):
+                raise LedgerAccountException(
+                    f"A Ledger daemon is already running at '{self.socket_path}'."
+                )
+
+            # Left behind by a daemon that did not shut down cleanly.
+            self.socket_path.unlink()
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._device_lock = threading.Lock()
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def server_bind(self):
+        # Only the user may connect, from the moment the socket exists.
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def handle_request_data(self, data: bytes) -> dict:
+        try:
+            request = json.loads(data)
+            method = request["method"]
+            if method == "ping":
+                return {"result": "pong"}
+            elif method == "metrics":
+                return {"result": get_registry().expose()}
+            elif method not in DAEMON_METHODS:
+                raise LedgerAccountException(f"Unknown method '{method}'.")
+
+            args = _decode(request.get("args", []))
+            kwargs = request.get("kwargs", {})
+            _check_request(method, args, kwargs)
+            device = get_device(HDAccountPath(request["hd_path"]))
+            with self._device_lock:
+                result = getattr(device, method)(*args, **kwargs)
+
+        except _InvalidRequest as err:
+            logger.error(f"Invalid Ledger daemon request: {err}")
+            return {"error": str(err), "type": "InvalidRequest", "fields": err.fields}
+
+        except Exception as err:
+            logger.error(f"Ledger daemon request failed: {err}")
+            return {"error": str(err), "type": type(err).__name__}
+
+        return {"result": _encode(result)}
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+class DaemonClient:
+    """
+    A device client that forwards requests to a running
+    :class:`~ape_ledger.daemon.LedgerDaemon`.
+    """
+
+    def __init__(self, account: HDAccountPath, socket_path: Optional[Path] = None):
+        self._account = account.path
+        self.socket_path = socket_path or get_socket_path()
+
+    def get_address(self, timeout: Optional[float] = None) -> str:
+        return self._request("get_address", timeout=timeout)
+
+    def sign_message(self, text: bytes, timeout: Optional[float] = None) -> tuple[int, int, int]:
+        return self._request_signature("sign_message", text, timeout=timeout)
+
+    def sign_typed_data(
+        self, domain_hash: bytes, message_hash: bytes, timeout: Optional[float] = None
+    ) -> tuple[int, int, int]:
+        return self._request_signature(
+            "sign_typed_data", domain_hash, message_hash, timeout=timeout
+        )
+
+    def sign_transaction(self, txn: dict, timeout: Optional[float] = None) -> tuple[int, int, int]:
+        return self._request_signature("sign_transaction", txn, timeout=timeout)
+
+    def _request_signature(
+        self, method: str, *args, timeout: Optional[float] = None
+    ) -> tuple[int, int, int]:
+        v, r, s = self._request(method, *args, timeout=timeout)
+        return v, r, s
+
+    def _request(self, method: str, *args, timeout: Optional[float] = None) -> Any:
+        request: dict = {"method": method, "hd_path": self._account, "args": _encode(list(args))}
+        if timeout is not None:
+            request["kwargs"] = {"timeout": timeout}
+
+        sign_timeout = timeout if timeout is not None else _get_default_timeout()
+        try:
+            response = _send(
+                self.socket_path,
+                request,
+                timeout=None if sign_timeout is None else sign_timeout + DAEMON_TIMEOUT_MARGIN,
+            )
+        except (ConnectionRefusedError, FileNotFoundError, TimeoutError):
+            # The daemon stopped, or is stuck past the request's timeout.
+            # Send the request to the device instead.
+            _forget_daemon()
+            device = get_device(HDAccountPath(self._account))
+            return getattr(device, method)(*args, timeout=timeout)
+
+        if response.get("type") == SigningTimeoutError.__name__:
+            raise SigningTimeoutError(f"Ledger daemon error: {response['error']}")
+        elif "error" in response:
+            raise LedgerSigningError(f"Ledger daemon error: {response['error']}")
+
+        return _decode(response["result"])
+
+
+def _send(socket_path: Path, request: dict, timeout: Optional[float] = None) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        with sock.makefile("rwb") as stream:
+            stream.write(f"{json.dumps(request)}\n".encode())
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def _ping(socket_path: Path) -> bool:
+    try:
+        return _send(socket_path, {"method": "ping"}, timeout=PING_TIMEOUT).get("result") == "pong"
+    except (OSError, ValueError):
+        return False
+
+
+def get_daemon_metrics(socket_path: Optional[Path] = None) -> Optional[str]:
+    """
+    Get the metrics of the running Ledger daemon in the Prometheus text
+    exposition format, if there is one.
+    """
+    socket_path = socket_path or get_socket_path()
+    try:
+        return _send(socket_path, {"method": "metrics"}, timeout=PING_TIMEOUT).get("result")
+    except (OSError, ValueError):
+        return None
+
+
+# The socket of the running daemon, looked up once per process (or after it stopped).
+_daemon_socket_path: Optional[Path] = None
+_daemon_checked = False
+_daemon_lock = threading.Lock()
+
+
+def _forget_daemon():
+    global _daemon_checked, _daemon_socket_path
+    with _daemon_lock:
+        _daemon_checked = False
+        _daemon_socket_path = None
+
+
+def get_daemon_client(account: HDAccountPath) -> Optional[DaemonClient]:
+    """
+    Get a client for the running Ledger daemon, if there is one. The daemon is
+    looked up once per process, and again after it stopped.
+    """
+    global _daemon_checked, _daemon_socket_path
+    with _daemon_lock:
+        if not _daemon_checked:
+            path = get_socket_path()
+            _daemon_socket_path = path if _ping(path) else None
+            _daemon_checked = True
+
+        socket_path = _daemon_socket_path
+
+    return DaemonClient(account, socket_path=socket_path) if socket_path else None
+
+
+__all__ = [
+    "DaemonClient",
+    "LedgerDaemon",
+    "get_daemon_client",
+    "get_daemon_metrics",
+    "get_socket_path",
+]
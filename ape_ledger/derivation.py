@@ -0,0 +1,315 @@
+import hashlib
+import hmac
+import json
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from eth_keys.backends.native.ecdsa import G, N, decode_public_key, encode_raw_public_key
+from eth_keys.backends.native.jacobian import fast_add, fast_multiply
+from eth_utils import keccak, to_checksum_address
+
+from ape_ledger.client import LedgerDeviceClient, get_device
+from ape_ledger.hdpath import HDAccountPath, HDBasePath
+from ape_ledger.metrics import address_cache_total
+from ape_ledger.profiling import phase
+
+# The account whose address tells devices (seeds and passphrases) apart.
+FINGERPRINT_PATH = "m/44'/60'/0'/0/0"
+
+
+class AddressCache:
+    """
+    A persistent map of HD paths to addresses, so addresses
+    derived once never need the device again. Without a path,
+    the cache is kept in memory only. The addresses are kept
+    per device, by the device's fingerprint, defaulting to
+    :func:`~ape_ledger.derivation.get_device_fingerprint`.
+    """
+
+    def __init__(self, path: Optional[Path] = None, fingerprint: Optional[str] = None):
+        self.path = path
+        self._fingerprint = fingerprint
+        self._lock = threading.RLock()
+        self._devices: Optional[dict[str, dict[str, str]]] = None
+
+    @property
+    def fingerprint(self) -> str:
+        with self._lock:
+            if self._fingerprint is None:
+                self._fingerprint = get_device_fingerprint()
+
+            return self._fingerprint
+
+    @property
+    def addresses(self) -> dict[str, str]:
+        """
+        The addresses of the device, by HD path.
+        """
+        with self._lock:
+            if self._devices is None:
+                try:
+                    data = json.loads(self.path.read_text()) if self.path else {}
+                except (FileNotFoundError, ValueError):
+                    data = {}
+
+                # NOTE: Older caches map HD paths to addresses of an unknown device.
+                self._devices = {k: v for k, v in data.items() if isinstance(v, dict)}
+
+            return self._devices.setdefault(self.fingerprint, {})
+
+    def get(self, hd_path: HDAccountPath) -> Optional[str]:
+        return self.addresses.get(hd_path.path)
+
+    def set(self, hd_path: HDAccountPath, address: str):
+        with self._lock:
+            self.addresses[hd_path.path] = address
+
+    def save(self):
+        with self._lock:
+            if self._devices is None or self.path is None:
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._devices))
+
+
+_address_cache: Optional[AddressCache] = None
+_device_fingerprint: Optional[str] = None
+
+# Derivers may run in threads, but the device answers one request at a time.
+_device_lock = threading.Lock()
+
+_cache_lookups = address_cache_total()
+
+
+def get_device_fingerprint() -> str:
+    """
+    Get the address of :data:`~ape_ledger.derivation.FINGERPRINT_PATH` on the device,
+    telling its seed (and passphrase) apart from others. Read once per process.
+    """
+    global _device_fingerprint
+    with _device_lock:
+        if _device_fingerprint is None:
+            with phase("derive.fingerprint"):
+                _device_fingerprint = get_device(HDAccountPath(FINGERPRINT_PATH)).get_address()
+
+        return _device_fingerprint
+
+
+def get_address_cache() -> AddressCache:
+    """
+    Get the address cache stored in the plugin data folder.
+    """
+    global _address_cache
+    if _address_cache is None:
+        # NOTE: Lazy import so derivation is usable without loading ape managers.
+        from ape.utils.basemodel import ManagerAccessMixin
+
+        # NOTE: Not in the data folder itself, where each JSON file is an account.
+        path = ManagerAccessMixin.config_manager.DATA_FOLDER / "ledger" / "cache" / "addresses.json"
+        _address_cache = AddressCache(path)
+
+    return _address_cache
+
+
+def derive_public_child(public_key: bytes, chain_code: bytes, index: int) -> tuple[bytes, bytes]:
+    """
+    Derive a non-hardened child public key (BIP-32 ``CKDpub``).
+
+    Args:
+        public_key (bytes): The uncompressed (65 bytes) or raw (64 bytes) parent public key.
+        chain_code (bytes): The parent chain code.
+        index (int): The non-hardened child index.
+
+    Returns:
+        tuple[bytes, bytes]: The raw (64 bytes) child public key and the child chain code.
+    """
+    if index >= 2**31:
+        raise ValueError("Cannot derive hardened children from a public key.")
+
+    point = decode_public_key(public_key[-64:])
+    compressed = bytes([2 + (point[1] & 1)]) + point[0].to_bytes(32, "big")
+    digest = hmac.new(chain_code, compressed + index.to_bytes(4, "big"), hashlib.sha512).digest()
+    tweak = int.from_bytes(digest[:32], "big")
+    if tweak >= N:
+        raise ValueError(f"Invalid child index {index}.")
+
+    child = fast_add(fast_multiply(G, tweak), point)
+    return encode_raw_public_key(child), digest[32:]
+
+
+def public_key_to_address(public_key: bytes) -> str:
+    return to_checksum_address(keccak(public_key[-64:])[-20:])
+
+
+# Derives the address of an account index.
+AddressSource = Callable[[int], str]
+
+
+class AddressDeriver:
+    """
+    Derives the addresses of an :class:`~ape_ledger.hdpath.HDBasePath` template,
+    as fast as the path allows: from the address cache first, then in software
+    from the device's public key when the account node and every node after it
+    are non-hardened, else from the device.
+    """
+
+    def __init__(self, base_path: Union[HDBasePath, str], cache: Optional[AddressCache] = None):
+        self.base_path = HDBasePath(base_path)
+        self.cache = cache or get_address_cache()
+
+        nodes = self.base_path.path.split("/")
+        account_node = next(i for i, n in enumerate(nodes) if "{x}" in n)
+        parent_nodes, child_nodes = nodes[:account_node], nodes[account_node:]
+        self._parent_path = "/".join(parent_nodes)
+        self._child_nodes = child_nodes[1:]
+        self.is_software = len(parent_nodes) > 1 and not any(n.endswith("'") for n in child_nodes)
+        self._parent_key: Optional[tuple[bytes, bytes]] = None
+
+    def get_address(self, index: int) -> str:
+        hd_path = self.base_path.get_account_path(index)
+        if address := self.cache.get(hd_path):
+            _cache_lookups.inc(result="hit")
+            return address
+
+        _cache_lookups.inc(result="miss")
+        if self.is_software:
+            with phase("derive.software"):
+                address = self._derive(index)
+
+        else:
+            with phase("derive.device"), _device_lock:
+                address = get_device(hd_path).get_address()
+
+        self.cache.set(hd_path, address)
+        return address
+
+    def iter_addresses(self, indices: Iterable[int]) -> Iterator[tuple[HDAccountPath, str]]:
+        for index in indices:
+            yield self.base_path.get_account_path(index), self.get_address(index)
+
+    def _derive(self, index: int) -> str:
+        if self._parent_key is None:
+            # The one device request for every address of the template.
+            with _device_lock:
+                self._parent_key = get_device(HDAccountPath(self._parent_path)).get_public_key()
+
+        public_key, chain_code = derive_public_child(*self._parent_key, index)
+        for node in self._child_nodes:
+            public_key, chain_code = derive_public_child(public_key, chain_code, int(node))
+
+        return public_key_to_address(public_key)
+
+
+def device_address_source(base_path: Union[HDBasePath, str], transport: Any) -> AddressSource:
+    """
+    An address source for :func:`~ape_ledger.derivation.derive_addresses` asking a
+    device other than the plugin's own, e.g. another device with the same seed.
+
+    Args:
+        base_path (Union[HDBasePath, str]): The HD path template.
+        transport (Any): The device, such as an opened ``ledgerblue`` dongle.
+    """
+    base_path = HDBasePath(base_path)
+
+    def get_address(index: int) -> str:
+        client = LedgerDeviceClient(base_path.get_account_path(index), transport=transport)
+        return client.get_address()
+
+    return get_address
+
+
+def derive_addresses(indices: Iterable[int], sources: Sequence[AddressSource]) -> list[str]:
+    """
+    Derive the addresses of account indices, spreading them across the sources
+    concurrently. Each source takes the next index as soon as it is free, so
+    faster sources derive more of them.
+
+    Args:
+        indices (Iterable[int]): The account indices.
+        sources (Sequence[AddressSource]): Callables deriving the address of an
+          account index, all for the same template and seed, such as
+          :meth:`~ape_ledger.derivation.AddressDeriver.get_address` or
+          :func:`~ape_ledger.derivation.device_address_source`.
+
+    Returns:
+        list[str]: The address of each index, in the given order.
+    """
+    indices = list(indices)
+    if len(sources) < 2 or len(indices) < 2:
+        return [sources[0](i) for i in indices]
+
+    queue = deque(indices)
+    addresses: dict[int, str] = {}
+
+    def work(source: AddressSource):
+        while True:
+            try:
+                index = queue.popleft()
+            except IndexError:
+                return
+
+            addresses[index] = source(index)
+
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="ledger-derive") as pool:
+        for future in [pool.submit(work, source) for source in sources]:
+            # Raises the first failure.
+            future.result()
+
+    return [addresses[i] for i in indices]
+
+
+def find_address(
+    address: str,
+    base_paths: Iterable[Union[HDBasePath, str]],
+    start: int = 0,
+    limit: int = 100,
+    cache: Optional[AddressCache] = None,
+) -> Optional[HDAccountPath]:
+    """
+    Find the HD path of an address by scanning ``limit`` account indices of each template,
+    in index order across the templates, stopping at the first match.
+
+    Args:
+        address (str): The address to find.
+        base_paths (Iterable[Union[HDBasePath, str]]): The templates to scan.
+        start (int): The first index to check. Defaults to ``0``.
+        limit (int): The number of indices to check per template. Defaults to ``100``.
+        cache (Optional[AddressCache]): The address cache. Defaults to the plugin's cache,
+          with the addresses of the device in use.
+
+    Returns:
+        Optional[HDAccountPath]: The HD path of the address, if found.
+    """
+    cache = cache or get_address_cache()
+    derivers = [AddressDeriver(p, cache=cache) for p in base_paths]
+    target = address.lower()
+    try:
+        for index in range(start, start + limit):
+            for deriver in derivers:
+                if deriver.get_address(index).lower() == target:
+                    return deriver.base_path.get_account_path(index)
+
+    finally:
+        cache.save()
+
+    return None
+
+
+__all__ = [
+    "FINGERPRINT_PATH",
+    "AddressCache",
+    "AddressDeriver",
+    "AddressSource",
+    "derive_addresses",
+    "derive_public_child",
+    "device_address_source",
+    "find_address",
+    "get_address_cache",
+    "get_device_fingerprint",
+    "public_key_to_address",
+]
@@ -0,0 +1,85 @@
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+from ape_ledger.activity import get_account_activity
+from ape_ledger.derivation import AddressCache, AddressDeriver, get_address_cache
+from ape_ledger.hdpath import HDAccountPath, HDBasePath
+
+if TYPE_CHECKING:
+    from ape.api import ProviderAPI
+
+# Ledger Live, legacy (MEW / MyCrypto) and BIP-44 standard layouts.
+COMMON_BASE_PATHS = ("m/44'/60'/{x}'/0/0", "m/44'/60'/0'/{x}", "m/44'/60'/0'/0/{x}")
+
+
+class DiscoveredAccount(NamedTuple):
+    hd_path: HDAccountPath
+    address: str
+    balance: int
+    nonce: int
+
+
+def discover_accounts(
+    provider: "ProviderAPI",
+    base_paths: Iterable[Union[HDBasePath, str]] = COMMON_BASE_PATHS,
+    gap_limit: int = 20,
+    cache: Optional[AddressCache] = None,
+) -> list[DiscoveredAccount]:
+    """
+    Find the used (funded or transacted) accounts of several HD path templates.
+    Each round derives the next ``gap_limit`` addresses of every template side by
+    side, then gets the activity of all of them in one batched request. A template
+    is done after ``gap_limit`` unused addresses in a row.
+
+    Args:
+        provider (ProviderAPI): The provider to get balances and nonces from.
+        base_paths (Iterable[Union[HDBasePath, str]]): The templates to sweep.
+          Defaults to the Ledger Live, legacy and BIP-44 standard layouts.
+        gap_limit (int): The number of unused addresses in a row ending a template.
+          Defaults to ``20``.
+        cache (Optional[AddressCache]): The address cache. Defaults to the plugin's cache,
+          with the addresses of the device in use.
+
+    Returns:
+        list[DiscoveredAccount]: The used accounts, highest balance first.
+    """
+    cache = cache or get_address_cache()
+    derivers = [AddressDeriver(p, cache=cache) for p in dict.fromkeys(str(p) for p in base_paths)]
+    start = 0
+    gaps = {d.base_path.path: 0 for d in derivers}
+    found: dict[str, DiscoveredAccount] = {}
+
+    def derive(deriver: AddressDeriver) -> list[tuple[HDAccountPath, str]]:
+        return list(deriver.iter_addresses(range(start, start + gap_limit)))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(derivers), 1)) as pool:
+            while derivers:
+                batches = list(pool.map(derive, derivers))
+                addresses = [address for batch in batches for _, address in batch]
+                activity = iter(get_account_activity(addresses, provider))
+                for deriver, batch in zip(derivers, batches):
+                    for (hd_path, address), account_activity in zip(batch, activity):
+                        template = deriver.base_path.path
+                        if gaps[template] >= gap_limit:
+                            # Past the gap limit within this batch.
+                            continue
+
+                        elif not account_activity.is_used:
+                            gaps[template] += 1
+                            continue
+
+                        gaps[template] = 0
+                        found[hd_path.path] = DiscoveredAccount(hd_path, address, *account_activity)
+
+                derivers = [d for d in derivers if gaps[d.base_path.path] < gap_limit]
+                start += gap_limit
+
+    finally:
+        cache.save()
+
+    return sorted(found.values(), key=lambda a: (-a.balance, -a.nonce, a.hd_path.path))
+
+
+__all__ = ["COMMON_BASE_PATHS", "DiscoveredAccount", "discover_accounts"]
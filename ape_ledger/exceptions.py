@@ -12,3 +12,17 @@ class LedgerSigningError(LedgerAccountException):
     An error that occurs when signing a message or transaction
     using the Ledger plugin.
     """
+
+
+class SigningTimeoutError(LedgerSigningError):
+    """
+    An error that occurs when the Ledger device does not answer in time,
+    such as when no one confirms the request on the device.
+    """
+
+
+class DeviceLockTimeoutError(LedgerAccountException):
+    """
+    An error that occurs when another process holds the Ledger device
+    for longer than the configured lock timeout.
+    """
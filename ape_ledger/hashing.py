@@ -0,0 +1,186 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from dataclassy import fields
+from eip712 import EIP712Message, EIP712Type
+from eip712.messages import EIP712_DOMAIN_FIELDS
+from eth_abi.registry import registry
+from eth_account._utils.encode_typed_data.encoding_and_hashing import (
+    encode_field,
+    encode_type,
+    get_primary_type,
+    hash_domain,
+)
+from eth_account._utils.encode_typed_data.helpers import (
+    is_array_type,
+    parse_core_array_type,
+    parse_parent_array_type,
+)
+from eth_account.messages import SignableMessage
+from eth_pydantic_types import HexBytes
+from eth_utils import keccak
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+# The hash of an empty array, i.e. ``keccak(encode((), ()))``.
+EMPTY_ARRAY_HASH = keccak(b"")
+
+# A hashable form of EIP-712 type definitions: ((type_name, ((field, field_type), ...)), ...).
+TypesKey = tuple[tuple[str, tuple[tuple[str, str], ...]], ...]
+
+
+def get_signable_message(msg: EIP712Message) -> SignableMessage:
+    """
+    Get the :class:`~eth_account.messages.SignableMessage` for an EIP-712 message.
+    This is equivalent to ``msg.signable_message`` except that the domain separator
+    and the encoded type strings are cached, so only the struct hash of the message
+    itself is computed on each call.
+    """
+    return SignableMessage(
+        HexBytes(1),
+        get_domain_separator(msg),
+        get_struct_hash(msg),
+    )
+
+
+def get_domain_separator(msg: EIP712Message) -> HexBytes:
+    """
+    Get the hashed EIP-712 domain of the given message.
+    """
+    domain = tuple(
+        (field, value) for field in EIP712_DOMAIN_FIELDS if (value := getattr(msg, f"_{field}_"))
+    )
+    try:
+        return _hash_domain(domain)
+    except TypeError:
+        # Unhashable domain values; can't cache.
+        return HexBytes(hash_domain(dict(domain)))
+
+
+def get_struct_hash(msg: EIP712Message) -> HexBytes:
+    """
+    Get the hashed EIP-712 message struct of the given message.
+    """
+    primary_type, types_key = _get_message_types(type(msg))  # type: ignore[arg-type]
+    types = _types_from_key(types_key)
+    data = {
+        field: _prepare_value(getattr(msg, field))
+        for field in _get_fields(type(msg))  # type: ignore[arg-type]
+        if not field.startswith("_") or not field.endswith("_")
+    }
+    return HexBytes(keccak(_encode_data(primary_type, types, types_key, data)))
+
+
+def clear_caches():
+    """
+    Clear all cached domain separators and type hashes.
+    """
+    _hash_domain.cache_clear()
+    _get_message_types.cache_clear()
+    _types_from_key.cache_clear()
+    _encode_type.cache_clear()
+    _hash_type.cache_clear()
+    _get_fields.cache_clear()
+
+
+@lru_cache(maxsize=256)
+def _hash_domain(domain: tuple[tuple[str, "Hashable"], ...]) -> HexBytes:
+    return HexBytes(hash_domain(dict(domain)))
+
+
+@lru_cache(maxsize=256)
+def _get_message_types(message_type: type[EIP712Message]) -> tuple[str, TypesKey]:
+    types = message_type.eip712_types()
+    types_key = tuple(
+        (name, tuple((f["name"], f["type"]) for f in type_fields))
+        for name, type_fields in sorted(types.items())
+    )
+    return get_primary_type(types), types_key
+
+
+@lru_cache(maxsize=256)
+def _types_from_key(types_key: TypesKey) -> dict[str, list[dict[str, str]]]:
+    return {
+        name: [{"name": field, "type": field_type} for field, field_type in type_fields]
+        for name, type_fields in types_key
+    }
+
+
+@lru_cache(maxsize=1024)
+def _encode_type(type_name: str, types_key: TypesKey) -> str:
+    return encode_type(type_name, _types_from_key(types_key))
+
+
+@lru_cache(maxsize=1024)
+def _hash_type(type_name: str, types_key: TypesKey) -> bytes:
+    return bytes(keccak(text=_encode_type(type_name, types_key)))
+
+
+@lru_cache(maxsize=256)
+def _get_fields(struct_type: type) -> tuple[str, ...]:
+    return tuple(fields(struct_type))
+
+
+def _prepare_value(value: Any) -> Any:
+    if isinstance(value, EIP712Type):
+        struct_fields = _get_fields(type(value))  # type: ignore[arg-type]
+        return {f: _prepare_value(getattr(value, f)) for f in struct_fields}
+    elif isinstance(value, dict):
+        return {k: _prepare_value(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_prepare_value(v) for v in value]
+
+    return value
+
+
+def _encode_data(type_name: str, types: dict, types_key: TypesKey, data: dict) -> bytes:
+    # NOTE: Every encoded field is a static, single-word ABI type, so the
+    #   encoded struct is the concatenation of the encoded fields.
+    encoded = [_hash_type(type_name, types_key)]
+    for field in types[type_name]:
+        field_type, value = _encode_field(
+            types, types_key, field["name"], field["type"], data.get(field["name"])
+        )
+        encoded.append(registry.get_encoder(field_type)(value))
+
+    return b"".join(encoded)
+
+
+def _encode_field(
+    types: dict, types_key: TypesKey, name: str, field_type: str, value: Any
+) -> tuple[str, Any]:
+    if field_type in types:
+        if value is None:
+            return "bytes32", b"\x00" * 32
+
+        return "bytes32", keccak(_encode_data(field_type, types, types_key, value))
+
+    elif is_array_type(field_type) and parse_core_array_type(field_type) in types:
+        if not isinstance(value, list):
+            raise ValueError(
+                f"Invalid value for field `{name}` of type `{field_type}`: "
+                f"expected array, got `{value}` of type `{type(value)}`"
+            )
+        elif not value:
+            return "bytes32", EMPTY_ARRAY_HASH
+
+        parent_type = parse_parent_array_type(field_type)
+        encoded = (
+            registry.get_encoder(item_type)(item_value)
+            for item_type, item_value in (
+                _encode_field(types, types_key, name, parent_type, item) for item in value
+            )
+        )
+        return "bytes32", keccak(b"".join(encoded))
+
+    # Arrays of basic types and basic types themselves don't need the type hashes.
+    return encode_field(types, name, field_type, value)
+
+
+__all__ = [
+    "clear_caches",
+    "get_domain_separator",
+    "get_signable_message",
+    "get_struct_hash",
+]
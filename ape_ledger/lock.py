@@ -0,0 +1,181 @@
+import fcntl
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from ape_ledger.exceptions import DeviceLockTimeoutError
+
+
+class DeviceLock:
+    """
+    A host-wide lock on the Ledger device, backed by a file lock.
+    Processes waiting for the device are served in the order they
+    started waiting. Within a process, the lock is shared: it is held
+    for as long as at least one device session is open. Holders see
+    waiting processes in :attr:`has_waiters`, to release it between requests.
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.path = path
+        self.queue_path = path.parent / f"{path.name}.queue"
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._count = 0
+        self._fd: Optional[int] = None
+
+    @property
+    def is_locked(self) -> bool:
+        """
+        ``True`` when this process holds the device.
+        """
+        return self._fd is not None
+
+    @property
+    def has_waiters(self) -> bool:
+        """
+        ``True`` when other processes are waiting for the device.
+        """
+        try:
+            tickets = list(self.queue_path.iterdir())
+        except FileNotFoundError:
+            return False
+
+        pid = str(os.getpid())
+        return any(t.name.split("-")[-1] != pid and _is_process_alive(t.name) for t in tickets)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Acquire the device, waiting in line behind other processes.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait. Defaults to the
+              lock's configured timeout.
+
+        Raises:
+            :class:`~ape_ledger.exceptions.DeviceLockTimeoutError`: When the device
+              is not released by other processes in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise DeviceLockTimeoutError(self._timeout_message(timeout))
+
+        try:
+            if self._count == 0:
+                self._acquire_file_lock(deadline, timeout)
+
+            self._count += 1
+        finally:
+            self._lock.release()
+
+    def release(self):
+        """
+        Release one hold of the device. The device is released for other
+        processes once every hold in this process is released.
+        """
+        with self._lock:
+            if self._count == 0:
+                return
+
+            self._count -= 1
+            if self._count == 0 and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> "DeviceLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _acquire_file_lock(self, deadline: Optional[float], timeout: Optional[float]):
+        self.queue_path.mkdir(parents=True, exist_ok=True)
+        ticket = self.queue_path / f"{time.time_ns():020d}-{os.getpid()}"
+        ticket.touch()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            while True:
+                if self._is_next_in_line(ticket):
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        pass
+                    else:
+                        self._fd = fd
+                        return
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeviceLockTimeoutError(self._timeout_message(timeout))
+
+                time.sleep(self.poll_interval)
+
+        except BaseException:
+            os.close(fd)
+            raise
+
+        finally:
+            ticket.unlink(missing_ok=True)
+
+    def _is_next_in_line(self, ticket: Path) -> bool:
+        for waiting in sorted(self.queue_path.iterdir()):
+            if waiting == ticket:
+                return True
+
+            elif _is_process_alive(waiting.name):
+                return False
+
+            # The waiting process died without removing its ticket.
+            waiting.unlink(missing_ok=True)
+
+        return True
+
+    def _timeout_message(self, timeout: Optional[float]) -> str:
+        return (
+            f"Timed out after {timeout} seconds waiting for the Ledger device. "
+            "Is another process using it?"
+        )
+
+
+def _is_process_alive(ticket_name: str) -> bool:
+    try:
+        pid = int(ticket_name.split("-")[-1])
+    except ValueError:
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user.
+        return True
+
+    return True
+
+
+_device_lock: Optional[DeviceLock] = None
+
+
+def get_device_lock() -> DeviceLock:
+    """
+    Get the device lock for this host, stored in the plugin data folder.
+    """
+    global _device_lock
+    if _device_lock is None:
+        # NOTE: Lazy import so the lock is usable without loading ape managers.
+        from ape.utils.basemodel import ManagerAccessMixin
+
+        config_manager = ManagerAccessMixin.config_manager
+        timeout = config_manager.get_config("ledger").lock_timeout
+        path = config_manager.DATA_FOLDER / "ledger" / "device.lock"
+        _device_lock = DeviceLock(path, timeout=timeout)
+
+    return _device_lock
+
+
+__all__ = ["DeviceLock", "get_device_lock"]
@@ -0,0 +1,325 @@
+import math
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Optional, Union
+
+# Seconds, from one APDU round trip up to waiting for the user.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}.")
+
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[dict[str, str]] = None) -> str:
+        pairs = [*zip(self.labelnames, values), *(extra or {}).items()]
+        if not pairs:
+            return ""
+
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError()
+
+
+class Counter(_Metric):
+    """
+    A value that only goes up, such as the number of signatures.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+
+        for key, value in values:
+            yield f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, such as the number of open device handles.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+
+        for key, value in values:
+            yield f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """
+    The distribution of observed values, such as request latencies, in buckets.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the count in each bucket (not cumulative), the sum and the count.
+        self._values: dict[LabelValues, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the seconds spent in the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels: str) -> int:
+        values = self._values.get(self._label_values(labels))
+        return values[2] if values else 0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._format_labels(key, {"le": _format_value(bound)})
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = self._format_labels(key, {"le": "+Inf"})
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{self._format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._format_labels(key)} {count}"
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """
+    Holds the plugin's metrics and writes them in the Prometheus text exposition format.
+    Subclass it and use :func:`~ape_ledger.metrics.set_registry` to report elsewhere,
+    e.g. to ``prometheus_client``.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames)
+
+    def register(self, metric: Metric):
+        """
+        Add a metric made outside the registry, such as one the plugin binds at import.
+        """
+        with self._lock:
+            if self._metrics.setdefault(metric.name, metric) is not metric:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str]):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, documentation, labelnames)
+
+            metric = self._metrics[name]
+
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric '{name}' is a {metric.type_name}.")
+
+        return metric
+
+    def collect(self) -> list[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def expose(self) -> str:
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = [line for metric in self.collect() for line in metric.expose()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+# The plugin's metrics, counted on hot paths, so made once and carried over to the registry in use.
+_signs_total = Counter(
+    "ape_ledger_signs_total", "Signatures made with the device, by kind.", ("kind",)
+)
+_errors_total = Counter(
+    "ape_ledger_errors_total", "Failed device requests, by error class.", ("error",)
+)
+_exchange_seconds = Histogram(
+    "ape_ledger_exchange_seconds",
+    "Device APDU round-trip latency, without the exchange waiting for the user to confirm.",
+    ("method",),
+)
+_confirmation_seconds = Histogram(
+    "ape_ledger_confirmation_seconds",
+    "Time waiting for the user to confirm a signature on the device, by kind.",
+    ("kind",),
+)
+_reconnects_total = Counter(
+    "ape_ledger_reconnects_total", "Times the device was re-opened after being closed."
+)
+_device_handles = Gauge("ape_ledger_device_handles", "Open device handles.")
+_address_cache_total = Counter(
+    "ape_ledger_address_cache_total",
+    "Derivation address cache lookups by result (hit or miss).",
+    ("result",),
+)
+_BOUND_METRICS: tuple[Metric, ...] = (
+    _signs_total,
+    _errors_total,
+    _exchange_seconds,
+    _confirmation_seconds,
+    _reconnects_total,
+    _device_handles,
+    _address_cache_total,
+)
+
+_registry = MetricsRegistry()
+for _metric in _BOUND_METRICS:
+    _registry.register(_metric)
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def set_registry(registry: MetricsRegistry):
+    """
+    Report the plugin's metrics to another registry.
+    """
+    global _registry
+    for metric in _BOUND_METRICS:
+        registry.register(metric)
+
+    _registry = registry
+
+
+def signs_total() -> Counter:
+    return _signs_total
+
+
+def errors_total() -> Counter:
+    return _errors_total
+
+
+def exchange_seconds() -> Histogram:
+    return _exchange_seconds
+
+
+def confirmation_seconds() -> Histogram:
+    return _confirmation_seconds
+
+
+def reconnects_total() -> Counter:
+    return _reconnects_total
+
+
+def device_handles() -> Gauge:
+    return _device_handles
+
+
+def address_cache_total() -> Counter:
+    return _address_cache_total
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "get_registry",
+    "set_registry",
+]
@@ -0,0 +1,107 @@
+import cProfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+from ape_ledger.tracing import span
+
+
+class Profiler:
+    """
+    Collects the time spent in each named phase of a command,
+    such as opening the device or rendering the prompt.
+    """
+
+    def __init__(self, use_cprofile: bool = False):
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.started_at = time.perf_counter()
+        self.stopped_at: Optional[float] = None
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        if self.cprofile:
+            self.cprofile.enable()
+
+    def record(self, name: str, elapsed: float):
+        self.timings[name].append(elapsed)
+
+    def stop(self):
+        if self.stopped_at is None:
+            self.stopped_at = time.perf_counter()
+            if self.cprofile:
+                self.cprofile.disable()
+
+    def dump_stats(self, path: Path):
+        """
+        Write the cProfile stats, e.g. for use with ``pstats`` or ``snakeviz``.
+        """
+        if not self.cprofile:
+            raise ValueError("cProfile was not enabled for this profiler.")
+
+        self.cprofile.dump_stats(str(path))
+
+    def report(self) -> str:
+        """
+        A table of the time spent in each phase, in the order first entered.
+        """
+        end = self.stopped_at if self.stopped_at is not None else time.perf_counter()
+        lines = [f"{'Phase':<24}{'Calls':>7}{'Total (ms)':>14}{'Mean (ms)':>14}"]
+        for name, timings in self.timings.items():
+            total = sum(timings) * 1000
+            lines.append(f"{name:<24}{len(timings):>7}{total:>14.2f}{total / len(timings):>14.2f}")
+
+        lines.append(f"{'wall time':<31}{(end - self.started_at) * 1000:>14.2f}")
+        return "\n".join(lines)
+
+
+class _Phase:
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.span = span(name)
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        self.span.__exit__(*args)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def phase(name: str):
+    """
+    A context manager timing a named phase, also traced as a span (see
+    :func:`~ape_ledger.tracing.span`). Does nothing unless profiling or tracing is enabled.
+
+    Usage example::
+
+        with phase("device.exchange"):
+            ...
+    """
+    return span(name) if _profiler is None else _Phase(_profiler, name)
+
+
+def enable_profiling(use_cprofile: bool = False) -> Profiler:
+    global _profiler
+    _profiler = Profiler(use_cprofile=use_cprofile)
+    return _profiler
+
+
+def disable_profiling() -> Optional[Profiler]:
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    if profiler:
+        profiler.stop()
+
+    return profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+__all__ = ["Profiler", "disable_profiling", "enable_profiling", "get_profiler", "phase"]
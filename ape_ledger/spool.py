@@ -0,0 +1,292 @@
+import fcntl
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+from uuid import uuid4
+
+from ape_ledger.exceptions import LedgerAccountException
+
+if TYPE_CHECKING:
+    from ape.api import TransactionAPI
+
+# Item statuses, each a folder of the spool.
+PENDING = "pending"
+SIGNED = "signed"
+FAILED = "failed"
+STATUSES = (PENDING, SIGNED, FAILED)
+
+
+class SpoolItem(NamedTuple):
+    id: str
+    """Sorts in the order items were added."""
+
+    alias: str
+    """The alias of the Ledger account to sign with."""
+
+    status: str
+    """``pending``, ``signed`` or ``failed``."""
+
+    transaction: dict
+    """The unsigned transaction."""
+
+    raw: Optional[str] = None
+    """The signed raw transaction, once signed."""
+
+    txn_hash: Optional[str] = None
+    """The signed transaction's hash, once signed."""
+
+    error: Optional[str] = None
+    """Why signing failed, if it did."""
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in self._asdict().items() if v is not None}
+
+
+class Spool:
+    """
+    A folder of unsigned transactions, added by any process and signed
+    later in one device session. Each item is a JSON file in the folder
+    of its status: ``pending``, ``signed`` or ``failed``.
+
+    Args:
+        path (Path): The spool folder.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def enqueue(self, alias: str, txn: "TransactionAPI") -> SpoolItem:
+        """
+        Add an unsigned transaction for the account with the given alias.
+        """
+        data = txn.model_dump(mode="json", by_alias=True, exclude={"signature"})
+        item = SpoolItem(
+            id=f"{time.time_ns():020d}-{uuid4().hex[:8]}",
+            alias=alias,
+            status=PENDING,
+            transaction=data,
+        )
+        self._write(item)
+        return item
+
+    def items(self, status: Optional[str] = None) -> Iterator[SpoolItem]:
+        """
+        Iterate over the items, in the order they were added.
+
+        Args:
+            status (Optional[str]): Only items with this status.
+        """
+        paths = [
+            path
+            for item_status in ((status,) if status else STATUSES)
+            for path in self.path.joinpath(item_status).glob("*.json")
+        ]
+        for path in sorted(paths, key=lambda p: p.name):
+            try:
+                yield SpoolItem(**json.loads(path.read_text()))
+            except FileNotFoundError:
+                # Moved while iterating.
+                continue
+
+    def retry_failed(self) -> int:
+        """
+        Mark the failed items as pending again.
+
+        Returns:
+            int: The number of items.
+        """
+        items = list(self.items(FAILED))
+        for item in items:
+            self._move(item, item._replace(status=PENDING, error=None))
+
+        return len(items)
+
+    def drain(
+        self, output: Path, verify_signer: Optional[bool] = None, workers: int = 4
+    ) -> Iterator[SpoolItem]:
+        """
+        Sign the pending items, holding the device for the whole session, and
+        append each signed raw transaction to ``output`` as a JSON line.
+        Each account's items are signed in the order they were added, and the
+        signer of each one is checked in a thread pool while the next one is signed.
+        If interrupted, draining again resumes with the items not yet written.
+
+        Args:
+            output (Path): The JSON-lines file to append to.
+            verify_signer (Optional[bool]): Check the signer of each transaction.
+              Defaults to the ``verify_signer`` config.
+            workers (int): The number of threads checking signers. Defaults to ``4``.
+
+        Returns:
+            Iterator[SpoolItem]: Each item, signed or failed, once done.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        lock_fd = os.open(self.path / "drain.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as err:
+                raise LedgerAccountException("The spool is already being drained.") from err
+
+            verify = _get_verify_signer() if verify_signer is None else verify_signer
+            done = _read_output_ids(output)
+            pending = []
+            for item in self.items(PENDING):
+                if item.id in done:
+                    # Written before an interruption.
+                    yield self._move(item, item._replace(**done[item.id]))
+                else:
+                    pending.append(item)
+
+            aliases = list(dict.fromkeys(item.alias for item in pending))
+            cut_short = output.is_file() and not _ends_with_newline(output)
+            with output.open("a") as stream, ThreadPoolExecutor(max_workers=workers) as pool:
+                if cut_short:
+                    # End the line cut short by a crash.
+                    stream.write("\n")
+
+                signing: deque[tuple[SpoolItem, Future]] = deque()
+
+                def finish(wait: bool = False) -> Iterator[SpoolItem]:
+                    # Write the results in order, once the head of the queue is checked.
+                    while signing and (wait or signing[0][1].done()):
+                        item, future = signing.popleft()
+                        try:
+                            result = future.result()
+                        except Exception as err:
+                            result = item._replace(status=FAILED, error=str(err))
+
+                        stream.write(f"{json.dumps(result.to_dict())}\n")
+                        stream.flush()
+                        os.fsync(stream.fileno())
+                        yield self._move(item, result)
+
+                # NOTE: Each account's client keeps the device open (and locked)
+                # until it is idle, so the items are signed in one device session.
+                for alias in aliases:
+                    account = None
+                    for item in (i for i in pending if i.alias == alias):
+                        try:
+                            account = account or _load_account(alias)
+                            signed = _sign(account, item)
+                        except Exception as err:
+                            future: Future = Future()
+                            future.set_exception(err)
+                        else:
+                            future = pool.submit(_signed_item, account, item, signed, verify)
+
+                        signing.append((item, future))
+                        yield from finish()
+
+                yield from finish(wait=True)
+
+        finally:
+            os.close(lock_fd)
+
+    def _write(self, item: SpoolItem):
+        folder = self.path / item.status
+        folder.mkdir(parents=True, exist_ok=True)
+        # Written in full before it appears in the folder.
+        temp_path = folder / f".{item.id}.tmp"
+        temp_path.write_text(json.dumps(item.to_dict()))
+        os.replace(temp_path, folder / f"{item.id}.json")
+
+    def _move(self, item: SpoolItem, new_item: SpoolItem) -> SpoolItem:
+        self._write(new_item)
+        if new_item.status != item.status:
+            self.path.joinpath(item.status, f"{item.id}.json").unlink(missing_ok=True)
+
+        return new_item
+
+
+def _load_account(alias: str) -> Any:
+    # NOTE: Lazy imports so the spool is usable without loading ape managers.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    from ape_ledger.accounts import LedgerAccount
+
+    account = ManagerAccessMixin.account_manager.load(alias)
+    if not isinstance(account, LedgerAccount):
+        raise LedgerAccountException(f"Account '{alias}' is not a Ledger account.")
+
+    return account
+
+
+def _sign(account: Any, item: SpoolItem) -> "TransactionAPI":
+    # NOTE: Lazy import so the spool is usable without loading ape managers.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    ecosystem = ManagerAccessMixin.network_manager.get_ecosystem("ethereum")
+    txn = ecosystem.create_transaction(**item.transaction)
+    signed = account.sign_transaction(txn, verify_signer=False)
+    if signed is None or not signed.signature:
+        raise LedgerAccountException("The transaction was not signed.")
+
+    return signed
+
+
+def _signed_item(
+    account: Any, item: SpoolItem, signed: "TransactionAPI", verify: bool
+) -> SpoolItem:
+    if verify:
+        account.check_signer(signed)
+
+    return item._replace(
+        status=SIGNED,
+        raw=f"0x{signed.serialize_transaction().hex()}",
+        txn_hash=signed.txn_hash.to_0x_hex(),
+    )
+
+
+def _get_verify_signer() -> bool:
+    # NOTE: Lazy import so the spool is usable without loading ape managers.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    return ManagerAccessMixin.config_manager.get_config("ledger").verify_signer
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as stream:
+        if stream.seek(0, os.SEEK_END) == 0:
+            return True
+
+        stream.seek(-1, os.SEEK_END)
+        return stream.read(1) == b"\n"
+
+
+def _read_output_ids(output: Path) -> dict[str, dict]:
+    # The results already written, by item ID, to resume after an interruption.
+    results: dict[str, dict] = {}
+    if not output.is_file():
+        return results
+
+    with output.open() as stream:
+        for line in stream:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash.
+                continue
+
+            if result.get("status") == SIGNED:
+                results[result["id"]] = {k: v for k, v in result.items() if k != "id"}
+
+    return results
+
+
+def get_spool() -> Spool:
+    """
+    Get the spool in the plugin data folder.
+    """
+    # NOTE: Lazy import so the spool is usable without loading ape managers.
+    from ape.utils.basemodel import ManagerAccessMixin
+
+    return Spool(ManagerAccessMixin.config_manager.DATA_FOLDER / "ledger" / "spool")
+
+
+__all__ = ["Spool", "SpoolItem", "get_spool"]
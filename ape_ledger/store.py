@@ -0,0 +1,337 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple, Optional
+from uuid import uuid4
+
+from eth_utils import to_checksum_address
+
+from ape_ledger.exceptions import LedgerAccountException
+from ape_ledger.lock import _is_process_alive
+
+# The SQLite store file, in the plugin data folder.
+ACCOUNTS_DB = "accounts.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    alias TEXT PRIMARY KEY NOT NULL,
+    address TEXT NOT NULL COLLATE NOCASE,
+    hdpath TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accounts_address ON accounts (address);
+CREATE INDEX IF NOT EXISTS accounts_hdpath ON accounts (hdpath);
+"""
+
+
+class AccountRecord(NamedTuple):
+    alias: str
+    address: str
+    hdpath: str
+
+
+class SqliteAccountStore:
+    """
+    Ledger accounts in a single SQLite file, rather than one JSON file per alias.
+    Aliases, addresses and HD paths are indexed, and bulk changes are transactional.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._writes = 0
+
+    @property
+    def version(self) -> tuple[int, int]:
+        """
+        Changes whenever the accounts change, in this process or another.
+        """
+        with self._lock:
+            (data_version,) = self._connection.execute("PRAGMA data_version").fetchone()
+            return data_version, self._writes
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM accounts").fetchone()
+
+        return count
+
+    def __contains__(self, alias: str) -> bool:
+        return self.get(alias) is not None
+
+    def aliases(self) -> list[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT alias FROM accounts ORDER BY alias").fetchall()
+
+        return [alias for (alias,) in rows]
+
+    def get(self, alias: str) -> Optional[AccountRecord]:
+        row = self._query_one("SELECT alias, address, hdpath FROM accounts WHERE alias = ?", alias)
+        return AccountRecord(*row) if row else None
+
+    def find(self, address: str) -> Optional[AccountRecord]:
+        """
+        Get the account with the given address (in any case).
+        """
+        row = self._query_one(
+            "SELECT alias, address, hdpath FROM accounts WHERE address = ? ORDER BY alias LIMIT 1",
+            address,
+        )
+        return AccountRecord(*row) if row else None
+
+    def iter_records(
+        self, alias_pattern: Optional[str] = None, hd_path_prefix: Optional[str] = None
+    ) -> Iterator[AccountRecord]:
+        """
+        Iterate over the accounts in alias order.
+
+        Args:
+            alias_pattern (Optional[str]): Only aliases matching this (SQLite ``GLOB``) pattern.
+            hd_path_prefix (Optional[str]): Only HD paths starting with this prefix.
+        """
+        query = "SELECT alias, address, hdpath FROM accounts"
+        conditions: list[str] = []
+        params: list[str] = []
+        if alias_pattern:
+            conditions.append("alias GLOB ?")
+            params.append(alias_pattern)
+
+        if hd_path_prefix:
+            # A range, rather than `LIKE`, to use the index.
+            conditions.append("hdpath >= ? AND hdpath < ?")
+            params.extend((hd_path_prefix, hd_path_prefix[:-1] + chr(ord(hd_path_prefix[-1]) + 1)))
+
+        if conditions:
+            query = f"{query} WHERE {' AND '.join(conditions)}"
+
+        with self._lock:
+            rows = self._connection.execute(f"{query} ORDER BY alias", params).fetchall()
+
+        for row in rows:
+            yield AccountRecord(*row)
+
+    def save(self, alias: str, address: str, hd_path: str):
+        self.save_many([AccountRecord(alias, address, hd_path)])
+
+    def save_many(self, records: Iterable[AccountRecord]):
+        """
+        Add or replace accounts, in one transaction.
+        """
+        rows = ((r.alias, to_checksum_address(r.address), str(r.hdpath)) for r in records)
+        self._write_many("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)", rows)
+
+    def delete(self, alias: str):
+        self.delete_many([alias])
+
+    def delete_many(self, aliases: Iterable[str]):
+        """
+        Delete accounts, in one transaction.
+        """
+        self._write_many("DELETE FROM accounts WHERE alias = ?", ((a,) for a in aliases))
+
+    def delete_all(self):
+        self._write_many("DELETE FROM accounts", [()])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _query_one(self, query: str, *params) -> Optional[tuple]:
+        with self._lock:
+            return self._connection.execute(query, params).fetchone()
+
+    def _write_many(self, query: str, rows: Iterable[tuple]):
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.executemany(query, rows)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+            finally:
+                self._writes += 1
+
+
+def migrate_json_accounts(
+    folder: Path, store: SqliteAccountStore, delete_files: bool = False
+) -> int:
+    """
+    Copy the accounts in the per-alias JSON file layout into the SQLite store,
+    in one transaction.
+
+    Args:
+        folder (Path): The folder with the account files.
+        store (SqliteAccountStore): The store to copy them to.
+        delete_files (bool): Delete the account files once copied. Defaults to ``False``.
+
+    Returns:
+        int: The number of accounts copied.
+    """
+    paths = sorted(folder.glob("*.json"))
+    records = []
+    for path in paths:
+        try:
+            data = json.loads(path.read_text())
+            records.append(AccountRecord(path.stem, data["address"], data["hdpath"]))
+        except (ValueError, KeyError) as err:
+            raise LedgerAccountException(f"Invalid account file '{path}': {err}") from err
+
+    store.save_many(records)
+    if delete_files:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    return len(records)
+
+
+def write_account_files(
+    folder: Path, records: Iterable[AccountRecord] = (), delete: Iterable[str] = ()
+) -> int:
+    """
+    Write and delete account files in the per-alias JSON file layout as one step,
+    which survives the process crashing part way. The new files are written to a
+    staging folder, which is renamed to commit the change before the files are
+    moved into place. A committed change is finished by the next call (or by
+    :func:`~ape_ledger.store.recover_account_files`); an uncommitted one is discarded.
+
+    Args:
+        folder (Path): The folder with the account files.
+        records (Iterable[AccountRecord]): The accounts to add or replace.
+        delete (Iterable[str]): The aliases of the accounts to delete.
+
+    Returns:
+        int: The number of accounts written.
+    """
+    recover_account_files(folder)
+    name = f"{uuid4().hex}-{os.getpid()}"
+    staging = folder / f".staging-{name}"
+    files = staging / "files"
+    files.mkdir(parents=True)
+    try:
+        written = set()
+        for record in records:
+            data = {"address": record.address, "hdpath": record.hdpath}
+            files.joinpath(f"{record.alias}.json").write_text(json.dumps(data))
+            written.add(record.alias)
+
+        # NOTE: Re-applying the change must not delete the files it wrote.
+        deleted = [a for a in dict.fromkeys(delete) if a not in written]
+        staging.joinpath("deleted").write_text("\n".join(deleted))
+
+        # NOTE: Its modification time, by the same clock as the account files', dates the
+        #  change. Files changed after it are kept when re-applying the change.
+        staging.joinpath("committed_at").touch()
+        committed = folder / f".committed-{name}"
+        staging.rename(committed)
+
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _apply_account_files(folder, committed)
+    return len(written)
+
+
+def recover_account_files(folder: Path):
+    """
+    Finish the committed changes of :func:`~ape_ledger.store.write_account_files`
+    interrupted by a crash, oldest first, and discard the uncommitted ones.
+    Account files changed after a change was committed are left as they are.
+    """
+    for path in sorted(folder.glob(".committed-*"), key=_get_committed_at):
+        _apply_account_files(folder, path)
+
+    for path in folder.glob(".staging-*"):
+        if not _is_process_alive(path.name):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _get_committed_at(committed: Path) -> int:
+    try:
+        return committed.joinpath("committed_at").stat().st_mtime_ns
+    except FileNotFoundError:
+        # Committed by an older version, so applied as it is.
+        return 0
+
+
+def _is_newer(path: Path, committed_at: int) -> bool:
+    try:
+        return committed_at > 0 and path.stat().st_mtime_ns > committed_at
+    except FileNotFoundError:
+        return False
+
+
+def _apply_account_files(folder: Path, committed: Path):
+    committed_at = _get_committed_at(committed)
+    for path in committed.joinpath("files").glob("*.json"):
+        target = folder / path.name
+        if _is_newer(target, committed_at):
+            # Saved after the change, e.g. while it was left unfinished by a crash.
+            continue
+
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
+            # Moved by another process finishing the same change.
+            continue
+
+    try:
+        deleted = committed.joinpath("deleted").read_text().splitlines()
+    except FileNotFoundError:
+        deleted = []
+
+    for alias in deleted:
+        target = folder / f"{alias}.json"
+        if not _is_newer(target, committed_at):
+            target.unlink(missing_ok=True)
+
+    shutil.rmtree(committed, ignore_errors=True)
+
+
+_stores: dict[Path, SqliteAccountStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_account_store(folder: Path) -> SqliteAccountStore:
+    """
+    Get the SQLite store in the given data folder, shared by the process.
+    A new store starts with a copy of the account files in the folder.
+    """
+    path = (folder / ACCOUNTS_DB).resolve()
+    with _stores_lock:
+        if path not in _stores:
+            is_new = not path.is_file()
+            store = SqliteAccountStore(path)
+            if is_new:
+                try:
+                    migrate_json_accounts(folder, store)
+                except BaseException:
+                    # Try again next time.
+                    store.close()
+                    path.unlink(missing_ok=True)
+                    raise
+
+            _stores[path] = store
+
+        return _stores[path]
+
+
+__all__ = [
+    "AccountRecord",
+    "SqliteAccountStore",
+    "get_account_store",
+    "migrate_json_accounts",
+    "recover_account_files",
+    "write_account_files",
+]
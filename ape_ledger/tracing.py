@@ -0,0 +1,214 @@
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+# Export formats.
+JSONL = "jsonl"
+COLLAPSED = "collapsed"
+FORMATS = (JSONL, COLLAPSED)
+
+
+class Span:
+    """
+    A timed, named step of a request, such as encoding a transaction
+    or a device exchange, with the step it is part of as its parent.
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        attributes: dict[str, Any],
+        parent: Optional["Span"] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.id = next(tracer._ids)
+        self.thread = threading.current_thread().name
+        self.start_ns = 0
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ns(self) -> int:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return end_ns - self.start_ns
+
+    @property
+    def stack(self) -> tuple[str, ...]:
+        """
+        The names of the span's ancestors and its own, outermost first.
+        """
+        names = []
+        span: Optional[Span] = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+
+        return tuple(reversed(names))
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "id": self.id,
+            "parent_id": self.parent.id if self.parent else None,
+            "thread": self.thread,
+            "start_us": (self.start_ns - self.tracer.started_at_ns) / 1000,
+            "duration_us": self.duration_ns / 1000,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self) -> "Span":
+        self.tracer._push(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+
+        self.tracer._pop(self)
+
+
+class _NullSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class Tracer:
+    """
+    Collects the finished spans of every thread. Spans opened while another
+    span of the same thread is open are its children.
+    """
+
+    def __init__(self):
+        self.started_at_ns = time.perf_counter_ns()
+        self.spans: list[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str, **attributes) -> Span:
+        stack = self._stack
+        return Span(self, name, attributes, parent=stack[-1] if stack else None)
+
+    @property
+    def _stack(self) -> list[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+
+        return self._local.stack
+
+    def _push(self, span: Span):
+        self._stack.append(span)
+
+    def _pop(self, span: Span):
+        stack = self._stack
+        if span in stack:
+            # Also drops children left open, e.g. by an abandoned generator.
+            while stack.pop() is not span:
+                continue
+
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self, path: Path, format: str = JSONL):
+        """
+        Write the finished spans to a file.
+
+        Args:
+            path (Path): The file to write.
+            format (str): ``jsonl``, a JSON object per span in the order they finished,
+              or ``collapsed``, stacks for flamegraph tools (see :func:`collapse`).
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        if format == JSONL:
+            lines = [json.dumps(span.to_dict(), default=str) for span in spans]
+        elif format == COLLAPSED:
+            lines = collapse(spans)
+        else:
+            raise ValueError(f"Unknown trace format '{format}'.")
+
+        path.write_text("".join(f"{line}\n" for line in lines))
+
+
+def collapse(spans: Iterable[Span]) -> list[str]:
+    """
+    Fold the spans into collapsed stacks (``parent;child <microseconds>``), the input
+    format of ``flamegraph.pl`` and speedscope. Each stack gets the time spent in
+    its spans outside of their children, summed.
+    """
+    spans = list(spans)
+    children_ns: dict[int, int] = defaultdict(int)
+    for span in spans:
+        if span.parent is not None:
+            children_ns[span.parent.id] += span.duration_ns
+
+    self_ns: dict[tuple[str, ...], int] = defaultdict(int)
+    for span in spans:
+        self_ns[span.stack] += max(span.duration_ns - children_ns[span.id], 0)
+
+    return [f"{';'.join(stack)} {ns // 1000}" for stack, ns in self_ns.items()]
+
+
+_NULL_SPAN = _NullSpan()
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **attributes):
+    """
+    A context manager timing a named step as a span, a child of the span open in the
+    same thread. Does nothing unless tracing is enabled.
+
+    Usage example::
+
+        with span("encode.to_bytes", field="data"):
+            ...
+    """
+    return _NULL_SPAN if _tracer is None else _tracer.span(name, **attributes)
+
+
+def enable_tracing() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing() -> Optional[Tracer]:
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+__all__ = [
+    "Span",
+    "Tracer",
+    "collapse",
+    "disable_tracing",
+    "enable_tracing",
+    "get_tracer",
+    "span",
+]
@@ -0,0 +1,123 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from ledgerblue.commException import CommException  # type: ignore
+
+from ape_ledger.exceptions import LedgerAccountException
+
+# The default exchange timeout of ledgerblue dongles.
+DEFAULT_EXCHANGE_TIMEOUT = 20000
+
+
+class RecordingTransport:
+    """
+    Wraps a dongle, writing every APDU exchange with the device to a file
+    so it can be played back later with :class:`~ape_ledger.transport.ReplayTransport`.
+    Each exchange is a JSON line with the hex request, the hex response (or the
+    error status) and the time the device took to answer, in seconds.
+    """
+
+    def __init__(self, dongle: Any, path: Path):
+        self.dongle = dongle
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a")
+
+    def exchange(self, apdu: bytes, timeout: int = DEFAULT_EXCHANGE_TIMEOUT) -> bytearray:
+        record: dict = {"apdu": bytes(apdu).hex()}
+        start = time.perf_counter()
+        try:
+            response = self.dongle.exchange(apdu, timeout=timeout)
+        except CommException as err:
+            record.update(error=err.message, sw=err.sw)
+            raise
+
+        else:
+            record["response"] = bytes(response).hex()
+            return response
+
+        finally:
+            record["elapsed"] = round(time.perf_counter() - start, 6)
+            self._file.write(f"{json.dumps(record)}\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+        self.dongle.close()
+
+
+class ReplayTransport:
+    """
+    Answers APDU exchanges from a file written by
+    :class:`~ape_ledger.transport.RecordingTransport`, without a device.
+
+    Args:
+        path (Path): The recording.
+        realtime (bool): Set to ``True`` to wait as long as the device did
+          for each response. Defaults to answering immediately.
+        strict (bool): Raise when a request differs from the recorded one.
+          Defaults to ``True``.
+    """
+
+    def __init__(self, path: Path, realtime: bool = False, strict: bool = True):
+        self.path = path
+        self.realtime = realtime
+        self.strict = strict
+        self.exchanges = [json.loads(line) for line in path.read_text().splitlines() if line]
+        self.position = 0
+
+    @property
+    def remaining(self) -> int:
+        """
+        The number of recorded exchanges not yet played back.
+        """
+        return len(self.exchanges) - self.position
+
+    def rewind(self):
+        """
+        Play the recording again from the start.
+        """
+        self.position = 0
+
+    def exchange(self, apdu: bytes, timeout: Optional[int] = None) -> bytearray:
+        if self.remaining <= 0:
+            raise LedgerAccountException(f"No recorded exchanges left in '{self.path}'.")
+
+        record = self.exchanges[self.position]
+        if self.strict and record["apdu"] != bytes(apdu).hex():
+            raise LedgerAccountException(
+                f"APDU #{self.position} does not match the recording in '{self.path}'. "
+                f"Expected '{record['apdu']}', got '{bytes(apdu).hex()}'."
+            )
+
+        self.position += 1
+        if self.realtime:
+            time.sleep(record["elapsed"])
+
+        if "error" in record:
+            raise CommException(record["error"], record["sw"])
+
+        return bytearray.fromhex(record["response"])
+
+    def close(self):
+        pass
+
+
+_replay_transports: dict[Path, ReplayTransport] = {}
+
+
+def get_replay_transport(path: Path, realtime: bool = False) -> ReplayTransport:
+    """
+    Get the replay transport for a recording. It is shared by all device
+    clients in the process, so exchanges play back in the recorded order.
+    """
+    path = Path(path).expanduser().resolve()
+    if path not in _replay_transports:
+        _replay_transports[path] = ReplayTransport(path, realtime=realtime)
+
+    return _replay_transports[path]
+
+
+__all__ = ["RecordingTransport", "ReplayTransport", "get_replay_transport"]
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from ape_ledger.derivation import AddressCache, AddressDeriver
+
+if TYPE_CHECKING:
+    from ape_ledger.store import AccountRecord
+
+# Verification statuses.
+VERIFIED = "verified"
+MISMATCH = "mismatch"
+SKIPPED = "skipped"
+
+
+class VerificationResult(NamedTuple):
+    alias: str
+    address: str
+    hdpath: str
+
+    status: str
+    """``verified``, ``mismatch``, or ``skipped`` when verified recently enough."""
+
+    verified_at: Optional[float] = None
+    """When the account last matched the device, as a UNIX timestamp."""
+
+    device_address: Optional[str] = None
+    """The address the device derives for the HD path, when checked."""
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in self._asdict().items() if v is not None}
+
+
+class VerificationLog:
+    """
+    When each account last matched the device. An entry only counts
+    while the account's address and HD path are unchanged.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries: Optional[dict[str, dict]] = None
+
+    @property
+    def entries(self) -> dict[str, dict]:
+        with self._lock:
+            if self._entries is None:
+                try:
+                    self._entries = json.loads(self.path.read_text())
+                except (FileNotFoundError, ValueError):
+                    self._entries = {}
+
+            return self._entries
+
+    def get(self, record: "AccountRecord") -> Optional[float]:
+        entry = self.entries.get(record.alias)
+        if (
+            entry
+            and entry.get("address", "").lower() == record.address.lower()
+            and entry.get("hdpath") == record.hdpath
+        ):
+            return entry.get("verified_at")
+
+        return None
+
+    def set(self, record: "AccountRecord", verified_at: float):
+        with self._lock:
+            self.entries[record.alias] = {
+                "address": record.address,
+                "hdpath": record.hdpath,
+                "verified_at": verified_at,
+            }
+
+    def remove(self, alias: str):
+        with self._lock:
+            self.entries.pop(alias, None)
+
+    def save(self):
+        with self._lock:
+            if self._entries is None:
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._entries))
+
+
+_verification_log: Optional[VerificationLog] = None
+
+
+def get_verification_log() -> VerificationLog:
+    """
+    Get the verification log stored in the plugin data folder.
+    """
+    global _verification_log
+    if _verification_log is None:
+        # NOTE: Lazy import so verification is usable without loading ape managers.
+        from ape.utils.basemodel import ManagerAccessMixin
+
+        path = ManagerAccessMixin.config_manager.DATA_FOLDER / "ledger" / "cache" / "verified.json"
+        _verification_log = VerificationLog(path)
+
+    return _verification_log
+
+
+def verify_accounts(
+    records: Iterable["AccountRecord"],
+    max_age: Optional[float] = None,
+    log: Optional[VerificationLog] = None,
+) -> Iterator[VerificationResult]:
+    """
+    Check that the address of each account is the one the connected device derives
+    for its HD path, in one device session. Accounts sharing an HD path template are
+    derived in software from one public key where the path allows (see
+    :class:`~ape_ledger.derivation.AddressDeriver`), but never from the address cache,
+    which cannot tell a different device (or seed) apart.
+
+    Accounts verified within ``max_age`` seconds are skipped, except for one, which is
+    checked again to notice a different device. If it no longer matches, every account
+    is checked.
+
+    Args:
+        records (Iterable[AccountRecord]): The accounts to check.
+        max_age (Optional[float]): Check accounts verified longer ago than this many
+          seconds again. Defaults to ``None``, only checking the accounts not yet verified.
+        log (Optional[VerificationLog]): The verification log. Defaults to the plugin's log.
+
+    Returns:
+        Iterator[VerificationResult]: The result of each account, in the given order.
+    """
+    log = log or get_verification_log()
+    records = list(records)
+    now = time.time()
+    last_verified = {r.alias: log.get(r) for r in records}
+
+    def is_due(record: "AccountRecord") -> bool:
+        verified_at = last_verified[record.alias]
+        return verified_at is None or (max_age is not None and now - verified_at > max_age)
+
+    # NOTE: Derived addresses are only cached for this session.
+    cache = AddressCache()
+    derivers: dict[str, AddressDeriver] = {}
+
+    def check(record: "AccountRecord") -> VerificationResult:
+        template, index = _split_account_path(record.hdpath)
+        if template not in derivers:
+            derivers[template] = AddressDeriver(template, cache=cache)
+
+        device_address = derivers[template].get_address(index)
+        if device_address.lower() != record.address.lower():
+            log.remove(record.alias)
+            return VerificationResult(*record, MISMATCH, device_address=device_address)
+
+        verified_at = time.time()
+        log.set(record, verified_at)
+        return VerificationResult(*record, VERIFIED, verified_at, device_address)
+
+    try:
+        checked: dict[str, VerificationResult] = {}
+        check_all = False
+        if sentinel := next((r for r in records if not is_due(r)), None):
+            checked[sentinel.alias] = check(sentinel)
+            check_all = checked[sentinel.alias].status == MISMATCH
+
+        for record in records:
+            if record.alias in checked:
+                yield checked[record.alias]
+            elif check_all or is_due(record):
+                yield check(record)
+            else:
+                yield VerificationResult(*record, SKIPPED, last_verified[record.alias])
+
+    finally:
+        log.save()
+
+
+def _split_account_path(hd_path: str) -> tuple[str, int]:
+    # The template with the last node as the account node, and its index.
+    *parent_nodes, last_node = hd_path.split("/")
+    account_node = "{x}'" if last_node.endswith("'") else "{x}"
+    return "/".join([*parent_nodes, account_node]), int(last_node.rstrip("'"))
+
+
+__all__ = [
+    "VerificationLog",
+    "VerificationResult",
+    "get_verification_log",
+    "verify_accounts",
+]
@@ -1,16 +1,31 @@
+import gc
 import json
+import os
+import pickle
+import time
+import tracemalloc
 from typing import TYPE_CHECKING, Optional, cast
 
 import pytest
 from ape import networks
+from ape.types import TransactionSignature
 from ape.utils import create_tempdir
 from ape_ethereum.ecosystem import DynamicFeeTransaction, StaticFeeTransaction
+from ape_ethereum.transactions import AccessList
 from eip712.messages import EIP712Message, EIP712Type
-from eth_account.messages import SignableMessage
+from eth_account import Account
+from eth_account.messages import SignableMessage, encode_defunct
 from eth_pydantic_types import HexBytes
+from ledgereth.utils import coerce_access_list
 
-from ape_ledger.accounts import AccountContainer, LedgerAccount
-from ape_ledger.exceptions import LedgerSigningError
+from ape_ledger.accounts import AccountContainer, LedgerAccount, prepare_signing_request
+from ape_ledger.client import LedgerDeviceClient
+from ape_ledger.exceptions import LedgerAccountException, LedgerSigningError
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.store import _stores
+from ape_ledger.tracing import disable_tracing, enable_tracing
+
+from .test_client import SlowDongle
 
 if TYPE_CHECKING:
     from ape.api import TransactionAPI
@@ -121,11 +136,200 @@ class TestAccountContainer:
         account_path = temp_dir / "ledger" / f"{alias}.json"
         assert_account(account_path, expected_hdpath=hd_path)
 
+    def test_address_lookups(self, alias, address, hd_path, account_addresses):
+        container = AccountContainer(account_type=LedgerAccount)
+        container.save_account(alias, address, hd_path)
+        assert address in container
+        assert container[address].alias == alias
+        assert account_addresses[1] not in container
+        with pytest.raises(KeyError):
+            _ = container[account_addresses[1]]
+
+    def test_iter_records(self, mocker, alias, address, hd_path):
+        container = AccountContainer(account_type=LedgerAccount)
+        container.save_account(alias, address, hd_path)
+        container.save_account(f"{alias}-other", address, "m/44'/60'/1'/0/0")
+        model = mocker.patch("ape_ledger.accounts.LedgerAccount")
+
+        records = list(
+            container.iter_records(alias_pattern=f"{alias}*", hd_path_prefix="m/44'/60'/{")
+        )
+        assert records == [{"alias": alias, "address": address, "hdpath": hd_path}]
+        assert not model.called
+        container.delete_account(f"{alias}-other")
+
+    def test_accounts_identity_map(self, alias, account_addresses, hd_path):
+        # NOTE: An address no other test account uses.
+        address = account_addresses[5]
+        container = AccountContainer(account_type=LedgerAccount)
+        container.save_account(alias, address, hd_path)
+        account = next(a for a in container.accounts if a.alias == alias)
+
+        assert next(a for a in container.accounts if a.alias == alias) is account
+        assert container[address] is account
+
+        # Accounts no longer in use are not kept.
+        del account
+        gc.collect()
+        assert container._identity_map.get(container.data_folder / f"{alias}.json") is None
+
+    @pytest.fixture
+    def bulk_container(self):
+        container = AccountContainer(name="ledger-bulk", account_type=LedgerAccount)
+        yield container
+        for path in container.data_folder.iterdir():
+            path.unlink()
+
+    def test_bulk_save_and_delete(self, bulk_container, alias, account_addresses, hd_path):
+        container = bulk_container
+        records = [
+            {
+                "alias": f"{alias}-{i}",
+                "address": account_addresses[i],
+                "hdpath": hd_path.format(x=i),
+            }
+            for i in range(3)
+        ]
+        assert container.bulk_save(iter(records)) == 3
+        assert sorted(container.iter_records(), key=lambda r: r["alias"]) == records
+        account = container[account_addresses[0]]
+
+        container.bulk_delete(r["alias"] for r in records[:2])
+        assert list(container.aliases) == [records[2]["alias"]]
+        assert container._identity_map.get(account.account_file_path) is None
+
+    def test_bulk_save_invalid(self, bulk_container, alias, address, hd_path):
+        container = bulk_container
+        records = [
+            {"alias": alias, "address": address, "hdpath": hd_path},
+            {"alias": f"{alias}-2", "address": address, "hdpath": "44'/60'"},
+        ]
+        with pytest.raises(LedgerAccountException, match="Invalid account"):
+            container.bulk_save(records)
+
+        assert len(container) == 0
+
+    @pytest.mark.parametrize("warm_up", (True, False))
+    def test_first_use_warms_up_device(self, mocker, alias, address, hd_path, warm_up):
+        container = AccountContainer(account_type=LedgerAccount)
+        container.save_account(alias, address, hd_path)
+        mocker.patch.object(container.config_manager.get_config("ledger"), "warm_up", warm_up)
+        spy = mocker.patch.object(LedgerAccount, "warm_up")
+
+        # Loading the account does not open the device.
+        account = next(a for a in container.accounts if a.alias == alias)
+        assert spy.call_count == 0
+
+        account.prepare_message_request(encode_defunct(text="hello"))
+        account.prepare_message_request(encode_defunct(text="hello"))
+        assert spy.call_count == int(warm_up)
+
+
+class TestSqliteAccountStore:
+    @pytest.fixture
+    def container(self, mocker, create_account, hd_path, account_addresses):
+        container = AccountContainer(name="ledger-sqlite", account_type=LedgerAccount)
+        # An account file from before switching to the SQLite store.
+        create_account(container.data_folder / "migrated.json", hd_path)
+        mocker.patch.object(
+            container.config_manager.get_config("ledger"), "account_store", "sqlite"
+        )
+        yield container
+        _stores.pop(container._store.path).close()
+        for path in container.data_folder.iterdir():
+            path.unlink()
+
+    def test_accounts(self, container, alias, account_addresses, hd_path):
+        container.save_account(alias, account_addresses[1], hd_path.format(x=1))
+        assert sorted(container.aliases) == [alias, "migrated"]
+        assert len(container) == 2
+        assert container[account_addresses[1]].alias == alias
+        assert account_addresses[1] in container
+        assert account_addresses[2] not in container
+
+        account = next(a for a in container.accounts if a.alias == alias)
+        assert account.address == account_addresses[1]
+        assert str(account.hdpath) == hd_path.format(x=1)
+        assert [r["alias"] for r in container.iter_records(alias_pattern="mig*")] == ["migrated"]
+
+        # Only the store changed.
+        assert not container.data_folder.joinpath(f"{alias}.json").exists()
+
+    def test_address_cached_until_store_changes(self, container, alias, account_addresses):
+        container.save_account(alias, account_addresses[1], "m/44'/60'/1'/0/0")
+        account = next(a for a in container.accounts if a.alias == alias)
+        assert account.address == account_addresses[1]
+
+        container.save_account(alias, account_addresses[2], "m/44'/60'/2'/0/0")
+        assert account.address == account_addresses[2]
+
+    def test_delete_account(self, container, alias, account_addresses):
+        container.save_account(alias, account_addresses[1], "m/44'/60'/1'/0/0")
+        container.delete_account(alias)
+        assert list(container.aliases) == ["migrated"]
+
+    def test_bulk_save_and_delete(self, container, alias, account_addresses, hd_path):
+        records = [
+            {
+                "alias": f"{alias}-{i}",
+                "address": account_addresses[i],
+                "hdpath": hd_path.format(x=i),
+            }
+            for i in range(3)
+        ]
+        assert container.bulk_save(records) == 3
+        assert list(container.iter_records(alias_pattern=f"{alias}-*")) == records
+
+        container.bulk_delete([*container.aliases])
+        assert len(container) == 0
+
 
 class TestLedgerAccount:
     def test_address_returns_address_from_file(self, account, address):
         assert account.address.lower() == address.lower()
 
+    def test_address_cached_until_file_changes(self, mocker, account, account_addresses):
+        assert account.address == account_addresses[0]
+        spy = mocker.spy(json, "loads")
+        assert account.address == account_addresses[0]
+        assert spy.call_count == 0
+
+        data = {**account.account_file, "address": account_addresses[1]}
+        account.account_file_path.write_text(json.dumps(data))
+        stat = account.account_file_path.stat()
+        os.utime(account.account_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert account.address == account_addresses[1]
+
+    def test_warm_up_overlaps_provider(self, mocker, account, hd_path, address):
+        mocker.patch.object(account.config_manager.get_config("ledger"), "warm_up", True)
+        mocker.patch("ape_ledger.accounts.get_daemon_client", return_value=None)
+        client = LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)))
+        mocker.patch("ape_ledger.accounts.get_device", return_value=client)
+        times = {}
+
+        def open_dongle(*args, **kwargs):
+            times["device"] = (time.monotonic(), time.monotonic() + 0.2)
+            time.sleep(0.2)
+            return SlowDongle(address)
+
+        def estimate(txn, **kwargs):
+            times["provider"] = (time.monotonic(), time.monotonic() + 0.2)
+            time.sleep(0.2)
+            return txn
+
+        mocker.patch("ape_ledger.client.get_dongle", side_effect=open_dongle)
+        mocker.patch("ape.api.address.BaseAddress.prepare_transaction", side_effect=estimate)
+        try:
+            account.prepare_transaction(create_static_fee_txn())
+
+            # The device opened while the provider estimated gas.
+            assert client.dongle is not None
+            device_start, device_end = times["device"]
+            provider_start, provider_end = times["provider"]
+            assert device_start < provider_end and provider_start < device_end
+        finally:
+            client.close()
+
     def test_hdpath_returns_address_from_file(self, account, hd_path):
         assert account.hdpath.path == hd_path
 
@@ -135,7 +339,7 @@ class TestLedgerAccount:
         )
         v, r, s = account.sign_message(message)
         assert (v, int(r.hex(), 16), int(s.hex(), 16)) == msg_signature
-        mock_device.sign_message.assert_called_once_with(message.body)
+        mock_device.sign_message.assert_called_once_with(message.body, timeout=None)
         output = capsys.readouterr()
         assert str(message) in output.out
         assert "Please follow the prompts on your device." in output.out
@@ -148,6 +352,18 @@ class TestLedgerAccount:
         assert repr(message).replace("\n", "") in output.out.replace("\n", "")
         assert "Please follow the prompts on your device." in output.out
 
+    def test_sign_message_eip712_package(self, account, mock_device, msg_signature):
+        v, r, s = account.sign_message(TEST_TYPED_MESSAGE)
+        assert (v, int(r.hex(), 16), int(s.hex(), 16)) == msg_signature
+        expected = TEST_TYPED_MESSAGE.signable_message
+        mock_device.sign_typed_data.assert_called_once_with(
+            HexBytes(expected.header), HexBytes(expected.body), timeout=None
+        )
+
+    def test_sign_message_timeout(self, account, mock_device):
+        account.sign_message("hello", timeout=5)
+        assert mock_device.sign_message.call_args.kwargs["timeout"] == 5
+
     def test_sign_message_unsupported(self, account, capsys):
         unsupported_version = b"X"
         message = SignableMessage(
@@ -174,9 +390,211 @@ class TestLedgerAccount:
         ),
     )
     def test_sign_transaction(self, txn, mock_device, account, capsys, tx_signature):
-        actual = account.sign_transaction(txn)
+        # NOTE: The mock signature is for another transaction.
+        actual = account.sign_transaction(txn, verify_signer=False)
         v, r, s = actual.signature
         assert (v, int(r.hex(), 16), int(s.hex(), 16)) == tx_signature
         output = capsys.readouterr()
         assert str(txn) in output.out
         assert "Please follow the prompts on your device." in output.out
+
+
+class TestCheckSigner:
+    @pytest.fixture
+    def sign_as(self, mock_device):
+        def fn(signer):
+            def sign(txn_dict, **kwargs):
+                data = {
+                    "chainId": txn_dict["chain_id"],
+                    "nonce": txn_dict["nonce"],
+                    "gas": txn_dict["gas"],
+                    "value": txn_dict["amount"],
+                    "data": txn_dict["data"],
+                    "to": txn_dict["destination"],
+                }
+                if "gas_price" in txn_dict:
+                    data["gasPrice"] = txn_dict["gas_price"]
+                else:
+                    data["maxFeePerGas"] = txn_dict["max_fee_per_gas"]
+                    data["maxPriorityFeePerGas"] = txn_dict["max_priority_fee_per_gas"]
+
+                signed = Account.sign_transaction(data, signer.private_key)
+                return signed.v, signed.r, signed.s
+
+            mock_device.sign_transaction.side_effect = sign
+
+        return fn
+
+    @pytest.mark.parametrize("create_txn", (create_static_fee_txn, create_dynamic_fee_txn))
+    def test_sign_transaction(self, account, account_0, sign_as, create_txn):
+        sign_as(account_0)
+        txn = create_txn(receiver=BOB_ADDRESS)
+        txn.sender = account.address
+        signed = account.sign_transaction(txn)
+        assert signed.signature is not None
+
+        # Signed for the transaction's chain, not mainnet.
+        assert signed.chain_id == 579875
+        assert signed.serialize_transaction()
+
+    def test_wrong_signer(self, account, test_accounts, sign_as):
+        sign_as(test_accounts[1])
+        txn = create_dynamic_fee_txn(receiver=BOB_ADDRESS)
+        with pytest.raises(LedgerSigningError, match=f"signed by '{test_accounts[1].address}'"):
+            account.sign_transaction(txn)
+
+        assert txn.signature is None
+
+    def test_wrong_signer_not_checked(self, account, test_accounts, sign_as):
+        sign_as(test_accounts[1])
+        txn = create_dynamic_fee_txn(receiver=BOB_ADDRESS)
+        assert account.sign_transaction(txn, verify_signer=False).signature is not None
+
+    def test_sign_transactions(self, mocker, account, account_0, sign_as):
+        sign_as(account_0)
+        spy = mocker.spy(LedgerAccount, "check_signer")
+        txns = [create_dynamic_fee_txn(receiver=BOB_ADDRESS) for _ in range(3)]
+        for nonce, txn in enumerate(txns):
+            txn.nonce = nonce
+
+        signed = list(account.sign_transactions(txns, workers=2))
+        assert [t.nonce for t in signed] == [0, 1, 2]
+        assert spy.call_count == 3
+
+    def test_sign_transactions_wrong_signer(self, account, test_accounts, sign_as):
+        sign_as(test_accounts[1])
+        txns = [create_dynamic_fee_txn(receiver=BOB_ADDRESS) for _ in range(2)]
+        with pytest.raises(LedgerSigningError, match="signed by"):
+            list(account.sign_transactions(txns))
+
+    def test_sign_transaction_traced(self, account, account_0, sign_as):
+        sign_as(account_0)
+        txn = create_dynamic_fee_txn(receiver=BOB_ADDRESS)
+        tracer = enable_tracing()
+        try:
+            account.sign_transaction(txn)
+        finally:
+            disable_tracing()
+
+        stacks = {";".join(s.stack) for s in tracer.spans}
+        assert stacks == {
+            "sign_transaction",
+            "sign_transaction;encode",
+            "sign_transaction;encode;encode.to_bytes",
+            "sign_transaction;describe",
+            "sign_transaction;echo",
+            "sign_transaction;echo;render",
+            "sign_transaction;signature",
+            "sign_transaction;verify",
+        }
+        assert tracer.spans[-1].attributes == {"alias": account.alias, "type": 2}
+
+
+class TestSigningRequest:
+    def test_message(self, account, mock_device, msg_signature, capsys):
+        request = account.prepare_message_request("hello")
+        assert request.kind == "message"
+        assert request.hdpath == account.hdpath.path
+        assert request.description == "hello"
+        assert pickle.loads(pickle.dumps(request)) == request
+
+        # Prepared without the device, shown when submitted.
+        assert not mock_device.sign_message.called
+        assert capsys.readouterr().out == ""
+
+        v, r, s = account.submit(request, timeout=5)
+        assert (v, int(r.hex(), 16), int(s.hex(), 16)) == msg_signature
+        mock_device.sign_message.assert_called_once_with(request.payload[0], timeout=5)
+        assert "hello" in capsys.readouterr().out
+
+    def test_typed_data(self, account, mock_device):
+        request = account.prepare_message_request(TEST_TYPED_MESSAGE)
+        assert request.kind == "typed_data"
+        account.submit(request)
+        expected = TEST_TYPED_MESSAGE.signable_message
+        mock_device.sign_typed_data.assert_called_once_with(
+            HexBytes(expected.header), HexBytes(expected.body), timeout=None
+        )
+
+    def test_transaction(self, account, mock_device, tx_signature):
+        txn = create_dynamic_fee_txn(receiver=BOB_ADDRESS)
+        txn.access_list = [AccessList(address=BOB_ADDRESS, storageKeys=[(1).to_bytes(32, "big")])]
+        request = account.prepare_transaction_request(txn)
+        assert request.kind == "transaction"
+        assert pickle.loads(pickle.dumps(request)) == request
+        assert not mock_device.sign_transaction.called
+
+        signature = account.submit(request)
+        assert isinstance(signature, TransactionSignature)
+        assert (signature.v, int(signature.r.hex(), 16), int(signature.s.hex(), 16)) == (
+            tx_signature
+        )
+        txn_dict = mock_device.sign_transaction.call_args.args[0]
+        assert txn_dict["data"] == TEST_TXN_DATA
+        assert txn_dict["chain_id"] == 579875
+        assert coerce_access_list(txn_dict["access_list"]) == [
+            (bytes.fromhex(BOB_ADDRESS[2:]), [1])
+        ]
+
+    def test_transaction_left_unchanged(self, account):
+        txn = create_dynamic_fee_txn(receiver=BOB_ADDRESS)
+        txn.chain_id = 0
+        before = txn.model_dump()
+        request = account.prepare_transaction_request(txn)
+        assert txn.model_dump() == before
+        assert dict(request.payload)["chain_id"] == 1
+
+        # Signing sets the chain ID it signed for, along with the signature.
+        signed = account.sign_transaction(txn, verify_signer=False)
+        assert signed.chain_id == 1
+        assert signed.signature is not None
+
+    def test_other_account(self, account, hd_path):
+        request = prepare_signing_request("hello", hd_path.format(x=1))
+        with pytest.raises(LedgerSigningError, match="The request is for the account at"):
+            account.submit(request)
+
+    def test_sign_transactions_prepares_ahead(self, mocker, account, mock_device):
+        spy = mocker.spy(LedgerAccount, "prepare_transaction_request")
+        txns = [create_dynamic_fee_txn(receiver=BOB_ADDRESS) for _ in range(3)]
+        signed = account.sign_transactions(txns, verify_signer=False)
+
+        # The second is prepared before the first is signed.
+        next(signed)
+        assert spy.call_count == 2
+        assert mock_device.sign_transaction.call_count == 1
+        assert len(list(signed)) == 2
+
+
+@pytest.mark.benchmark
+def test_benchmark_accounts_memory(address, hd_path):
+    count = 10_000
+    container = AccountContainer(name="ledger-benchmark", account_type=LedgerAccount)
+    container.data_folder.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        container.save_account(f"account-{i}", address, hd_path)
+
+    try:
+        accounts = list(container.accounts)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            again = list(container.accounts)
+            _, reused_peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fresh = [
+                LedgerAccount(container=container, account_file_path=a.account_file_path)
+                for a in accounts
+            ]
+            _, fresh_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(again) == len(fresh) == count
+        assert all(a is b for a, b in zip(accounts, again))
+        # Re-enumerating only allocates the file paths, not new models.
+        assert reused_peak < fresh_peak / 2
+
+    finally:
+        for i in range(count):
+            container.delete_account(f"account-{i}")
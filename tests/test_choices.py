@@ -1,11 +1,21 @@
+import time
+
 import pytest
 
 from ape_ledger.choices import AddressPromptChoice
+from ape_ledger.derivation import AddressCache
 
 
 @pytest.fixture(autouse=True)
 def patch_device(device_factory):
-    return device_factory("choices")
+    return device_factory("derivation")
+
+
+@pytest.fixture(autouse=True)
+def cache(mocker, tmp_path, address):
+    cache = AddressCache(tmp_path / "addresses.json", fingerprint=address)
+    mocker.patch("ape_ledger.derivation.get_address_cache", return_value=cache)
+    return cache
 
 
 class TestAddressPromptChoice:
@@ -26,3 +36,155 @@ class TestAddressPromptChoice:
         address, hdpath = choices.get_user_selected_account()
         assert address == address
         assert str(hdpath) == f"m/44'/60'/{choices._choice_index + choices._index_offset}'/0/0"
+
+    def test_print_choices_with_activity(self, mocker, capsys, connection, hd_path, address):
+        choices = AddressPromptChoice(hd_path, page_size=2, provider=connection)
+        choices._load_choices()
+        choices.print_choices()
+
+        output = capsys.readouterr().out
+        balance = connection.get_balance(address) / 10**18
+        assert f"0. {address}" in output
+        assert f"{balance:.6f} ETH" in output
+        assert "nonce" in output
+
+    def test_adaptive_page_size(self, hd_path, account_addresses):
+        def slow_source(index):
+            time.sleep(0.02)
+            return account_addresses[index % len(account_addresses)]
+
+        choices = AddressPromptChoice(hd_path, sources=[slow_source], page_time=0.2)
+        choices._load_choices()
+        assert len(choices.choices) == AddressPromptChoice.DEFAULT_PAGE_SIZE
+        assert 4 <= choices._page_size <= 10
+        assert f"the next {choices._page_size} entries" in choices._prompt_message
+
+        # Derived addresses are not derived again.
+        page_size = choices._page_size
+        choices._load_choices()
+        assert choices._page_size == page_size
+
+    def test_address_cache(self, cache, hd_path, mock_device, address):
+        choices = AddressPromptChoice(hd_path, page_size=2)
+        choices._load_choices()
+        assert mock_device.get_address.call_count == 2
+        assert cache.path.is_file()
+
+        # Derived by the device once, for this device.
+        choices = AddressPromptChoice(hd_path, page_size=2)
+        choices._load_choices()
+        assert choices.choices == [address, address]
+        assert mock_device.get_address.call_count == 2
+
+    def test_fixed_page_size(self, hd_path, account_addresses):
+        choices = AddressPromptChoice(
+            hd_path, page_size=2, sources=[lambda i: account_addresses[0]]
+        )
+        choices._load_choices()
+        assert choices._page_size == 2
+
+    def test_paging(self, hd_path, account_addresses):
+        choices = AddressPromptChoice(hd_path, sources=[lambda i: account_addresses[0]])
+        choices._load_choices()
+        first_page = len(choices.choices)
+        assert not choices._page_from_choice("p")
+
+        # Instant addresses make the next page as large as allowed.
+        assert choices._page_from_choice("n")
+        choices._load_choices()
+        assert choices._index_offset == first_page
+        assert len(choices.choices) == AddressPromptChoice.MAX_PAGE_SIZE
+
+        assert choices._page_from_choice("n")
+        assert choices._previous_page_size == AddressPromptChoice.MAX_PAGE_SIZE
+        assert choices._page_from_choice("p")
+        assert choices._page_from_choice("p")
+        assert choices._index_offset == 0
+        assert not choices._is_incremented
+
+
+class StandInWeb3Provider:
+    """
+    Answers JSON-RPC batches like a node, recording each batch it receives.
+    """
+
+    def __init__(self, balances: dict[str, int]):
+        self.balances = balances
+        self.batches: list = []
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        return [
+            {
+                "id": i,
+                "result": hex(self.balances.get(params[0], 0) if method == "eth_getBalance" else 7),
+            }
+            for i, (method, params) in enumerate(requests)
+        ]
+
+
+def test_get_account_activity_batched(mocker, account_addresses):
+    from ape_ledger.activity import AccountActivity, get_account_activity
+
+    web3_provider = StandInWeb3Provider({account_addresses[1]: 10**18})
+    provider = mocker.MagicMock()
+    provider.web3.provider = web3_provider
+
+    activity = get_account_activity(account_addresses[:3], provider)
+    assert activity == [
+        AccountActivity(balance=0, nonce=7),
+        AccountActivity(balance=10**18, nonce=7),
+        AccountActivity(balance=0, nonce=7),
+    ]
+    assert len(web3_provider.batches) == 1
+    assert len(web3_provider.batches[0]) == 6
+
+
+def test_get_account_activity_error(mocker, address):
+    from ape_ledger.activity import get_account_activity
+    from ape_ledger.exceptions import LedgerAccountException
+
+    provider = mocker.MagicMock()
+    provider.web3.provider.make_batch_request.return_value = {
+        "error": {"code": -32600, "message": "batch not supported"}
+    }
+    with pytest.raises(LedgerAccountException, match="batch not supported"):
+        get_account_activity([address], provider)
+
+
+def test_get_account_activity_without_web3(mocker, address):
+    from ape_ledger.activity import AccountActivity, get_account_activity
+
+    provider = mocker.MagicMock(spec=["make_request"])
+    provider.make_request.side_effect = lambda method, params: (
+        "0x10" if method == "eth_getBalance" else "0x2"
+    )
+
+    assert get_account_activity([address], provider) == [AccountActivity(balance=16, nonce=2)]
+    assert provider.make_request.call_count == 2
+
+
+def test_activity_fetched_while_deriving(mocker, hd_path, account_addresses):
+    derived_at: list[float] = []
+    batched_at: list[float] = []
+
+    def slow_source(index):
+        time.sleep(0.05)
+        derived_at.append(time.perf_counter())
+        return account_addresses[index % len(account_addresses)]
+
+    class TimedWeb3Provider(StandInWeb3Provider):
+        def make_batch_request(self, requests):
+            batched_at.append(time.perf_counter())
+            return super().make_batch_request(requests)
+
+    web3_provider = TimedWeb3Provider({account_addresses[1]: 10**18})
+    provider = mocker.MagicMock()
+    provider.web3.provider = web3_provider
+    choices = AddressPromptChoice(hd_path, page_size=4, sources=[slow_source], provider=provider)
+    choices._load_choices()
+
+    # The first batch starts before the last address is derived.
+    assert batched_at[0] < derived_at[-1]
+    assert [a.balance for a in choices._activity] == [0, 10**18, 0, 0]
+    assert sum(len(batch) for batch in web3_provider.batches) == 8
@@ -0,0 +1,284 @@
+import threading
+import time
+
+import pytest
+from ledgerblue.commException import CommException  # type: ignore
+
+from ape_ledger.client import (
+    DeviceFactory,
+    DeviceFactoryStats,
+    LedgerDeviceClient,
+    get_device_factory,
+)
+from ape_ledger.exceptions import LedgerSigningError, SigningTimeoutError
+from ape_ledger.hdpath import HDAccountPath
+
+GET_CONFIGURATION_INS = 0x06
+GET_ADDRESS_INS = 0x02
+
+
+class SlowDongle:
+    """
+    A device that takes ``open_time`` seconds to open.
+    """
+
+    def __init__(self, address: str, version: tuple[int, int, int] = (1, 10, 3)):
+        self.address = address
+        self.version = version
+        self.requests: list[int] = []
+
+    def exchange(self, apdu: bytes, timeout: int = 20000) -> bytearray:
+        self.requests.append(apdu[1])
+        if apdu[1] == GET_CONFIGURATION_INS:
+            return bytearray(bytes([0, *self.version]))
+
+        address = self.address[2:].encode("ascii")
+        return bytearray(b"\x41" + b"\x04" * 65 + bytes([len(address)]) + address)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(hd_path):
+    client = LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def open_dongle(mocker, address):
+    dongle = SlowDongle(address)
+
+    def get_dongle(*args, **kwargs):
+        time.sleep(0.1)
+        return dongle
+
+    patch = mocker.patch("ape_ledger.client.get_dongle", side_effect=get_dongle)
+    return patch, dongle
+
+
+class TestWarmUp:
+    def test_warm_up(self, client, open_dongle):
+        patch, dongle = open_dongle
+        client.warm_up().join()
+
+        assert dongle.requests == [GET_CONFIGURATION_INS]
+        assert client.dongle is dongle
+        assert client.warm_up() is None
+        assert patch.call_count == 1
+
+    def test_request_waits_for_warm_up(self, client, open_dongle, address):
+        patch, dongle = open_dongle
+        client.warm_up()
+        assert client.get_address().lower() == address.lower()
+
+        # Opened once, and the version check finished before the request.
+        assert patch.call_count == 1
+        assert dongle.requests == [GET_CONFIGURATION_INS, GET_ADDRESS_INS]
+
+    def test_warm_up_unsupported_version(self, mocker, client, open_dongle):
+        _, dongle = open_dongle
+        dongle.version = (0, 9, 0)
+        warning = mocker.patch("ape_ledger.client.logger.warning")
+        client.warm_up().join()
+        assert "Unsupported Ethereum app version '0.9.0'" in warning.call_args.args[0]
+
+    def test_warm_up_failure(self, mocker, client):
+        mocker.patch("ape_ledger.client.get_dongle", side_effect=OSError("open failed"))
+        client.warm_up().join()
+        with pytest.raises(OSError):
+            _ = client.dongle
+
+
+class UnconfirmedDongle(SlowDongle):
+    """
+    A device on which no one confirms signing requests, like ledgerblue's HID dongle.
+    """
+
+    def __init__(self, address: str):
+        super().__init__(address)
+        self.timeouts: list[float] = []
+        self.closed = False
+
+    def exchange(self, apdu: bytes, timeout: float = 20000) -> bytearray:
+        if apdu[1] == GET_ADDRESS_INS:
+            return super().exchange(apdu, timeout=timeout)
+
+        self.timeouts.append(timeout)
+        time.sleep(timeout)
+        raise CommException("Timeout")
+
+    def close(self):
+        self.closed = True
+
+
+class TestTimeout:
+    def test_sign_timeout(self, hd_path, address):
+        dongle = UnconfirmedDongle(address)
+        client = LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)), transport=dongle)
+        start = time.monotonic()
+        with pytest.raises(SigningTimeoutError):
+            client.sign_message(b"hello", timeout=0.05)
+
+        assert time.monotonic() - start < 1
+        assert isinstance(SigningTimeoutError(), LedgerSigningError)
+        assert dongle.timeouts[0] <= 0.05
+
+        # The transport is still usable.
+        assert client.get_address(timeout=1).lower() == address.lower()
+
+    def test_default_timeout(self, hd_path, address):
+        dongle = UnconfirmedDongle(address)
+        client = LedgerDeviceClient(
+            HDAccountPath(hd_path.format(x=0)), transport=dongle, timeout=0.05
+        )
+        with pytest.raises(SigningTimeoutError):
+            client.sign_transaction(
+                {
+                    "destination": b"\x01" * 20,
+                    "amount": 1,
+                    "gas": 21000,
+                    "gas_price": 1,
+                    "nonce": 0,
+                    "chain_id": 1,
+                }
+            )
+
+    def test_device_reopened_after_timeout(self, mocker, client, address):
+        dongle = UnconfirmedDongle(address)
+        patch = mocker.patch("ape_ledger.client.get_dongle", return_value=dongle)
+        with pytest.raises(SigningTimeoutError):
+            client.sign_message(b"hello", timeout=0.05)
+
+        # The unanswered handle is closed (and the device lock released).
+        assert dongle.closed
+        assert client.get_address().lower() == address.lower()
+        assert patch.call_count == 2
+
+    def test_timeout_waiting_for_another_request(self, mocker, client, address):
+        dongle = UnconfirmedDongle(address)
+        mocker.patch("ape_ledger.client.get_dongle", return_value=dongle)
+        client.get_address()
+
+        # Another thread's request, waiting on the user.
+        other = LedgerDeviceClient(HDAccountPath("m/44'/60'/1'/0/0"), transport=dongle)
+
+        def sign():
+            with pytest.raises(SigningTimeoutError):
+                other.sign_message(b"hello", timeout=0.5)
+
+        thread = threading.Thread(target=sign)
+        thread.start()
+        time.sleep(0.1)
+        with pytest.raises(SigningTimeoutError, match="another request"):
+            client.sign_message(b"hello", timeout=0.05)
+
+        thread.join()
+
+        # Still open, as the device never saw the request.
+        assert client.is_open
+        assert len(dongle.timeouts) == 1
+
+
+class TestDeviceFactory:
+    @pytest.fixture
+    def factory(self):
+        factory = DeviceFactory(max_size=2, idle_timeout=None)
+        yield factory
+        factory.close()
+
+    @pytest.fixture
+    def dongle(self, mocker, address):
+        dongle = SlowDongle(address)
+        mocker.patch("ape_ledger.client.get_dongle", return_value=dongle)
+        return dongle
+
+    def test_lru(self, factory, hd_path, dongle):
+        paths = [HDAccountPath(hd_path.format(x=i)) for i in range(3)]
+        first = factory.create_device(paths[0])
+        first.get_address()
+        factory.create_device(paths[1])
+        assert factory.create_device(paths[0]) is first
+
+        # Evicts the least recently used (the second) client.
+        factory.create_device(paths[2])
+        assert list(factory.device_map) == [paths[0].path, paths[2].path]
+        assert factory.stats == DeviceFactoryStats(
+            hits=1, misses=3, evictions=1, idle_closes=0, size=2, live_handles=1
+        )
+
+        # Evicting an open client closes its device.
+        factory.create_device(paths[1])
+        assert not first.is_open
+        assert factory.stats.live_handles == 0
+
+    def test_eviction_waits_for_request(self, hd_path, address):
+        client = LedgerDeviceClient(
+            HDAccountPath(hd_path.format(x=0)), transport=SlowDongle(address)
+        )
+        with client._session("get_address", None):
+            client.close_when_idle()
+            assert client.is_open
+
+        assert not client.is_open
+
+    def test_close_idle(self, mocker, factory, hd_path, dongle):
+        # Only closed when asked to, not by the reaper.
+        mocker.patch.object(factory, "_start_reaper")
+        factory.idle_timeout = 0.2
+        client = factory.create_device(HDAccountPath(hd_path.format(x=0)))
+        client.get_address()
+        assert factory.close_idle() == 0
+        assert client.is_open
+
+        time.sleep(0.2)
+        assert factory.close_idle() == 1
+        assert not client.is_open
+        assert factory.stats.idle_closes == 1
+
+        # Re-opened when needed.
+        assert client.get_address().lower() == dongle.address.lower()
+
+    def test_reaper(self, hd_path, dongle):
+        factory = DeviceFactory(idle_timeout=0.05)
+        client = factory.create_device(HDAccountPath(hd_path.format(x=0)))
+        client.get_address()
+        time.sleep(0.3)
+        assert not client.is_open
+        factory.close()
+
+    def test_closed_for_waiting_process(self, mocker, factory, hd_path, dongle):
+        lock = mocker.patch("ape_ledger.client.get_device_lock").return_value
+        lock.has_waiters = False
+        client = factory.create_device(HDAccountPath(hd_path.format(x=0)))
+        client.get_address()
+        assert client.is_open
+
+        lock.has_waiters = True
+        client.get_address()
+        assert not client.is_open
+        lock.release.assert_called_once_with()
+
+    @pytest.mark.parametrize(
+        "idle_timeout,lock_timeout,expected",
+        ((10.0, 60.0, 10.0), (300.0, 60.0, 30.0), (300.0, None, 300.0), (None, 60.0, None)),
+    )
+    def test_idle_timeout_below_lock_timeout(self, mocker, idle_timeout, lock_timeout, expected):
+        mocker.patch("ape_ledger.client._device_factory", None)
+        config = mocker.MagicMock(
+            device_cache_size=32, device_idle_timeout=idle_timeout, lock_timeout=lock_timeout
+        )
+        mocker.patch(
+            "ape.utils.basemodel.ManagerAccessMixin.config_manager"
+        ).get_config.return_value = config
+        factory = get_device_factory()
+        assert factory.idle_timeout == expected
+
+    def test_constant_handles(self, factory, hd_path, dongle):
+        for index in range(50):
+            factory.create_device(HDAccountPath(hd_path.format(x=index))).get_address()
+
+        assert factory.stats.size == 2
+        assert factory.stats.live_handles <= 2
+        assert factory.stats.evictions == 48
@@ -0,0 +1,188 @@
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+import ape_ledger.daemon
+from ape_ledger.accounts import LedgerAccount
+from ape_ledger.daemon import (
+    DaemonClient,
+    LedgerDaemon,
+    _forget_daemon,
+    _send,
+    get_daemon_client,
+    get_daemon_metrics,
+)
+from ape_ledger.exceptions import LedgerAccountException, LedgerSigningError, SigningTimeoutError
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.metrics import get_registry
+
+TEST_ACCOUNT_PATH = HDAccountPath("m/44'/60'/0'/0/0")
+
+
+@pytest.fixture(autouse=True)
+def patch_device(device_factory):
+    return device_factory("daemon")
+
+
+@pytest.fixture(autouse=True)
+def forget_daemon():
+    _forget_daemon()
+    yield
+    _forget_daemon()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "daemon.sock"
+
+
+@pytest.fixture
+def daemon(socket_path):
+    server = LedgerDaemon(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def client(daemon, socket_path):
+    return DaemonClient(TEST_ACCOUNT_PATH, socket_path=socket_path)
+
+
+class TestLedgerDaemon:
+    def test_get_address(self, client, address):
+        assert client.get_address() == address
+
+    def test_sign_message(self, client, mock_device, msg_signature):
+        assert client.sign_message(b"I\xe2\x99\xa5SF") == msg_signature
+        mock_device.sign_message.assert_called_once_with(b"I\xe2\x99\xa5SF")
+
+    def test_sign_typed_data(self, client, mock_device, msg_signature):
+        assert client.sign_typed_data(b"\x01" * 32, b"\x02" * 32) == msg_signature
+        mock_device.sign_typed_data.assert_called_once_with(b"\x01" * 32, b"\x02" * 32)
+
+    def test_sign_transaction(self, client, mock_device, tx_signature):
+        txn = {"nonce": 0, "data": b"\x00\x01", "access_list": [["0x00", [b"\x02"]]]}
+        assert client.sign_transaction(txn) == tx_signature
+        mock_device.sign_transaction.assert_called_once_with(txn)
+
+    def test_device_error(self, client, mock_device):
+        mock_device.sign_message.side_effect = RuntimeError("Denied by the user")
+        with pytest.raises(LedgerSigningError, match="Denied by the user"):
+            client.sign_message(b"message")
+
+    def test_timeout(self, client, mock_device):
+        mock_device.sign_message.side_effect = SigningTimeoutError("Timed out")
+        with pytest.raises(SigningTimeoutError, match="Timed out"):
+            client.sign_message(b"message", timeout=0.5)
+
+        mock_device.sign_message.assert_called_once_with(b"message", timeout=0.5)
+
+    @pytest.mark.parametrize(
+        "request_data,fields",
+        (
+            ({"method": "get_address", "kwargs": {"confirm": True}}, ["confirm"]),
+            ({"method": "get_address", "kwargs": {"timeout": "soon"}}, ["timeout"]),
+            ({"method": "sign_message", "args": []}, []),
+            ({"method": "sign_transaction", "args": [{"nonce": 0, "sender": "0x"}]}, ["sender"]),
+        ),
+    )
+    def test_invalid_request(self, daemon, socket_path, mock_device, request_data, fields):
+        response = _send(socket_path, {"hd_path": TEST_ACCOUNT_PATH.path, **request_data})
+        assert response["type"] == "InvalidRequest"
+        assert response["fields"] == fields
+        assert not mock_device.method_calls
+
+    def test_metrics(self, daemon, socket_path):
+        get_registry().counter("ape_ledger_test_total", "A test counter.").inc()
+        assert "ape_ledger_test_total 1.0" in get_daemon_metrics(socket_path)
+
+    def test_metrics_not_running(self, socket_path):
+        assert get_daemon_metrics(socket_path) is None
+
+    def test_socket_permissions(self, mocker, socket_path):
+        umask = os.umask(0o022)
+        chmod = mocker.spy(os, "chmod")
+        try:
+            daemon = LedgerDaemon(socket_path)
+            assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+            daemon.server_close()
+
+        finally:
+            # The process umask is restored.
+            assert os.umask(umask) == 0o022
+
+        # Created that way, rather than changed after binding.
+        assert chmod.call_count == 0
+
+    def test_already_running(self, daemon, socket_path):
+        with pytest.raises(LedgerAccountException, match="already running"):
+            LedgerDaemon(socket_path)
+
+    def test_stale_socket(self, socket_path, client):
+        socket_path.unlink()
+        socket_path.touch()
+        server = LedgerDaemon(socket_path)
+        server.server_close()
+        assert not socket_path.exists()
+
+
+def test_get_daemon_client(mocker, daemon, socket_path):
+    mocker.patch("ape_ledger.daemon.get_socket_path").return_value = socket_path
+    client = get_daemon_client(TEST_ACCOUNT_PATH)
+    assert isinstance(client, DaemonClient)
+
+
+def test_get_daemon_client_not_running(mocker, socket_path):
+    mocker.patch("ape_ledger.daemon.get_socket_path").return_value = socket_path
+    assert get_daemon_client(TEST_ACCOUNT_PATH) is None
+
+
+def test_get_daemon_client_looked_up_once(mocker, daemon, socket_path):
+    mocker.patch("ape_ledger.daemon.get_socket_path").return_value = socket_path
+    ping = mocker.spy(ape_ledger.daemon, "_ping")
+    assert get_daemon_client(TEST_ACCOUNT_PATH) is not None
+    assert get_daemon_client(TEST_ACCOUNT_PATH) is not None
+    assert ping.call_count == 1
+
+
+def test_daemon_stopped(mocker, daemon, socket_path, mock_device, address):
+    mocker.patch("ape_ledger.daemon.get_socket_path").return_value = socket_path
+    client = get_daemon_client(TEST_ACCOUNT_PATH)
+    assert client is not None
+    daemon.shutdown()
+    daemon.server_close()
+
+    # Sent to the device instead, and the daemon is looked up again next time.
+    assert client.get_address() == address
+    mock_device.get_address.assert_called_once_with(timeout=None)
+    assert get_daemon_client(TEST_ACCOUNT_PATH) is None
+
+
+def test_daemon_not_answering(mocker, socket_path, mock_device, address):
+    mocker.patch("ape_ledger.daemon.DAEMON_TIMEOUT_MARGIN", 0.1)
+    mocker.patch("ape_ledger.daemon.PING_TIMEOUT", 0.1)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Accepts connections, but never answers.
+        server.bind(str(socket_path))
+        server.listen()
+        client = DaemonClient(TEST_ACCOUNT_PATH, socket_path=socket_path)
+        assert client.get_address(timeout=0.1) == address
+        assert not ape_ledger.daemon._ping(socket_path)
+
+    mock_device.get_address.assert_called_once_with(timeout=0.1)
+
+
+def test_ledger_account_uses_daemon(mocker, daemon, socket_path, tmp_path, address, hd_path):
+    mocker.patch("ape_ledger.daemon.get_socket_path").return_value = socket_path
+    account_path = tmp_path / "account.json"
+    account_path.write_text(json.dumps({"address": address, "hdpath": hd_path}))
+    account = LedgerAccount(account_file_path=account_path)
+    assert isinstance(account._client, DaemonClient)
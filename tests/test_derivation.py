@@ -0,0 +1,214 @@
+import json
+import time
+
+import ape
+import pytest
+from eth_account import Account
+from eth_account.hdaccount.deterministic import HDPath, derive_child_key, hmac_sha512
+from eth_account.hdaccount.mnemonic import Mnemonic
+from eth_keys import keys
+
+from ape_ledger.client import LedgerDeviceClient
+from ape_ledger.derivation import (
+    FINGERPRINT_PATH,
+    AddressCache,
+    AddressDeriver,
+    derive_addresses,
+    derive_public_child,
+    device_address_source,
+    find_address,
+    get_address_cache,
+)
+from ape_ledger.hdpath import HDAccountPath
+
+from .test_client import SlowDongle
+
+MNEMONIC = "test test test test test test test test test test test junk"
+PARENT_PATH = "m/44'/60'/0'/0"
+
+Account.enable_unaudited_hdwallet_features()
+
+
+def get_extended_public_key(path: str) -> tuple[bytes, bytes]:
+    seed = Mnemonic.to_seed(MNEMONIC)
+    main_node = hmac_sha512(b"Bitcoin seed", seed)
+    key, chain_code = main_node[:32], main_node[32:]
+    for node in HDPath(path)._path:
+        key, chain_code = derive_child_key(key, chain_code, node)
+
+    return b"\x04" + keys.PrivateKey(key).public_key.to_bytes(), chain_code
+
+
+def get_expected_address(path: str) -> str:
+    return Account.from_mnemonic(MNEMONIC, account_path=path).address
+
+
+@pytest.fixture(autouse=True)
+def patch_device(mocker, device_factory, mock_device):
+    device_factory("derivation")
+    mocker.patch("ape_ledger.derivation._device_fingerprint", None)
+    mock_device.get_public_key.side_effect = None
+    mock_device.get_public_key.return_value = get_extended_public_key(PARENT_PATH)
+
+
+@pytest.fixture
+def cache(tmp_path, address):
+    return AddressCache(tmp_path / "addresses.json", fingerprint=address)
+
+
+def test_derive_public_child():
+    public_key, chain_code = get_extended_public_key(PARENT_PATH)
+    expected_key, expected_chain_code = get_extended_public_key(f"{PARENT_PATH}/7")
+    assert derive_public_child(public_key, chain_code, 7) == (
+        expected_key[1:],
+        expected_chain_code,
+    )
+
+
+def test_derive_public_child_hardened():
+    with pytest.raises(ValueError):
+        derive_public_child(*get_extended_public_key(PARENT_PATH), 2**31)
+
+
+class TestAddressDeriver:
+    def test_software(self, mock_device, cache):
+        deriver = AddressDeriver(f"{PARENT_PATH}/{{x}}", cache=cache)
+        assert deriver.is_software
+        for index in range(3):
+            assert deriver.get_address(index) == get_expected_address(f"{PARENT_PATH}/{index}")
+
+        # The device is asked for the parent public key once, and never for addresses.
+        assert mock_device.get_public_key.call_count == 1
+        assert not mock_device.get_address.called
+
+    def test_device(self, mock_device, cache, address):
+        deriver = AddressDeriver("m/44'/60'/{x}'/0/0", cache=cache)
+        assert not deriver.is_software
+        assert deriver.get_address(0) == address
+        assert mock_device.get_address.call_count == 1
+
+    def test_cached(self, mock_device, cache, address):
+        deriver = AddressDeriver("m/44'/60'/{x}'/0/0", cache=cache)
+        deriver.get_address(0)
+        cache.save()
+
+        cache = AddressCache(cache.path, fingerprint=address)
+        deriver = AddressDeriver("m/44'/60'/{x}'/0/0", cache=cache)
+        assert deriver.get_address(0) == address
+        assert mock_device.get_address.call_count == 1
+
+
+class TestAddressCache:
+    def test_per_device(self, cache, address):
+        hd_path = HDAccountPath("m/44'/60'/0'/0/0")
+        cache.set(hd_path, address)
+        cache.save()
+
+        # Another seed (or passphrase) has other addresses at the same paths.
+        assert AddressCache(cache.path, fingerprint="0x01").get(hd_path) is None
+        assert AddressCache(cache.path, fingerprint=address).get(hd_path) == address
+
+    def test_fingerprint_read_once(self, mocker, cache, address):
+        patch = mocker.patch("ape_ledger.derivation.get_device")
+        patch.return_value.get_address.return_value = address
+        assert AddressCache(cache.path).fingerprint == address
+        assert AddressCache(cache.path).fingerprint == address
+        assert patch.call_count == 1
+        assert patch.call_args[0][0].path == HDAccountPath(FINGERPRINT_PATH).path
+
+    def test_older_cache_ignored(self, cache, address):
+        hd_path = HDAccountPath("m/44'/60'/0'/0/0")
+        cache.path.write_text(f'{{"{hd_path.path}": "{address}"}}')
+        assert AddressCache(cache.path, fingerprint=address).get(hd_path) is None
+
+
+class TestFindAddress:
+    def test_found(self, mock_device, cache):
+        target = get_expected_address(f"{PARENT_PATH}/5")
+        templates = ("m/44'/60'/{x}'/0/0", f"{PARENT_PATH}/{{x}}")
+        mock_device.get_address.side_effect = lambda: get_expected_address(PARENT_PATH)
+
+        hd_path = find_address(target.lower(), templates, cache=cache)
+        assert str(hd_path) == f"{PARENT_PATH}/5"
+        # Stopped at the match, searching the templates side by side.
+        assert mock_device.get_address.call_count == 6
+        assert cache.path.is_file()
+
+    def test_default_cache_per_device(self, mocker, mock_device, tmp_path):
+        cache = AddressCache(tmp_path / "addresses.json")
+        mocker.patch("ape_ledger.derivation.get_address_cache").return_value = cache
+        target = get_expected_address(f"{PARENT_PATH}/1")
+        assert str(find_address(target, (f"{PARENT_PATH}/{{x}}",))) == f"{PARENT_PATH}/1"
+
+        # Read from the device once, for the fingerprint.
+        fingerprint = mock_device.get_address()
+        assert mock_device.get_address.call_count == 2
+        assert list(json.loads(cache.path.read_text())) == [fingerprint]
+
+    def test_not_found(self, cache):
+        target = get_expected_address("m/44'/60'/1'/0/0")
+        assert find_address(target, (f"{PARENT_PATH}/{{x}}",), limit=5, cache=cache) is None
+
+
+class TestDeriveAddresses:
+    def test_sources(self, cache):
+        deriver = AddressDeriver(f"{PARENT_PATH}/{{x}}", cache=cache)
+        used = set()
+
+        def source(name):
+            def get_address(index):
+                used.add(name)
+                time.sleep(0.01)
+                return deriver.get_address(index)
+
+            return get_address
+
+        addresses = derive_addresses(range(8), [source("a"), source("b")])
+        assert addresses == [get_expected_address(f"{PARENT_PATH}/{i}") for i in range(8)]
+        assert used == {"a", "b"}
+
+    def test_failure(self):
+        def fail(index):
+            raise ValueError(index)
+
+        with pytest.raises(ValueError):
+            derive_addresses(range(4), [fail, fail])
+
+    def test_devices_concurrently(self, address):
+        # Devices with the same seed, each with its own transport.
+        active = []
+        overlaps = []
+
+        class Device(SlowDongle):
+            def exchange(self, apdu, timeout=20000):
+                active.append(apdu)
+                overlaps.append(len(active))
+                time.sleep(0.05)
+                active.pop()
+                return super().exchange(apdu, timeout=timeout)
+
+        sources = [device_address_source(f"{PARENT_PATH}/{{x}}", Device(address)) for _ in range(2)]
+        addresses = derive_addresses(range(4), sources)
+        assert [a.lower() for a in addresses] == [address.lower()] * 4
+        assert max(overlaps) == 2
+
+
+def test_address_cache_not_an_account():
+    # Every JSON file in the data folder is loaded as an account.
+    container = ape.accounts.containers["ledger"]
+    assert get_address_cache().path.parent != container.data_folder
+
+
+def test_client_get_public_key(mocker):
+    public_key, chain_code = get_extended_public_key(PARENT_PATH)
+    address = get_expected_address(PARENT_PATH)[2:].encode("ascii")
+    dongle = mocker.MagicMock()
+    dongle.exchange.return_value = bytearray(
+        bytes([len(public_key)]) + public_key + bytes([len(address)]) + address + chain_code
+    )
+    client = LedgerDeviceClient(HDAccountPath(PARENT_PATH), transport=dongle)
+
+    assert client.get_public_key() == (public_key, chain_code)
+    apdu = dongle.exchange.call_args.args[0]
+    assert apdu[:4] == b"\xe0\x02\x00\x01"
+    assert apdu[5:] == HDAccountPath(PARENT_PATH).as_bytes()
@@ -0,0 +1,87 @@
+from functools import lru_cache
+
+import pytest
+
+from ape_ledger.derivation import AddressCache
+from ape_ledger.discovery import COMMON_BASE_PATHS, discover_accounts
+
+from .test_derivation import get_expected_address, get_extended_public_key
+
+LEDGER_LIVE_1 = "m/44'/60'/1'/0/0"
+BIP44_2 = "m/44'/60'/0'/0/2"
+
+
+@lru_cache
+def derive_address(path: str) -> str:
+    return get_expected_address(path)
+
+
+class FakeDevice:
+    def __init__(self, hd_path):
+        self.path = hd_path.path
+
+    def get_address(self) -> str:
+        return derive_address(self.path)
+
+    def get_public_key(self) -> tuple[bytes, bytes]:
+        return get_extended_public_key(self.path)
+
+
+class StandInWeb3Provider:
+    def __init__(self, balances: dict[str, int], nonces: dict[str, int]):
+        self.balances = balances
+        self.nonces = nonces
+        self.batches: list = []
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        values = {"eth_getBalance": self.balances, "eth_getTransactionCount": self.nonces}
+        return [
+            {"id": i, "result": hex(values[method].get(params[0], 0))}
+            for i, (method, params) in enumerate(requests)
+        ]
+
+
+@pytest.fixture(autouse=True)
+def patch_device(mocker):
+    mocker.patch("ape_ledger.derivation.get_device", side_effect=FakeDevice)
+    mocker.patch("ape_ledger.derivation._device_fingerprint", None)
+
+
+@pytest.fixture
+def web3_provider():
+    return StandInWeb3Provider(
+        balances={derive_address(LEDGER_LIVE_1): 5 * 10**18},
+        nonces={derive_address(BIP44_2): 2},
+    )
+
+
+@pytest.fixture
+def provider(mocker, web3_provider):
+    provider = mocker.MagicMock()
+    provider.web3.provider = web3_provider
+    return provider
+
+
+def test_discover_accounts(provider, web3_provider, tmp_path):
+    cache = AddressCache(tmp_path / "addresses.json")
+    accounts = discover_accounts(provider, COMMON_BASE_PATHS, gap_limit=3, cache=cache)
+
+    assert [(str(a.hd_path), a.address, a.balance, a.nonce) for a in accounts] == [
+        (LEDGER_LIVE_1, derive_address(LEDGER_LIVE_1), 5 * 10**18, 0),
+        (BIP44_2, derive_address(BIP44_2), 0, 2),
+    ]
+
+    # One batched request per round for all templates:
+    # every template in the first, only the used ones in the second.
+    assert [len(batch) for batch in web3_provider.batches] == [2 * 3 * 3, 2 * 3 * 2]
+    assert len(cache.addresses) == 14
+    assert cache.fingerprint == derive_address("m/44'/60'/0'/0/0")
+
+
+def test_discover_accounts_none_used(provider, web3_provider, tmp_path):
+    web3_provider.balances = {}
+    web3_provider.nonces = {}
+    cache = AddressCache(tmp_path / "addresses.json")
+    assert discover_accounts(provider, COMMON_BASE_PATHS, gap_limit=2, cache=cache) == []
+    assert len(web3_provider.batches) == 1
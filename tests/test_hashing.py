@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from eip712.messages import EIP712Message, EIP712Type
+
+from ape_ledger.hashing import (
+    _hash_domain,
+    _hash_type,
+    clear_caches,
+    get_domain_separator,
+    get_signable_message,
+    get_struct_hash,
+)
+
+
+class Person(EIP712Type):
+    name: "string"  # type: ignore # noqa: F821
+    wallets: list["address"]  # type: ignore # noqa: F821
+
+
+class Item(EIP712Type):
+    token: "address"  # type: ignore # noqa: F821
+    amount: "uint256"  # type: ignore # noqa: F821
+    memo: "bytes"  # type: ignore # noqa: F821
+    owner: Person
+
+
+class Order(EIP712Message):
+    _chainId_: "uint256" = 1  # type: ignore # noqa: F821
+    _name_: "string" = "Order Book"  # type: ignore # noqa: F821
+    _verifyingContract_: "address" = "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC"  # type: ignore # noqa: F821 E501
+    _version_: "string" = "1"  # type: ignore # noqa: F821
+
+    maker: Person
+    items: list[Item]
+    expiry: "uint256"  # type: ignore # noqa: F821
+
+
+WALLET = "0xCD2a3d9F938E13CD947Ec05AbC7FE734Df8DD826"
+
+
+def create_order(num_items: int, expiry: int = 0) -> Order:
+    maker = Person(name="Alice", wallets=[WALLET] * 3)  # type: ignore
+    items = [
+        Item(
+            token=WALLET,
+            amount=i,
+            memo=f"item {i}".encode(),
+            owner=Person(name=f"Owner {i}", wallets=[WALLET]),  # type: ignore
+        )  # type: ignore
+        for i in range(num_items)
+    ]
+    return Order(maker=maker, items=items, expiry=expiry)  # type: ignore
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.mark.parametrize("num_items", (0, 1, 25))
+def test_get_signable_message(num_items):
+    order = create_order(num_items)
+    assert get_signable_message(order) == order.signable_message
+
+
+def test_get_domain_separator_cached():
+    get_domain_separator(create_order(1))
+    get_domain_separator(create_order(2))
+    assert _hash_domain.cache_info().hits == 1
+
+
+def test_get_struct_hash_cached_types():
+    first = get_struct_hash(create_order(3, expiry=1))
+    misses = _hash_type.cache_info().misses
+    second = get_struct_hash(create_order(3, expiry=2))
+
+    # The message is re-hashed but none of the type strings are encoded again.
+    assert first != second
+    assert _hash_type.cache_info().misses == misses
+
+
+def best_time(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_nested_messages():
+    orders = [create_order(50, expiry=i) for i in range(20)]
+    assert [get_signable_message(o) for o in orders] == [o.signable_message for o in orders]
+
+    uncached_time = best_time(lambda: [order.signable_message for order in orders])
+    cached_time = best_time(lambda: [get_signable_message(order) for order in orders])
+    assert cached_time < uncached_time
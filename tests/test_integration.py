@@ -1,8 +1,15 @@
+import json
+
 import pytest
 from ape import accounts
 from ape._cli import cli
+from ape_ethereum.transactions import DynamicFeeTransaction
 
 from ape_ledger.hdpath import HDBasePath
+from ape_ledger.spool import Spool
+from ape_ledger.store import ACCOUNTS_DB, _stores, get_account_store
+
+from .test_derivation import PARENT_PATH, get_expected_address, get_extended_public_key
 
 
 def _get_container():
@@ -72,6 +79,44 @@ def test_list(runner, existing_account, cmd, address, alias):
     assert address.lower() in result.output.lower()
 
 
+@pytest.mark.parametrize("output_format", ("json", "jsonl", "csv"))
+def test_list_format(runner, existing_account, address, alias, hd_path, output_format):
+    result = runner.invoke(cli, ("ledger", "list", "--format", output_format, "--filter", alias))
+    assert result.exit_code == 0, result.output
+
+    expected = {"alias": alias, "address": address, "hdpath": hd_path}
+    if output_format == "json":
+        assert json.loads(result.output) == [expected]
+    elif output_format == "jsonl":
+        assert [json.loads(line) for line in result.output.splitlines()] == [expected]
+    else:
+        assert result.output.splitlines() == [
+            "alias,address,hdpath",
+            f"{alias},{address},{hd_path}",
+        ]
+
+
+@pytest.mark.parametrize(
+    "account_filter,expected",
+    (
+        ("__integration*", True),
+        ("other*", False),
+        ("m/44'/60'/{x}", True),
+        ("m/44'/60'/1'", False),
+    ),
+)
+def test_list_filter(runner, existing_account, alias, account_filter, expected):
+    result = runner.invoke(cli, ("ledger", "list", "--format", "jsonl", "--filter", account_filter))
+    assert result.exit_code == 0, result.output
+    assert (alias in [json.loads(line)["alias"] for line in result.output.splitlines()]) is expected
+
+
+def test_list_json_empty(runner):
+    result = runner.invoke(cli, ("ledger", "list", "--format", "json", "--filter", "missing-*"))
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == []
+
+
 def test_add(runner, assert_account, address, alias, choices, hd_path):
     container = _get_container()
     choices(address, 2)
@@ -100,6 +145,52 @@ def test_add_when_hd_path_specified(runner, alias, address, hd_path, assert_acco
     assert_account(expected_path, expected_hdpath=expected_hd_path)
 
 
+def test_add_with_balances(runner, mocker, address, alias, connection):
+    patch = mocker.patch("ape_ledger._cli._select_account")
+    patch.return_value = address, HDBasePath().get_account_path(0)
+    result = runner.invoke(cli, ("ledger", "add", alias, "--balances", "ethereum:local:test"))
+    assert result.exit_code == 0, result.output
+    assert patch.call_args.kwargs["provider"] == connection
+    runner.invoke(cli, ("ledger", "delete", alias))
+
+
+def test_find_address(runner, mocker, assert_account, address, alias):
+    container = _get_container()
+    patch = mocker.patch("ape_ledger.derivation.find_address")
+    patch.return_value = HDBasePath().get_account_path(3)
+    result = runner.invoke(cli, ("ledger", "find-address", alias, address.lower()))
+    assert result.exit_code == 0, result.output
+    assert f"found at 'm/44'/60'/3'/0/0' and added with alias '{alias}'" in result.output
+    assert_account(container.data_folder / f"{alias}.json", expected_hdpath="m/44'/60'/3'/0/0")
+    runner.invoke(cli, ("ledger", "delete", alias))
+
+
+def test_find_address_not_found(runner, mocker, address, alias):
+    mocker.patch("ape_ledger.derivation.find_address").return_value = None
+    result = runner.invoke(cli, ("ledger", "find-address", alias, address, "--limit", "10"))
+    assert result.exit_code == 1, result.output
+    assert "not found in account IDs 0 to 9" in result.output
+
+
+def test_discover(runner, mocker, address):
+    from ape_ledger.discovery import DiscoveredAccount
+
+    patch = mocker.patch("ape_ledger.discovery.discover_accounts")
+    hd_path = HDBasePath().get_account_path(0)
+    patch.return_value = [DiscoveredAccount(hd_path, address, 10**18, 3)]
+    result = runner.invoke(
+        cli, ("ledger", "discover", "--network", "ethereum:local:test", "--format", "jsonl")
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {
+        "alias": "ledger-0",
+        "address": address,
+        "hdpath": str(hd_path),
+        "balance": 10**18,
+        "nonce": 3,
+    }
+
+
 def test_add_alias_already_exists(runner, existing_account, choices, address, alias):
     choices(address, 2)
 
@@ -124,3 +215,157 @@ def test_delete_account_not_exists(runner, alias):
     result = runner.invoke(cli, ("ledger", "delete", not_alias))
     assert result.exit_code == 2
     assert f"'{not_alias}'" in result.output
+
+
+def test_sign_messages(runner, existing_account, alias, address, device_factory):
+    device_factory("accounts")
+    messages = "__TEST_MESSAGE__\n\nSome other message\n"
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli,
+            ("ledger", "sign-messages", alias, "-", "--output", "results.jsonl"),
+            input=messages,
+        )
+        with open("results.jsonl") as results_file:
+            results = [json.loads(line) for line in results_file]
+
+    # The second message was not signed by the mock device's key.
+    assert result.exit_code == 1, result.output
+    assert "1 message(s) failed to sign or verify." in result.output
+
+    assert [r["index"] for r in results] == [0, 2]
+    assert results[0]["message"] == "__TEST_MESSAGE__"
+    assert results[0]["signer"] == address
+    assert results[0]["verified"]
+    assert not results[1]["verified"]
+
+
+def test_profile(runner, existing_account, alias):
+    result = runner.invoke(cli, ("ledger", "--profile", "list"))
+    assert result.exit_code == 0, result.output
+    assert alias in result.output
+    assert "import" in result.output
+    assert "wall time" in result.output
+
+
+@pytest.mark.parametrize("trace_format", ("jsonl", "collapsed"))
+def test_trace(runner, tmp_path, existing_account, alias, trace_format):
+    path = tmp_path / "trace.out"
+    result = runner.invoke(
+        cli, ("ledger", "--trace", str(path), "--trace-format", trace_format, "list")
+    )
+    assert result.exit_code == 0, result.output
+    assert alias in result.output
+    assert f"Trace written to '{path}'." in result.output
+    assert path.is_file()
+
+
+def test_migrate(runner, existing_account, alias, address):
+    folder = _get_container().data_folder
+    try:
+        result = runner.invoke(cli, ("ledger", "migrate"))
+        assert result.exit_code == 0, result.output
+        assert "account(s) to" in result.output
+        assert get_account_store(folder).get(alias).address == address
+
+    finally:
+        _stores.pop(get_account_store(folder).path).close()
+        for path in folder.glob(f"{ACCOUNTS_DB}*"):
+            path.unlink()
+
+
+@pytest.mark.parametrize("file_format", ("json", "jsonl", "csv"))
+def test_export_import(runner, tmp_path, existing_account, alias, address, hd_path, file_format):
+    path = str(tmp_path / f"accounts.{file_format}")
+    result = runner.invoke(cli, ("ledger", "export", path, "--filter", alias))
+    assert result.exit_code == 0, result.output
+
+    _get_container().delete_account(alias)
+    result = runner.invoke(cli, ("ledger", "import", path))
+    assert result.exit_code == 0, result.output
+    assert "Added 1 account(s)." in result.output
+    assert accounts.load(alias).address == address
+
+    # Aliases already in use are not replaced unless asked to.
+    result = runner.invoke(cli, ("ledger", "import", path))
+    assert result.exit_code != 0
+    assert "already exists" in result.output
+    result = runner.invoke(cli, ("ledger", "import", path, "--overwrite"))
+    assert result.exit_code == 0, result.output
+
+
+def test_import_invalid(runner, alias, address, hd_path):
+    records = [
+        {"alias": alias, "address": address, "hdpath": hd_path},
+        {"alias": f"{alias}-2", "address": "0x1234", "hdpath": hd_path},
+    ]
+    result = runner.invoke(cli, ("ledger", "import", "--format", "json"), input=json.dumps(records))
+    assert result.exit_code != 0
+    assert "Invalid account" in result.output
+
+    # Nothing was added.
+    assert alias not in _get_container().aliases
+
+
+@pytest.mark.parametrize("data", ("[1, 2]", "5", '{"alias": "test"}', "[{"))
+def test_import_malformed(runner, data):
+    result = runner.invoke(cli, ("ledger", "import", "--format", "json"), input=data)
+    assert result.exit_code != 0
+    assert "Invalid" in result.output
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+
+
+def test_import_duplicate_alias(runner, alias, address, hd_path, account_addresses):
+    records = [
+        {"alias": alias, "address": address, "hdpath": hd_path},
+        {"alias": alias, "address": account_addresses[1], "hdpath": hd_path},
+    ]
+    result = runner.invoke(
+        cli, ("ledger", "import", "--format", "json", "--overwrite"), input=json.dumps(records)
+    )
+    assert result.exit_code != 0
+    assert f"Alias '{alias}' is in the file more than once." in result.output
+
+    # Nothing was added.
+    assert alias not in _get_container().aliases
+
+
+def test_drain(mocker, runner, tmp_path, existing_account, alias, device_factory):
+    device_factory("accounts")
+    # NOTE: The mock device's signature is for another transaction.
+    config = accounts.config_manager.get_config("ledger")
+    mocker.patch.object(config, "verify_signer", False)
+    spool = Spool(tmp_path / "spool")
+    txn = DynamicFeeTransaction(chain_id=1, gas_limit=21000, nonce=0, max_fee=2, max_priority_fee=1)
+    accounts.load(alias).enqueue_transaction(txn, spool=spool)
+    output = tmp_path / "signed.jsonl"
+
+    result = runner.invoke(cli, ("ledger", "drain", str(output), "--spool", str(spool.path)))
+    assert result.exit_code == 0, result.output
+    assert "Signed 1 and failed 0 transaction(s)" in result.output
+    assert json.loads(output.read_text())["status"] == "signed"
+
+    result = runner.invoke(cli, ("ledger", "spool", "--spool", str(spool.path)))
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["status"] == "signed"
+
+
+def test_list_verify(runner, alias, device_factory, mock_device):
+    device_factory("derivation")
+    mock_device.get_public_key.side_effect = None
+    mock_device.get_public_key.return_value = get_extended_public_key(PARENT_PATH)
+    container = _get_container()
+    container.save_account(alias, get_expected_address(f"{PARENT_PATH}/0"), f"{PARENT_PATH}/0")
+    cmd = ("ledger", "list", "--verify", "--max-age", "0", "--filter", alias)
+    result = runner.invoke(cli, cmd)
+    assert result.exit_code == 0, result.output
+    assert f"(alias: '{alias}')" in result.output
+    assert "[verified " in result.output
+
+    # Added with the address of another account.
+    container.save_account(alias, get_expected_address(f"{PARENT_PATH}/1"), f"{PARENT_PATH}/0")
+    result = runner.invoke(cli, (*cmd, "--format", "jsonl"))
+    assert result.exit_code != 0
+    assert json.loads(result.output.splitlines()[0])["status"] == "mismatch"
+    assert "1 account(s) do not match the connected device" in result.output
+    container.delete_account(alias)
@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+
+from ape_ledger.exceptions import DeviceLockTimeoutError
+from ape_ledger.lock import DeviceLock
+
+# A PID that does not belong to any running process.
+DEAD_PID = 2**22 + 1
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return tmp_path / "device.lock"
+
+
+@pytest.fixture
+def lock(lock_path):
+    return DeviceLock(lock_path, timeout=0.2, poll_interval=0.01)
+
+
+@pytest.fixture
+def other_lock(lock_path):
+    # NOTE: File locks are per open file, so a second instance
+    #   acts like another process holding the device.
+    return DeviceLock(lock_path, timeout=0.2, poll_interval=0.01)
+
+
+def add_ticket(lock: DeviceLock, pid: int):
+    lock.queue_path.mkdir(parents=True, exist_ok=True)
+    ticket = lock.queue_path / f"{time.time_ns() - 10**9:020d}-{pid}"
+    ticket.touch()
+    return ticket
+
+
+class TestDeviceLock:
+    def test_acquire_and_release(self, lock):
+        with lock:
+            assert lock.is_locked
+
+        assert not lock.is_locked
+        assert not [*lock.queue_path.iterdir()]
+
+    def test_acquire_is_shared_within_process(self, lock):
+        lock.acquire()
+        lock.acquire()
+        lock.release()
+        assert lock.is_locked
+        lock.release()
+        assert not lock.is_locked
+
+    def test_acquire_timeout_when_held_by_other_process(self, lock, other_lock):
+        with other_lock:
+            with pytest.raises(DeviceLockTimeoutError):
+                lock.acquire()
+
+        assert not lock.is_locked
+        with lock:
+            assert lock.is_locked
+
+    def test_acquire_waits_for_earlier_ticket(self, lock):
+        ticket = add_ticket(lock, os.getpid())
+        with pytest.raises(DeviceLockTimeoutError):
+            lock.acquire()
+
+        ticket.unlink()
+        with lock:
+            assert lock.is_locked
+
+    def test_acquire_removes_stale_tickets(self, lock):
+        ticket = add_ticket(lock, DEAD_PID)
+        with lock:
+            assert lock.is_locked
+
+        assert not ticket.exists()
+
+    def test_has_waiters(self, lock):
+        assert not lock.has_waiters
+        add_ticket(lock, os.getpid())
+        add_ticket(lock, DEAD_PID)
+        assert not lock.has_waiters
+
+        add_ticket(lock, os.getppid())
+        assert lock.has_waiters
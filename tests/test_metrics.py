@@ -0,0 +1,178 @@
+import pytest
+from ledgereth.exceptions import LedgerError
+
+from ape_ledger.client import LedgerDeviceClient
+from ape_ledger.derivation import AddressCache, AddressDeriver
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.metrics import MetricsRegistry, get_registry, set_registry
+
+SIGNATURE_RESPONSE = bytearray(b"\x1b" + b"\x01" * 32 + b"\x02" * 32)
+TRANSACTION = {
+    "destination": b"\x01" * 20,
+    "amount": 1,
+    "gas": 21000,
+    "nonce": 0,
+    "chain_id": 1,
+}
+
+
+@pytest.fixture
+def registry():
+    default = get_registry()
+    registry = MetricsRegistry()
+    set_registry(registry)
+    yield registry
+    set_registry(default)
+
+
+@pytest.fixture
+def dongle(mocker):
+    dongle = mocker.MagicMock()
+    dongle.exchange.return_value = SIGNATURE_RESPONSE
+    return dongle
+
+
+@pytest.fixture
+def client(hd_path, dongle):
+    return LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)), transport=dongle)
+
+
+class TestMetricsRegistry:
+    @pytest.fixture
+    def registry(self):
+        # Not in use, so without the metrics the plugin binds at import.
+        return MetricsRegistry()
+
+    def test_set_registry(self):
+        registry = MetricsRegistry()
+        default = get_registry()
+        set_registry(registry)
+        try:
+            assert registry.counter(
+                "ape_ledger_address_cache_total", "", ("result",)
+            ) is default.counter("ape_ledger_address_cache_total", "", ("result",))
+        finally:
+            set_registry(default)
+
+    def test_counter(self, registry):
+        counter = registry.counter("signs_total", "Signatures.", ("kind",))
+        counter.inc(kind="message")
+        counter.inc(2, kind="message")
+        assert registry.counter("signs_total", "Signatures.", ("kind",)) is counter
+        assert counter.get(kind="message") == 3
+        assert registry.expose() == (
+            "# HELP signs_total Signatures.\n"
+            "# TYPE signs_total counter\n"
+            'signs_total{kind="message"} 3.0\n'
+        )
+
+    def test_histogram(self, registry):
+        histogram = registry.histogram("latency_seconds", "Latency.")
+        histogram.buckets = (0.1, 1.0)
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        assert registry.expose().splitlines()[2:] == [
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1.0"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            "latency_seconds_sum 5.55",
+            "latency_seconds_count 3",
+        ]
+
+    def test_label_escaping(self, registry):
+        registry.gauge("info", "Info.", ("name",)).set(1, name='a "b"\n')
+        assert registry.expose().splitlines()[-1] == 'info{name="a \\"b\\"\\n"} 1.0'
+
+    def test_wrong_labels(self, registry):
+        with pytest.raises(ValueError):
+            registry.counter("signs_total", "Signatures.", ("kind",)).inc(method="message")
+
+    def test_wrong_type(self, registry):
+        registry.counter("signs_total", "Signatures.")
+        with pytest.raises(ValueError, match="is a counter"):
+            registry.histogram("signs_total", "Signatures.")
+
+
+class TestClientMetrics:
+    def test_signs_by_kind(self, registry, client):
+        kinds = ("message", "typed_data", "legacy_transaction", "type_2_transaction")
+        signs = registry.counter("ape_ledger_signs_total", "", ("kind",))
+        confirmation = registry.histogram("ape_ledger_confirmation_seconds", "", ("kind",))
+        exchanges = registry.histogram("ape_ledger_exchange_seconds", "", ("method",))
+        before = {k: (signs.get(kind=k), confirmation.get_count(kind=k)) for k in kinds}
+        message_exchanges = exchanges.get_count(method="sign_message")
+
+        client.sign_message(b"hello")
+        client.sign_typed_data(b"\x01" * 32, b"\x02" * 32)
+        client.sign_transaction({**TRANSACTION, "gas_price": 1})
+        client.sign_transaction(
+            {**TRANSACTION, "max_fee_per_gas": 2, "max_priority_fee_per_gas": 1}
+        )
+
+        for kind in kinds:
+            signed, confirmed = before[kind]
+            assert signs.get(kind=kind) == signed + 1
+            assert confirmation.get_count(kind=kind) == confirmed + 1
+
+        # The only exchange waited for the user, so it is not a round trip.
+        assert exchanges.get_count(method="sign_message") == message_exchanges
+
+    def test_exchanges_without_confirmation(self, registry, client, dongle):
+        exchanges = registry.histogram("ape_ledger_exchange_seconds", "", ("method",))
+        confirmation = registry.histogram("ape_ledger_confirmation_seconds", "", ("kind",))
+        round_trips = exchanges.get_count(method="sign_transaction")
+        confirmed = confirmation.get_count(kind="legacy_transaction")
+
+        client.sign_transaction({**TRANSACTION, "gas_price": 1, "data": b"\x01" * 600})
+
+        assert dongle.exchange.call_count > 1
+        assert exchanges.get_count(method="sign_transaction") == (
+            round_trips + dongle.exchange.call_count - 1
+        )
+        assert confirmation.get_count(kind="legacy_transaction") == confirmed + 1
+
+    def test_errors_by_class(self, registry, client, dongle):
+        errors = registry.counter("ape_ledger_errors_total", "", ("error",))
+        signs = registry.counter("ape_ledger_signs_total", "", ("kind",))
+        failed, signed = errors.get(error="LedgerError"), signs.get(kind="message")
+        dongle.exchange.side_effect = LedgerError("Denied")
+        with pytest.raises(LedgerError):
+            client.sign_message(b"hello")
+
+        assert errors.get(error="LedgerError") == failed + 1
+        assert signs.get(kind="message") == signed
+
+    def test_reconnects(self, mocker, registry, hd_path, dongle):
+        mocker.patch("ape_ledger.client.get_dongle", return_value=dongle)
+        reconnects = registry.counter("ape_ledger_reconnects_total", "")
+        before = reconnects.get()
+        client = LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)))
+        client.sign_message(b"hello")
+        client.close()
+        client.sign_message(b"hello")
+        client.close()
+
+        assert reconnects.get() == before + 1
+
+
+def test_address_cache_hit_rate(registry, tmp_path):
+    cache = AddressCache(tmp_path / "addresses.json", fingerprint="0x01")
+    deriver = AddressDeriver("m/44'/60'/{x}'/0/0", cache=cache)
+    cache.set(deriver.base_path.get_account_path(0), "0x0000000000000000000000000000000000000001")
+    lookups = registry.counter("ape_ledger_address_cache_total", "", ("result",))
+    hits, misses = lookups.get(result="hit"), lookups.get(result="miss")
+    deriver.get_address(0)
+
+    assert lookups.get(result="hit") == hits + 1
+    assert lookups.get(result="miss") == misses
+
+
+def test_account_address_not_counted(registry, account_1):
+    lookups = registry.counter("ape_ledger_address_cache_total", "", ("result",))
+    hits, misses = lookups.get(result="hit"), lookups.get(result="miss")
+    assert account_1.address
+    assert account_1.address
+
+    assert lookups.get(result="hit") == hits
+    assert lookups.get(result="miss") == misses
@@ -0,0 +1,55 @@
+import pytest
+
+from ape_ledger.profiling import disable_profiling, enable_profiling, get_profiler, phase
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    yield
+    disable_profiling()
+
+
+def test_phase_when_disabled():
+    with phase("device.open"):
+        pass
+
+    assert get_profiler() is None
+
+
+def test_phase_when_enabled():
+    profiler = enable_profiling()
+    with phase("device.open"):
+        pass
+
+    with phase("device.exchange"):
+        pass
+
+    with phase("device.exchange"):
+        pass
+
+    assert disable_profiling() is profiler
+    assert len(profiler.timings["device.open"]) == 1
+    assert len(profiler.timings["device.exchange"]) == 2
+
+    report = profiler.report().splitlines()
+    assert report[0].split() == ["Phase", "Calls", "Total", "(ms)", "Mean", "(ms)"]
+    assert report[1].startswith("device.open")
+    assert report[2].startswith("device.exchange")
+    assert report[-1].startswith("wall time")
+
+
+def test_dump_stats(tmp_path):
+    profiler = enable_profiling(use_cprofile=True)
+    with phase("encode"):
+        pass
+
+    disable_profiling()
+    path = tmp_path / "ledger.prof"
+    profiler.dump_stats(path)
+    assert path.is_file()
+
+
+def test_dump_stats_without_cprofile(tmp_path):
+    profiler = enable_profiling()
+    with pytest.raises(ValueError):
+        profiler.dump_stats(tmp_path / "ledger.prof")
@@ -0,0 +1,133 @@
+import fcntl
+import json
+import os
+
+import pytest
+from ape import accounts
+from ape_ethereum.transactions import DynamicFeeTransaction
+
+from ape_ledger.exceptions import LedgerAccountException
+from ape_ledger.spool import FAILED, PENDING, SIGNED, Spool
+
+
+@pytest.fixture(autouse=True)
+def patch_device(device_factory):
+    device_factory("accounts")
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return Spool(tmp_path / "spool")
+
+
+@pytest.fixture
+def output(tmp_path):
+    return tmp_path / "signed.jsonl"
+
+
+@pytest.fixture
+def account(alias, address, hd_path):
+    container = accounts.containers["ledger"]
+    container.save_account(alias, address, hd_path.format(x=0))
+    yield accounts.load(alias)
+    container.delete_account(alias)
+
+
+def create_transaction(nonce: int) -> DynamicFeeTransaction:
+    return DynamicFeeTransaction(
+        chain_id=1,
+        nonce=nonce,
+        gas_limit=21000,
+        value=1,
+        receiver="0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
+        max_fee=2,
+        max_priority_fee=1,
+    )
+
+
+def read_lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_enqueue(spool, account):
+    first = account.enqueue_transaction(create_transaction(0), spool=spool)
+    second = account.enqueue_transaction(create_transaction(1), spool=spool)
+
+    assert [i.id for i in spool.items()] == [first.id, second.id]
+    assert [i.status for i in spool.items(PENDING)] == [PENDING, PENDING]
+    assert next(spool.items(PENDING)).transaction["nonce"] == 0
+
+
+def test_drain(spool, account, output, mock_device):
+    for nonce in range(2):
+        account.enqueue_transaction(create_transaction(nonce), spool=spool)
+
+    items = list(spool.drain(output, verify_signer=False))
+    assert [i.status for i in items] == [SIGNED, SIGNED]
+    assert mock_device.sign_transaction.call_count == 2
+    assert [line["raw"] for line in read_lines(output)] == [i.raw for i in items]
+    assert all(i.raw.startswith("0x02") for i in items)
+    assert list(spool.items(PENDING)) == []
+    assert len(list(spool.items(SIGNED))) == 2
+
+
+def test_drain_resumes(spool, account, output, mock_device):
+    for nonce in range(3):
+        account.enqueue_transaction(create_transaction(nonce), spool=spool)
+
+    # Interrupted after the first item.
+    drain = spool.drain(output, verify_signer=False)
+    first = next(drain)
+    drain.close()
+
+    # And after writing the second item's result, before marking it signed.
+    second = next(spool.items(PENDING))
+    line = {**second.to_dict(), "status": SIGNED, "raw": "0x02", "txn_hash": "0x01"}
+    with output.open("a") as stream:
+        stream.write(f"{json.dumps(line)}\n")
+
+    third = list(spool.items(PENDING))[1]
+    mock_device.sign_transaction.reset_mock()
+    items = list(spool.drain(output, verify_signer=False))
+    assert [i.id for i in items] == [second.id, third.id]
+    assert [i.status for i in items] == [SIGNED, SIGNED]
+    assert items[0].raw == "0x02"
+    assert mock_device.sign_transaction.call_count == 1
+    assert [line["id"] for line in read_lines(output)] == [first.id, second.id, third.id]
+
+
+def test_drain_failure(spool, account, output, mock_device):
+    account.enqueue_transaction(create_transaction(0), spool=spool)
+    sign = mock_device.sign_transaction.side_effect
+    mock_device.sign_transaction.side_effect = RuntimeError("Rejected by the user")
+
+    (item,) = spool.drain(output, verify_signer=False)
+    assert item.status == FAILED
+    assert item.error == "Rejected by the user"
+    assert read_lines(output)[0]["status"] == FAILED
+
+    assert spool.retry_failed() == 1
+    mock_device.sign_transaction.side_effect = sign
+    (item,) = spool.drain(output, verify_signer=False)
+    assert item.status == SIGNED
+
+
+def test_drain_wrong_signer(spool, account, output):
+    # The mock device's signature is for another transaction.
+    account.enqueue_transaction(create_transaction(0), spool=spool)
+    (item,) = spool.drain(output, verify_signer=True)
+    assert item.status == FAILED
+    assert "signed by" in item.error
+    assert list(spool.items(FAILED)) == [item]
+
+
+def test_drain_in_progress(spool, output):
+    spool.path.mkdir(parents=True)
+    fd = os.open(spool.path / "drain.lock", os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        with pytest.raises(LedgerAccountException, match="already being drained"):
+            list(spool.drain(output, verify_signer=False))
+
+    finally:
+        os.close(fd)
@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from ape_ledger.exceptions import LedgerAccountException
+from ape_ledger.store import (
+    AccountRecord,
+    SqliteAccountStore,
+    migrate_json_accounts,
+    recover_account_files,
+    write_account_files,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteAccountStore(tmp_path / "accounts.db")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def records(account_addresses, hd_path):
+    return [
+        AccountRecord(f"account-{i}", account_addresses[i], hd_path.format(x=i)) for i in range(3)
+    ]
+
+
+class TestSqliteAccountStore:
+    def test_save_many(self, store, records):
+        store.save_many(records)
+        assert len(store) == 3
+        assert store.aliases() == ["account-0", "account-1", "account-2"]
+        assert store.get("account-1") == records[1]
+        assert "account-3" not in store
+
+    def test_find(self, store, records):
+        store.save_many(records)
+        assert store.find(records[2].address.lower()) == records[2]
+        assert store.find("0x0000000000000000000000000000000000000000") is None
+
+    def test_iter_records(self, store, records):
+        store.save_many([*records, AccountRecord("other", records[0].address, "m/44'/60'/0'/5")])
+        assert list(store.iter_records(alias_pattern="account-*")) == records
+        assert [r.alias for r in store.iter_records(hd_path_prefix="m/44'/60'/0'")] == [
+            "account-0",
+            "other",
+        ]
+
+    def test_delete_many(self, store, records):
+        store.save_many(records)
+        store.delete_many(["account-0", "account-2"])
+        assert store.aliases() == ["account-1"]
+        store.delete_all()
+        assert len(store) == 0
+
+    def test_save_many_is_atomic(self, store, records):
+        invalid = AccountRecord("invalid", "0x1234", "m/44'/60'/0'/0/0")
+        with pytest.raises(ValueError):
+            store.save_many([*records, invalid])
+
+        assert len(store) == 0
+
+    def test_version(self, store, records):
+        version = store.version
+        store.save_many(records)
+        assert store.version != version
+
+        # Changes made by other processes.
+        version = store.version
+        with sqlite3.connect(store.path) as connection:
+            connection.execute("DELETE FROM accounts WHERE alias = 'account-0'")
+
+        assert store.version != version
+        assert "account-0" not in store
+
+
+def test_migrate_json_accounts(tmp_path, store, records):
+    for record in records:
+        data = {"address": record.address, "hdpath": record.hdpath}
+        (tmp_path / f"{record.alias}.json").write_text(json.dumps(data))
+
+    assert migrate_json_accounts(tmp_path, store, delete_files=True) == 3
+    assert list(store.iter_records()) == records
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_migrate_json_accounts_invalid(tmp_path, store):
+    (tmp_path / "invalid.json").write_text("{}")
+    with pytest.raises(LedgerAccountException, match="Invalid account file"):
+        migrate_json_accounts(tmp_path, store)
+
+
+class TestWriteAccountFiles:
+    def test_write_and_delete(self, tmp_path, records):
+        assert write_account_files(tmp_path, records) == 3
+        assert sorted(p.stem for p in tmp_path.glob("*.json")) == [r.alias for r in records]
+        assert json.loads((tmp_path / "account-1.json").read_text()) == {
+            "address": records[1].address,
+            "hdpath": records[1].hdpath,
+        }
+
+        write_account_files(tmp_path, delete=["account-0", "account-2"])
+        assert [p.name for p in tmp_path.iterdir()] == ["account-1.json"]
+
+    def test_failure_changes_nothing(self, tmp_path, records):
+        def fail():
+            yield from records
+            raise ValueError("invalid record")
+
+        with pytest.raises(ValueError):
+            write_account_files(tmp_path, fail())
+
+        assert not list(tmp_path.iterdir())
+
+    def test_recover(self, mocker, tmp_path, records):
+        # Crash after committing, before all the files are in place.
+        mocker.patch("ape_ledger.store._apply_account_files", side_effect=KeyboardInterrupt)
+        with pytest.raises(KeyboardInterrupt):
+            write_account_files(tmp_path, records)
+
+        mocker.stopall()
+        assert not list(tmp_path.glob("*.json"))
+        recover_account_files(tmp_path)
+        assert len(list(tmp_path.glob("*.json"))) == 3
+        assert [p.name for p in tmp_path.iterdir() if p.is_dir()] == []
+
+    def test_recover_keeps_newer_files(self, mocker, tmp_path, records):
+        write_account_files(tmp_path, records[:1])
+        mocker.patch("ape_ledger.store._apply_account_files", side_effect=KeyboardInterrupt)
+        with pytest.raises(KeyboardInterrupt):
+            write_account_files(tmp_path, records[1:], delete=[records[0].alias])
+
+        # Saved after the crashed change.
+        mocker.stopall()
+        time.sleep(0.01)
+        newer = {"address": records[2].address, "hdpath": "m/44'/60'/9'/0/0"}
+        for alias in (records[0].alias, records[2].alias):
+            (tmp_path / f"{alias}.json").write_text(json.dumps(newer))
+
+        recover_account_files(tmp_path)
+        assert sorted(p.stem for p in tmp_path.glob("*.json")) == [r.alias for r in records]
+        assert json.loads((tmp_path / f"{records[0].alias}.json").read_text()) == newer
+        assert json.loads((tmp_path / f"{records[2].alias}.json").read_text()) == newer
+        assert json.loads((tmp_path / f"{records[1].alias}.json").read_text())["hdpath"] == (
+            records[1].hdpath
+        )
+
+    def test_recover_discards_abandoned_staging(self, tmp_path):
+        # Left behind by a process that is gone.
+        staging = tmp_path / ".staging-abc-999999999"
+        staging.joinpath("files").mkdir(parents=True)
+        staging.joinpath("files", "account-0.json").write_text("{}")
+        recover_account_files(tmp_path)
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,393 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import pytest
+import rlp  # type: ignore
+from ape_ethereum.transactions import DynamicFeeTransaction, StaticFeeTransaction
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_keys import keys
+from eth_utils import keccak
+from ledgerblue.commException import CommException  # type: ignore
+
+from ape_ledger.accounts import LedgerAccount
+from ape_ledger.client import DeviceFactory
+from ape_ledger.exceptions import LedgerSigningError
+
+from .test_derivation import MNEMONIC
+
+GET_CONFIGURATION_INS = 0x06
+SIGN_TX_INS = 0x04
+SIGN_MESSAGE_INS = 0x08
+FIRST_DATA = 0x00
+RECEIVER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+# Scale up with e.g. `LEDGER_STRESS_WORKERS=64 LEDGER_STRESS_OPS=100 LEDGER_STRESS_LATENCY=0.01`.
+WORKERS = int(os.environ.get("LEDGER_STRESS_WORKERS", 8))
+OPS = int(os.environ.get("LEDGER_STRESS_OPS", 10))
+LATENCY = float(os.environ.get("LEDGER_STRESS_LATENCY", 0.001))
+DEADLOCK_TIMEOUT = float(os.environ.get("LEDGER_STRESS_DEADLOCK_TIMEOUT", 60))
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_private_key(path: str) -> bytes:
+    return bytes(Account.from_mnemonic(MNEMONIC, account_path=path).key)
+
+
+def parse_path(payload: bytes) -> tuple[str, bytes]:
+    end = 1 + 4 * payload[0]
+    indices = struct.unpack(f">{payload[0]}I", payload[1:end])
+    nodes = [f"{i & 0x7FFFFFFF}'" if i >= 0x80000000 else f"{i}" for i in indices]
+    return "/".join(("m", *nodes)), payload[end:]
+
+
+def rlp_length(data: bytes) -> Optional[int]:
+    # The length of the RLP list at the start of `data`, once its header is in.
+    if not data:
+        return None
+
+    elif data[0] <= 0xF7:
+        return 1 + data[0] - 0xC0
+
+    end = 1 + data[0] - 0xF7
+    if len(data) < end:
+        return None
+
+    return end + int.from_bytes(data[1:end], "big")
+
+
+class EmulatedDongle:
+    """
+    Signs like a device holding the keys of ``MNEMONIC``, taking ``latency`` seconds
+    per exchange. Overlapping exchanges and interleaved requests fail, as they would
+    confuse a real device.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.errors: list[str] = []
+        self.exchanges = 0
+        self._busy = threading.Lock()
+        self._ins: Optional[int] = None
+        self._payload = b""
+
+    def exchange(self, apdu: bytes, timeout: int = 20000) -> bytearray:
+        if not self._busy.acquire(blocking=False):
+            self._fail("Overlapping exchanges.")
+
+        try:
+            time.sleep(self.latency)
+            self.exchanges += 1
+            return self._respond(bytes(apdu))
+        finally:
+            self._busy.release()
+
+    def close(self):
+        pass
+
+    def _respond(self, apdu: bytes) -> bytearray:
+        ins, p1, data = apdu[1], apdu[2], apdu[5:]
+        if ins == GET_CONFIGURATION_INS:
+            return bytearray(b"\x00\x01\x0a\x03")
+
+        elif ins not in (SIGN_TX_INS, SIGN_MESSAGE_INS):
+            self._fail(f"Unexpected instruction {ins:#x}.")
+
+        elif p1 == FIRST_DATA:
+            started, self._ins, self._payload = self._ins, ins, data
+            if started is not None:
+                self._fail("A request started before the last one finished.")
+
+        elif ins != self._ins:
+            self._ins = None
+            self._fail("Data for another request.")
+
+        else:
+            self._payload += data
+
+        signature = self._sign(ins, self._payload)
+        if signature is None:
+            # More data to come.
+            return bytearray()
+
+        self._ins = None
+        return bytearray(signature)
+
+    def _sign(self, ins: int, payload: bytes) -> Optional[bytes]:
+        path, data = parse_path(payload)
+        key = keys.PrivateKey(get_private_key(path))
+        if ins == SIGN_MESSAGE_INS:
+            size = int.from_bytes(data[:4], "big")
+            if len(data) < 4 + size:
+                return None
+
+            signed = Account.sign_message(encode_defunct(data[4:]), key.to_bytes())
+            v, r, s = signed.v, signed.r, signed.s
+
+        else:
+            is_typed = data[:1] == b"\x02"
+            body = data[1:] if is_typed else data
+            if (length := rlp_length(body)) is None or len(body) < length:
+                return None
+
+            signature = key.sign_msg_hash(keccak(data))
+            chain_id = int.from_bytes(rlp.decode(body)[6], "big")
+            v = signature.v if is_typed else (chain_id * 2 + 35 + signature.v) % 256
+            r, s = signature.r, signature.s
+
+        return bytes([v]) + r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def _fail(self, message: str):
+        self.errors.append(message)
+        raise CommException(message, 0x6A80)
+
+
+class StressReport(NamedTuple):
+    latencies: list[float]
+    """Seconds per operation."""
+
+    elapsed: float
+    """Seconds from the first operation starting to the last finishing."""
+
+    worker_times: list[float]
+    """Seconds each worker spent on its operations."""
+
+    errors: list[str]
+    """The failed operations, including response mix-ups."""
+
+    stuck: int
+    """Workers still running after the deadlock timeout."""
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else 0.0
+
+    @property
+    def ops_per_second(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fairness(self) -> float:
+        # Jain's index of the workers' times: 1.0 when every worker waits equally.
+        total = sum(self.worker_times)
+        squares = sum(t * t for t in self.worker_times)
+        return total * total / (len(self.worker_times) * squares) if squares else 1.0
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.latencies)} ops in {self.elapsed:.2f}s "
+            f"({self.ops_per_second:.1f} ops/s), "
+            f"p50 {self.percentile(50) * 1000:.1f}ms, "
+            f"p95 {self.percentile(95) * 1000:.1f}ms, "
+            f"p99 {self.percentile(99) * 1000:.1f}ms, "
+            f"fairness {self.fairness:.3f}, "
+            f"{len(self.errors)} error(s), {self.stuck} stuck"
+        )
+
+
+def sign_once(account: LedgerAccount, worker: int, index: int):
+    """
+    Sign a message or transaction unique to the operation and check that
+    the signature is from the account and for that message or transaction.
+    """
+    if index % 2:
+        message = encode_defunct(text=f"worker {worker} message {index}")
+        signature = account.sign_message(message)
+        assert signature is not None
+        signer = Account.recover_message(message, signature=signature.encode_rsv())
+        if signer != account.address:
+            raise AssertionError(f"Response mix-up: message signed by '{signer}'.")
+
+        return
+
+    txn_type = DynamicFeeTransaction if index % 4 else StaticFeeTransaction
+    txn = txn_type(
+        chain_id=1,
+        nonce=index,
+        gas_limit=21000,
+        value=worker,
+        receiver=RECEIVER,
+        sender=account.address,
+        **({"max_fee": 2, "max_priority_fee": 1} if index % 4 else {"gas_price": 1}),
+    )
+    try:
+        # Checks the signature recovers to the account (see ``verify_signer``).
+        signed = account.sign_transaction(txn, verify_signer=True)
+        assert signed is not None
+        signed.serialize_transaction()
+    except LedgerSigningError as err:
+        raise AssertionError(f"Response mix-up: {err}") from err
+
+
+def run_stress(
+    accounts: list[LedgerAccount],
+    workers: int = WORKERS,
+    ops: int = OPS,
+    mode: str = "threads",
+    deadlock_timeout: float = DEADLOCK_TIMEOUT,
+    operation: Callable[[LedgerAccount, int, int], None] = sign_once,
+) -> StressReport:
+    """
+    Run ``ops`` operations in each of ``workers`` threads (or asyncio tasks, each
+    operation in a thread), all starting at once, using the accounts in turn.
+    """
+    latencies: list[float] = []
+    worker_times = [0.0] * workers
+    errors: list[str] = []
+    finished: set[int] = set()
+
+    def run_op(worker: int, index: int):
+        start = time.perf_counter()
+        try:
+            operation(accounts[worker % len(accounts)], worker, index)
+        except Exception as err:
+            errors.append(f"Worker {worker}, operation {index}: {err!r}")
+        finally:
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            worker_times[worker] += latency
+
+    start = time.perf_counter()
+    if mode == "threads":
+        barrier = threading.Barrier(workers)
+
+        def work(worker: int):
+            barrier.wait()
+            for index in range(ops):
+                run_op(worker, index)
+
+            finished.add(worker)
+
+        threads = [
+            # NOTE: Daemon threads, so a deadlock fails the test instead of hanging it.
+            threading.Thread(target=work, args=(w,), name=f"stress-{w}", daemon=True)
+            for w in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        deadline = time.monotonic() + deadlock_timeout
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    else:
+
+        async def in_thread(worker: int, index: int):
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            def run():
+                run_op(worker, index)
+                try:
+                    loop.call_soon_threadsafe(future.set_result, None)
+                except RuntimeError:
+                    # The loop stopped after a deadlock.
+                    pass
+
+            threading.Thread(target=run, daemon=True).start()
+            await future
+
+        async def work(worker: int):
+            for index in range(ops):
+                await in_thread(worker, index)
+
+            finished.add(worker)
+
+        async def main():
+            tasks = [asyncio.create_task(work(w)) for w in range(workers)]
+            await asyncio.wait(tasks, timeout=deadlock_timeout)
+            for task in tasks:
+                task.cancel()
+
+        asyncio.run(main())
+
+    return StressReport(
+        latencies=list(latencies),
+        elapsed=time.perf_counter() - start,
+        worker_times=worker_times,
+        errors=list(errors),
+        stuck=workers - len(finished),
+    )
+
+
+@pytest.fixture
+def dongle(mocker):
+    dongle = EmulatedDongle(latency=LATENCY)
+    mocker.patch("ape_ledger.client.get_dongle", return_value=dongle)
+    return dongle
+
+
+@pytest.fixture
+def factory(mocker, dongle):
+    factory = DeviceFactory(idle_timeout=None)
+    mocker.patch("ape_ledger.accounts.get_device", side_effect=factory.create_device)
+    yield factory
+    factory.close()
+
+
+@pytest.fixture
+def stress_accounts(tmp_path, mock_container, factory):
+    accounts = []
+    for index in range(4):
+        path = f"m/44'/60'/0'/0/{index}"
+        account_file = tmp_path / f"stress-{index}.json"
+        address = Account.from_key(get_private_key(path)).address
+        account_file.write_text(json.dumps({"address": address, "hdpath": path}))
+        accounts.append(LedgerAccount(container=mock_container, account_file_path=account_file))
+
+    return accounts
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mode", ("threads", "asyncio"))
+@pytest.mark.parametrize("num_accounts", (1, 4))
+def test_stress(record_property, dongle, stress_accounts, mode, num_accounts):
+    report = run_stress(stress_accounts[:num_accounts], mode=mode)
+    logger.info(f"Stress ({mode}, {num_accounts} account(s)): {report}")
+    for name in ("p50", "p95", "p99"):
+        record_property(f"{name}_seconds", report.percentile(float(name[1:])))
+
+    record_property("ops_per_second", report.ops_per_second)
+    assert report.stuck == 0, f"Deadlock: {report}"
+    assert report.errors == [], report.errors
+    assert dongle.errors == []
+    assert len(report.latencies) == WORKERS * OPS
+
+
+def test_stress_detects_mix_ups(dongle, stress_accounts):
+    # A device answering each request with the signature for the one before.
+    exchange = dongle.exchange
+    last = [bytearray(), bytearray()]
+
+    def answer_late(apdu, **kwargs):
+        response = exchange(apdu, **kwargs)
+        if len(response) < 65:
+            return response
+
+        last.append(response)
+        return last.pop(0) or response
+
+    dongle.exchange = answer_late
+    report = run_stress(stress_accounts[:1], workers=2, ops=4)
+    assert report.errors
+    assert all("mix-up" in e for e in report.errors)
+
+
+def test_stress_detects_deadlocks(stress_accounts):
+    lock = threading.Lock()
+
+    def deadlock(account, worker, index):
+        lock.acquire()
+
+    report = run_stress(stress_accounts, workers=2, ops=1, deadlock_timeout=0.2, operation=deadlock)
+    assert report.stuck == 1
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+import pytest
+
+from ape_ledger.client import LedgerDeviceClient
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.profiling import disable_profiling, enable_profiling, phase
+from ape_ledger.tracing import collapse, disable_tracing, enable_tracing, get_tracer, span
+
+from .test_client import SlowDongle
+
+
+@pytest.fixture(autouse=True)
+def clean_tracer():
+    yield
+    disable_tracing()
+
+
+def test_span_when_disabled():
+    with span("encode", field="data") as current:
+        current.set_attribute("size", 1)
+
+    assert get_tracer() is None
+
+
+def test_span_nesting():
+    tracer = enable_tracing()
+    with span("sign_transaction", alias="test") as parent:
+        with span("encode"):
+            pass
+
+        with pytest.raises(ValueError):
+            with span("device.exchange"):
+                raise ValueError()
+
+    assert disable_tracing() is tracer
+    encode, exchange, sign = tracer.spans
+    assert sign is parent
+    assert sign.attributes == {"alias": "test"}
+    assert encode.parent is sign
+    assert exchange.stack == ("sign_transaction", "device.exchange")
+    assert exchange.attributes == {"error": "ValueError"}
+    assert sign.duration_ns >= encode.duration_ns + exchange.duration_ns
+
+
+def test_span_threads():
+    tracer = enable_tracing()
+
+    def check():
+        with span("verify"):
+            pass
+
+    with span("sign_transaction"):
+        thread = threading.Thread(target=check)
+        thread.start()
+        thread.join()
+
+    # Opened in another thread, so not a child.
+    verify, sign = tracer.spans
+    assert verify.parent is None
+    assert verify.thread != sign.thread
+
+
+def test_phase_traced():
+    profiler = enable_profiling()
+    tracer = enable_tracing()
+    with phase("encode"):
+        pass
+
+    disable_profiling()
+    assert len(profiler.timings["encode"]) == 1
+    assert [s.name for s in tracer.spans] == ["encode"]
+
+
+def test_device_spans(hd_path, address):
+    client = LedgerDeviceClient(HDAccountPath(hd_path.format(x=0)), transport=SlowDongle(address))
+    tracer = enable_tracing()
+    client.get_address(timeout=1)
+    client.close()
+
+    exchange = next(s for s in tracer.spans if s.name == "device.exchange")
+    apdus = [s for s in tracer.spans if s.parent is exchange]
+    assert [s.name for s in apdus] == ["device.apdu"]
+    assert apdus[0].attributes["method"] == "get_address"
+
+
+def test_export(tmp_path):
+    tracer = enable_tracing()
+    with span("sign_transaction"):
+        time.sleep(0.01)
+        for field in ("data", "destination"):
+            with span("encode.to_bytes", field=field):
+                time.sleep(0.01)
+
+    path = tmp_path / "trace.jsonl"
+    tracer.export(path)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["encode.to_bytes"] * 2 + ["sign_transaction"]
+    assert [line["attributes"].get("field") for line in lines] == ["data", "destination", None]
+    assert lines[0]["parent_id"] == lines[2]["id"]
+    assert lines[2]["parent_id"] is None
+
+    path = tmp_path / "trace.folded"
+    tracer.export(path, format="collapsed")
+    assert path.read_text().splitlines() == collapse(tracer.spans)
+
+    # Self time, with each stack once.
+    stacks = dict(line.rsplit(" ", 1) for line in collapse(tracer.spans))
+    assert list(stacks) == ["sign_transaction;encode.to_bytes", "sign_transaction"]
+    assert 20000 <= int(stacks["sign_transaction;encode.to_bytes"]) < 200000
+    assert 10000 <= int(stacks["sign_transaction"]) < 100000
+
+    with pytest.raises(ValueError):
+        tracer.export(path, format="svg")
@@ -0,0 +1,146 @@
+import json
+import time
+
+import pytest
+from ledgerblue.commException import CommException  # type: ignore
+
+from ape_ledger.client import LedgerDeviceClient
+from ape_ledger.exceptions import LedgerAccountException
+from ape_ledger.hdpath import HDAccountPath
+from ape_ledger.transport import RecordingTransport, ReplayTransport
+
+GET_ADDRESS_INS = 0x02
+SIGNATURE = (27, 2**255 + 1, 2**254 + 3)
+
+
+class FakeDongle:
+    """
+    Answers like a device, taking ``latency`` seconds per exchange.
+    """
+
+    def __init__(self, address: str, latency: float = 0.0):
+        self.address = address
+        self.latency = latency
+        self.closed = False
+
+    def exchange(self, apdu: bytes, timeout: int = 20000) -> bytearray:
+        time.sleep(self.latency)
+        if apdu[1] == GET_ADDRESS_INS:
+            address = self.address[2:].encode("ascii")
+            return bytearray(b"\x41" + b"\x04" * 65 + bytes([len(address)]) + address)
+
+        v, r, s = SIGNATURE
+        return bytearray(bytes([v]) + r.to_bytes(32, "big") + s.to_bytes(32, "big"))
+
+    def close(self):
+        self.closed = True
+
+
+class RejectingDongle(FakeDongle):
+    def exchange(self, apdu: bytes, timeout: int = 20000) -> bytearray:
+        raise CommException("Invalid status 6985", 0x6985)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    return tmp_path / "session.jsonl"
+
+
+@pytest.fixture
+def account(hd_path):
+    return HDAccountPath(hd_path.format(x=0))
+
+
+def record_session(account, dongle, recording) -> tuple:
+    transport = RecordingTransport(dongle, recording)
+    client = LedgerDeviceClient(account, transport=transport)
+    results = (client.get_address(), client.sign_message(b"hello"))
+    transport.close()
+    return results
+
+
+class TestRecordingTransport:
+    def test_exchange(self, account, address, recording):
+        dongle = FakeDongle(address)
+        address_result, signature = record_session(account, dongle, recording)
+
+        assert address_result.lower() == address.lower()
+        assert signature == SIGNATURE
+        assert dongle.closed
+        exchanges = [json.loads(line) for line in recording.read_text().splitlines()]
+        assert len(exchanges) == 2
+        assert all({"apdu", "response", "elapsed"} <= e.keys() for e in exchanges)
+
+    def test_exchange_error(self, account, address, recording):
+        transport = RecordingTransport(RejectingDongle(address), recording)
+        with pytest.raises(CommException):
+            transport.exchange(b"\xe0\x04\x00\x00\x00")
+
+        transport.close()
+        exchange = json.loads(recording.read_text())
+        assert exchange["sw"] == 0x6985
+        assert "response" not in exchange
+
+
+class TestReplayTransport:
+    def test_replay(self, account, address, recording):
+        expected = record_session(account, FakeDongle(address), recording)
+        transport = ReplayTransport(recording)
+        client = LedgerDeviceClient(account, transport=transport)
+
+        assert (client.get_address(), client.sign_message(b"hello")) == expected
+        assert transport.remaining == 0
+
+        transport.rewind()
+        assert client.get_address() == expected[0]
+
+    def test_replay_error(self, account, address, recording):
+        transport = RecordingTransport(RejectingDongle(address), recording)
+        with pytest.raises(CommException):
+            transport.exchange(b"\xe0\x04\x00\x00\x00")
+
+        transport.close()
+        with pytest.raises(CommException):
+            ReplayTransport(recording).exchange(b"\xe0\x04\x00\x00\x00")
+
+    def test_replay_mismatch(self, account, address, recording):
+        record_session(account, FakeDongle(address), recording)
+        client = LedgerDeviceClient(account, transport=ReplayTransport(recording))
+        with pytest.raises(LedgerAccountException, match="does not match"):
+            client.sign_message(b"hello")
+
+    def test_replay_exhausted(self, account, address, recording):
+        record_session(account, FakeDongle(address), recording)
+        transport = ReplayTransport(recording)
+        client = LedgerDeviceClient(account, transport=transport)
+        client.get_address()
+        client.sign_message(b"hello")
+        with pytest.raises(LedgerAccountException, match="No recorded exchanges left"):
+            client.get_address()
+
+    def test_close_does_not_release_device_lock(self, mocker, account, address, recording):
+        record_session(account, FakeDongle(address), recording)
+        get_lock = mocker.patch("ape_ledger.client.get_device_lock")
+        client = LedgerDeviceClient(account, transport=ReplayTransport(recording))
+        client.close()
+        assert not get_lock.called
+
+
+@pytest.mark.benchmark
+def test_benchmark_replay(account, address, recording):
+    # Record a session with a device taking 5ms per exchange.
+    count = 20
+    transport = RecordingTransport(FakeDongle(address, latency=0.005), recording)
+    client = LedgerDeviceClient(account, transport=transport)
+    expected = [client.sign_message(f"message {i}".encode()) for i in range(count)]
+    transport.close()
+    device_time = sum(json.loads(line)["elapsed"] for line in recording.read_text().splitlines())
+
+    # Replaying leaves only the host-side time.
+    replay = LedgerDeviceClient(account, transport=ReplayTransport(recording))
+    start = time.perf_counter()
+    results = [replay.sign_message(f"message {i}".encode()) for i in range(count)]
+    host_time = time.perf_counter() - start
+
+    assert results == expected
+    assert host_time < device_time
@@ -0,0 +1,73 @@
+import pytest
+
+from ape_ledger.store import AccountRecord
+from ape_ledger.verification import MISMATCH, SKIPPED, VERIFIED, VerificationLog, verify_accounts
+
+from .test_derivation import PARENT_PATH, get_expected_address, get_extended_public_key
+
+
+@pytest.fixture(autouse=True)
+def patch_device(device_factory, mock_device):
+    device_factory("derivation")
+    mock_device.get_public_key.side_effect = None
+    mock_device.get_public_key.return_value = get_extended_public_key(PARENT_PATH)
+
+
+@pytest.fixture
+def log(tmp_path):
+    return VerificationLog(tmp_path / "verified.json")
+
+
+@pytest.fixture
+def records():
+    return [
+        AccountRecord(
+            f"account-{i}", get_expected_address(f"{PARENT_PATH}/{i}"), f"{PARENT_PATH}/{i}"
+        )
+        for i in range(3)
+    ]
+
+
+def test_verify_accounts(log, records, mock_device):
+    results = list(verify_accounts(records, log=log))
+    assert [r.status for r in results] == [VERIFIED] * 3
+    assert [r.device_address for r in results] == [r.address for r in records]
+
+    # One device request for every account of the template.
+    assert mock_device.get_public_key.call_count == 1
+    assert mock_device.get_address.call_count == 0
+
+    # Recorded for the next check.
+    assert VerificationLog(log.path).get(records[1]) == results[1].verified_at
+
+
+def test_verify_accounts_incremental(log, records, mock_device):
+    first = list(verify_accounts(records[:2], log=log))
+    results = list(verify_accounts(records, log=log))
+
+    # One verified account is checked again, to notice a different device.
+    assert [r.status for r in results] == [VERIFIED, SKIPPED, VERIFIED]
+    assert results[1].verified_at == first[1].verified_at
+    assert results[0].verified_at > first[0].verified_at
+
+    results = list(verify_accounts(records, max_age=0, log=log))
+    assert [r.status for r in results] == [VERIFIED] * 3
+
+
+def test_verify_accounts_mismatch(log, records):
+    records[1] = records[1]._replace(address=records[2].address)
+    results = list(verify_accounts(records, log=log))
+    assert [r.status for r in results] == [VERIFIED, MISMATCH, VERIFIED]
+    assert results[1].device_address == get_expected_address(f"{PARENT_PATH}/1")
+    assert results[1].verified_at is None
+    assert log.get(records[1]) is None
+
+
+def test_verify_accounts_different_device(log, records, mock_device):
+    list(verify_accounts(records, log=log))
+    mock_device.get_public_key.return_value = get_extended_public_key("m/44'/60'/1'/0")
+
+    # The re-checked account no longer matches, so none are skipped.
+    results = list(verify_accounts(records, log=log))
+    assert [r.status for r in results] == [MISMATCH] * 3
+    assert log.entries == {}